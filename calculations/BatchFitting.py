@@ -0,0 +1,483 @@
+"""
+Batch fitting of projects to multiple equations (runs without GUI)
+"""
+import argparse
+import os
+from concurrent.futures import as_completed
+
+from calculations.DataFitting import find_fit, find_set_fits, find_global_fit, find_modifier_fit, available_equations, \
+    data_equations, equation_key, get_executor, select_cache, modifier_params, attach_levels, TWO_SUBSTRATE_EQUATIONS
+from calculations.Estimators import with_estimates
+from calculations.FitCache import FitCache, set_fit_cache
+from calculations.RestartPlanner import RestartPlanner
+from calculations.ModelHierarchy import NESTED_IN, fit_levels, fit_record, nested_start, saved_evaluations
+from calculations.ModelsIO import data_to_xls, fit_to_xls, selection_to_xls, global_fit_to_xls, modifier_fit_to_xls
+from calculations.ModelSelection import CRITERIA, screen_models
+from calculations.Bootstrap import METHODS as RESAMPLING, bootstrap_intervals, throughput_scaling
+from calculations.Profiles import profile_intervals
+from calculations.Sampler import sample_posterior
+from calculations.ProjectIO import EXTENSION, open_project, save_project, is_project_file
+from calculations.ProjectFits import ProjectFits
+import calculations.ReactionPlots as reaction_plots
+
+
+def make_file_path(path_list, filename=None):
+    """
+    Creates a path for your file and returns ful path
+    """
+    fullpath = os.path.join(*path_list)
+    if not os.path.exists(fullpath):
+        os.makedirs(fullpath)
+    if filename is not None:
+        return os.path.join(fullpath, filename)
+    else:
+        return fullpath
+
+
+def create_valid_folder(path, name):
+    """
+    Creates returns directory to save results to
+    """
+    savepath_r = os.path.join(path, name)
+    savepath = savepath_r
+
+    n = 0
+    while os.path.exists(savepath):
+        n += 1
+        savepath = savepath_r + '_' + str(n)
+    os.makedirs(savepath)
+    return savepath
+
+
+def add_intervals(sel_eq, fit, fitpoints, groups, bootstrap, workers=1, seed=None, cache=None, profiles=False,
+                  mcmc=None, chain_file=None):
+    """
+    Adds bootstrap confidence intervals to the fit if bootstrap is (samples, resampling method),
+    profile likelihood intervals if profiles and posterior if mcmc is (steps, thinning), chain is
+    written to chain_file. Intervals which can not be computed (one replicate to resample,
+    fewer points than parameters) are left out.
+    """
+    if bootstrap is not None:
+        try:
+            bootstrap_intervals(sel_eq, fit, fitpoints, *bootstrap, groups=groups, workers=workers, seed=seed)
+        except ValueError:
+            pass
+    if profiles:
+        try:
+            profile_intervals(sel_eq, fit, fitpoints, workers=workers, cache=cache)
+        except ValueError:
+            pass
+    if mcmc is not None:
+        try:
+            sample_posterior(sel_eq, fit, fitpoints, n_steps=mcmc[0], thin=mcmc[1], path=chain_file, seed=seed)
+        except ValueError:
+            pass
+
+
+def make_ss_output(exp_data, savefolder, sel_eq, workers=1, seed=None, cache=None, planner=None, estimate=False,
+                   simple=None, bootstrap=None, profiles=False, mcmc=None, stored=None):
+    """
+    Creates outputs for single substrate, fit is seeded from record of simpler equation if given.
+    bootstrap is (samples, resampling method) of confidence intervals or None, with profiles
+    profile likelihood intervals are added, mcmc is (steps, thinning) of posterior sampling or None.
+    stored are ProjectFits, fit is taken from them if data did not change (new fit is stored).
+    Returns fit record.
+    """
+    # calculate parameters (or reuse stored ones)
+    fitpoints = exp_data.get_allpoints()
+    params = with_estimates(sel_eq, *fitpoints) if estimate else sel_eq
+    calc_result = stored.get(params, fitpoints) if stored is not None else None
+    if calc_result is None:
+        calc_result = find_fit(sel_eq,
+                               sel_eq.initializations,
+                               *fitpoints,
+                               workers=workers, seed=seed, cache=cache, planner=planner, estimate=estimate,
+                               nested=None if simple is None else nested_start(sel_eq, simple))
+        if stored is not None:
+            stored.put(params, fitpoints, calc_result)
+    plotfolder = make_file_path([savefolder, sel_eq.name])
+    # intervals are computed for the equation with modifier concentration taken from data
+    add_intervals(params, calc_result, fitpoints, exp_data.store.replicate_bounds(), bootstrap,
+                  workers=workers, seed=seed, cache=cache, profiles=profiles, mcmc=mcmc,
+                  chain_file=make_file_path([plotfolder], '{} posterior.npy'.format(sel_eq.name)))
+
+    # make fit plots
+    reaction_plots.plotoutput(exp_data, plotfolder, plot_fun=calc_result)
+
+    # make residuals plot
+    reaction_plots.resi_to_file(exp_data, plotfolder, equation=calc_result)
+
+    # make excel report
+    xls_file = make_file_path([plotfolder], '{} fit report.xlsx'.format(sel_eq.name))
+    fit_to_xls(exp_data, calc_result, xls_file)
+    return fit_record(calc_result)
+
+
+def make_ds_output(exp_data, savefolder, sel_eq, workers=1, seed=None, cache=None, planner=None, estimate=False,
+                   simple=None, bootstrap=None, profiles=False, mcmc=None, global_fit=False, stored=None):
+    """
+    Creates outputs for double substrate, fits are seeded from records of simpler equation if given.
+    bootstrap is (samples, resampling method) of confidence intervals or None, with profiles
+    profile likelihood intervals are added, mcmc is (steps, thinning) of posterior sampling or None.
+    If global_fit, two substrate equations are also fitted to all sets at once (separate report).
+    stored are ProjectFits, set fits are taken from them if no set changed (new fits are stored).
+    Returns {orientation: [fit record for each set]}
+    """
+    plotfolder = make_file_path([savefolder, sel_eq.name])
+
+    # make fits (or reuse stored ones)
+    fits = stored.get_sets(sel_eq, exp_data, estimate=estimate) if stored is not None else None
+    if fits is None:
+        nested = None
+        if simple is not None:
+            nested = {a_var: [nested_start(sel_eq, record) for record in records]
+                      for a_var, records in simple.items()}
+        fits = find_set_fits(sel_eq, sel_eq.initializations, exp_data, workers=workers, seed=seed, cache=cache,
+                             planner=planner, estimate=estimate, nested=nested)
+        if stored is not None:
+            stored.put_sets(sel_eq, exp_data, fits, estimate=estimate)
+    for a_var, set_fits in fits.items():
+        for set_pos, (fit, fitpoints) in enumerate(zip(set_fits, exp_data.get_points(a_var))):
+            chain_file = make_file_path([plotfolder], '{} posterior {} set {}.npy'.format(
+                sel_eq.name, exp_data.nameA if a_var else exp_data.nameB, set_pos + 1))
+            add_intervals(sel_eq, fit, fitpoints, exp_data.stores[a_var].replicate_bounds(set_pos), bootstrap,
+                          workers=workers, seed=seed, cache=cache, profiles=profiles, mcmc=mcmc,
+                          chain_file=chain_file)
+
+    # write xls
+    xls_file = make_file_path([plotfolder], '{} fit report.xlsx'.format(sel_eq.name))
+    fit_to_xls(exp_data, fits, xls_file)
+    if global_fit and equation_key(sel_eq) in TWO_SUBSTRATE_EQUATIONS:
+        global_result = find_global_fit(sel_eq, sel_eq.initializations, exp_data, workers=workers, seed=seed,
+                                        cache=cache, planner=planner, estimate=estimate)
+        global_fit_to_xls(exp_data, global_result,
+                          make_file_path([plotfolder], '{} global fit report.xlsx'.format(sel_eq.name)))
+
+    # make fit plots
+    reaction_plots.plotoutput(exp_data, plotfolder, plot_fun=fits)
+    reaction_plots.resi_to_file(exp_data, plotfolder, equations=fits)
+    return {a_var: [fit_record(fit) for fit in set_fits] for a_var, set_fits in fits.items()}
+
+
+def make_modifier_output(exp_data, savefolder, sel_eq, workers=1, seed=None, cache=None, planner=None,
+                         estimate=False, simple=None, bootstrap=None, profiles=False, mcmc=None, stored=None):
+    """
+    Creates outputs for data measured at several inhibitor or activator concentrations (one joint fit
+    of all concentrations), fit is seeded from record of simpler equation if given.
+    stored are ProjectFits, fit is taken from them if data did not change (new fit is stored).
+    Returns fit record.
+    """
+    fitpoints = exp_data.get_allpoints()
+    params = modifier_params(with_estimates(sel_eq, *fitpoints) if estimate else sel_eq)
+    calc_result = stored.get(params, fitpoints) if stored is not None else None
+    if calc_result is None:
+        calc_result = find_modifier_fit(sel_eq, sel_eq.initializations, exp_data, workers=workers, seed=seed,
+                                        cache=cache, planner=planner, estimate=estimate,
+                                        nested=None if simple is None else nested_start(sel_eq, simple))
+        if stored is not None:
+            stored.put(params, fitpoints, calc_result)
+    else:
+        attach_levels(calc_result, params, exp_data)
+    plotfolder = make_file_path([savefolder, sel_eq.name])
+    # intervals are computed for the equation with modifier concentration taken from data
+    add_intervals(params, calc_result, fitpoints, exp_data.store.replicate_bounds(), bootstrap,
+                  workers=workers, seed=seed, cache=cache, profiles=profiles, mcmc=mcmc,
+                  chain_file=make_file_path([plotfolder], '{} posterior.npy'.format(sel_eq.name)))
+
+    # make fit and residuals plots
+    reaction_plots.plotoutput(exp_data, plotfolder, plot_fun=calc_result)
+    reaction_plots.resi_to_file(exp_data, plotfolder, equation=calc_result)
+
+    # make excel report
+    xls_file = make_file_path([plotfolder], '{} fit report.xlsx'.format(sel_eq.name))
+    modifier_fit_to_xls(exp_data, calc_result, xls_file)
+    return fit_record(calc_result)
+
+
+def make_output(exp_data, savefolder, sel_eq, workers=1, seed=None, cache=None, planner=None, estimate=False,
+                simple=None, bootstrap=None, profiles=False, mcmc=None, global_fit=False, stored=None):
+    """
+    Creates outputs for single or double substrate data or modifier series (seeded from fit records
+    of simpler equation if given). Fits are reused from and saved to stored ProjectFits if given.
+    Returns (equation, fit records, stored records of the equation)
+    """
+    if exp_data.has_modifier():
+        records = make_modifier_output(exp_data, savefolder, sel_eq, workers=workers, seed=seed, cache=cache,
+                                       planner=planner, estimate=estimate, simple=simple, bootstrap=bootstrap,
+                                       profiles=profiles, mcmc=mcmc, stored=stored)
+    elif exp_data.is_single():
+        records = make_ss_output(exp_data, savefolder, sel_eq, workers=workers, seed=seed, cache=cache,
+                                 planner=planner, estimate=estimate, simple=simple, bootstrap=bootstrap,
+                                 profiles=profiles, mcmc=mcmc, stored=stored)
+    else:
+        records = make_ds_output(exp_data, savefolder, sel_eq, workers=workers, seed=seed, cache=cache,
+                                 planner=planner, estimate=estimate, simple=simple, bootstrap=bootstrap,
+                                 profiles=profiles, mcmc=mcmc, global_fit=global_fit, stored=stored)
+    return sel_eq, records, {} if stored is None else stored.equation_records(sel_eq)
+
+
+def equation_cost(exp_data, sel_eq):
+    """
+    Returns estimated fitting cost (parameters x starts x points)
+    """
+    if exp_data.is_single() or exp_data.has_modifier():
+        n_points = len(exp_data.get_allpoints()[0])
+    else:
+        n_points = len(exp_data.get_allpoints(True)[0]) + len(exp_data.get_allpoints(False)[0])
+    return len(sel_eq.param_order) * (sel_eq.initializations + 1) * n_points
+
+
+def flat_records(records):
+    """
+    Returns list of fit records (of all sets for double substrate)
+    """
+    if isinstance(records, dict) and 'values' not in records:
+        return [record for a_var in (True, False) for record in records.get(a_var, [])]
+    return [records]
+
+
+def write_evaluations(savefolder, equations, records, planner=None, nested=False):
+    """
+    Writes function evaluations of every equation (and lower estimate of evaluations saved by
+    seeding from simpler equation if nested) to tab separated file, returns total saved
+    """
+    total_saved = 0
+    lines = ['Equation\tSeeded from\tRestarts done\tEvaluations\tSaved (at least)']
+    for equa in equations:
+        key = equation_key(equa)
+        fit_records = flat_records(records[key])
+        simple = NESTED_IN.get(key) if nested and NESTED_IN.get(key) in records else None
+        saved = 0
+        if simple is not None:
+            saved = sum(saved_evaluations(record, equa.initializations, planner) for record in fit_records)
+        total_saved += saved
+        lines.append('{}\t{}\t{}\t{}\t{}'.format(key, simple or '-',
+                                                   sum(record['restarts'] for record in fit_records),
+                                                   sum(record['evaluations'] for record in fit_records), saved))
+    lines.append('Total\t\t\t\t{}'.format(total_saved))
+    with open(make_file_path([savefolder], 'evaluations.txt'), 'w') as efile:
+        efile.write('\n'.join(lines) + '\n')
+    return total_saved
+
+
+def run_analysis(exp_data, savepath, equations, workers=1, seed=None, progress=None, cache=None, planner=None,
+                 estimate=False, nested=False, bootstrap=None, profiles=False, mcmc=None, global_fit=False,
+                 stored=None):
+    """
+    Fits data to all given equations and saves results to new project folder.
+    If nested, simpler equations are fitted first and richer equations containing them
+    (see ModelHierarchy) start from their solutions, their restarts are run only if the seeded fit
+    improves on the simpler equation (see nested_search); evaluations are written to evaluations.txt.
+    bootstrap is (samples, resampling method) of confidence intervals added to reports or None,
+    with profiles profile likelihood intervals are added too, mcmc is (steps, thinning) of posterior
+    sampling (chains are saved next to reports) or None. If global_fit, two substrate equations are
+    also fitted to all sets of both orientations at once.
+    stored are ProjectFits of the project: fits of unchanged data are taken from them, new fits are added.
+    With more than one worker every equation of a level is an independent job on a process pool,
+    the most expensive ones are started first (workers share only on-disk part of the cache).
+    progress(done, total, name) is called after each equation is finished.
+    Returns the folder.
+    """
+    savefolder = create_valid_folder(savepath, exp_data.name)
+
+    raw_data_xls = make_file_path([savefolder], 'input_data.xlsx')
+    data_to_xls(exp_data, raw_data_xls)
+
+    levels = fit_levels(equations) if nested else [equations]
+    records = {}
+    done = 0
+    for level in levels:
+        simple_records = [records.get(NESTED_IN.get(equation_key(equa))) if nested else None for equa in level]
+        if workers > 1 and len(level) > 1:
+            schedule = sorted(zip(level, simple_records), key=lambda job: equation_cost(exp_data, job[0]),
+                              reverse=True)
+            pool = get_executor(workers)
+            cache = select_cache(cache)
+            jobs = [pool.submit(make_output, exp_data, savefolder, parameter, 1, seed,
+                                False if cache is None else cache, planner, estimate, simple, bootstrap,
+                                profiles, mcmc, global_fit, stored)
+                    for parameter, simple in schedule]
+            finished = (job.result() for job in as_completed(jobs))
+        else:
+            finished = (make_output(exp_data, savefolder, parameter, workers=workers, seed=seed, cache=cache,
+                                    planner=planner, estimate=estimate, simple=simple, bootstrap=bootstrap,
+                                    profiles=profiles, mcmc=mcmc, global_fit=global_fit, stored=stored)
+                        for parameter, simple in zip(level, simple_records))
+        for parameter, fit_records, stored_records in finished:
+            records[equation_key(parameter)] = fit_records
+            if stored is not None:
+                # fits made in worker processes are stored in their copies
+                stored.records.update(stored_records)
+            done += 1
+            if progress is not None:
+                progress(done, len(equations), parameter.name)
+
+    write_evaluations(savefolder, equations, records, planner, nested)
+    return savefolder
+
+
+def run_screen(exp_data, savepath, equations, criterion='aicc', workers=1, seed=None, cache=None, planner=None,
+               estimate=False, nested=False):
+    """
+    Fits data to all given equations in one pass and writes ranked summary workbook to savepath.
+    Returns (workbook file, ranked summaries)
+    """
+    ranking, tests = screen_models(exp_data, equations, criterion=criterion, workers=workers, seed=seed, cache=cache,
+                                   planner=planner, estimate=estimate, nested=nested)
+    xls_file = make_file_path([savepath], '{} model selection.xlsx'.format(exp_data.name))
+    selection_to_xls(exp_data, ranking, tests, xls_file, criterion)
+    return xls_file, ranking
+
+
+def bootstrap_scaling(exp_data, sel_eq, max_workers, n_samples=200, method='residuals', seed=0):
+    """
+    Returns bootstrap throughput [(workers, samples per second, speedup)] for doubling worker counts
+    up to max_workers, measured on the whole data (one substrate, modifier series) or first set (two substrates)
+    """
+    if exp_data.is_single() or exp_data.has_modifier():
+        fitpoints = exp_data.get_allpoints()
+        groups = exp_data.store.replicate_bounds()
+    else:
+        fitpoints = next(exp_data.get_points(True))
+        groups = exp_data.stores[True].replicate_bounds(0)
+    best_fit = find_fit(sel_eq, sel_eq.initializations, *fitpoints, seed=seed, cache=False)
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != max_workers and max_workers > 1:
+        worker_counts.append(max_workers)
+    return throughput_scaling(sel_eq, best_fit, fitpoints, worker_counts, n_samples, method, groups, seed)
+
+
+def load_projects(path, mmap=True):
+    """
+    Returns (file name, data) of project file (or legacy pickle) or of all of them in a directory.
+    With mmap data columns of project files are memory mapped (projects saved back to their own
+    file must be loaded without it, mapped files can not be replaced on Windows).
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, fname) for fname in os.listdir(path)
+                       if fname.endswith(EXTENSION) or fname.endswith('.pkl'))
+    else:
+        files = [path]
+    return [(fname, open_project(fname, mmap)) for fname in files]
+
+
+def select_equations(exp_data, keys=None):
+    """
+    Returns equations applicable to the data (only those in keys if given)
+    """
+    equations = data_equations(exp_data)
+    if keys is None:
+        return equations
+    known = [equation_key(equa) for equa in available_equations(False)]
+    for key in keys:
+        if key not in known:
+            raise ValueError('Unknown equation {} (choose from: {})'.format(key, ', '.join(known)))
+    return [equa for equa in equations if equation_key(equa) in keys]
+
+
+def main(argv=None):
+    """
+    Command line batch fitting
+    """
+    parser = argparse.ArgumentParser(prog='python -m calculations',
+                                     description='Fits ITEKA project(s) to selected equations '
+                                                 'and writes the same result folders as the GUI batch run.')
+    parser.add_argument('project', help='project file ({}) or legacy pickle (.pkl), or directory with them'
+                        .format(EXTENSION))
+    parser.add_argument('-o', '--output', default='.', help='folder to save results to (default: current)')
+    parser.add_argument('-m', '--models', nargs='+', metavar='MODEL',
+                        help='equations to fit, e.g. MM HE TC (default: all applicable)')
+    parser.add_argument('-r', '--restarts', type=int, default=0,
+                        help='maximum number of restarts per fit (default: 0)')
+    parser.add_argument('--starts', choices=RestartPlanner.methods, default='lhs',
+                        help='design of restart starting points (default: lhs)')
+    parser.add_argument('--log', dest='log_space', action='store_true',
+                        help='sample constants on log instead of linear scale')
+    parser.add_argument('--agree', type=int, default=3,
+                        help='stop restarts once this many fits reach the same minimum, 0 never stops '
+                             '(default: 3)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='worker processes used for restarts (default: 1)')
+    parser.add_argument('-s', '--seed', type=int, default=None, help='random seed for restarts')
+    parser.add_argument('-e', '--estimate', action='store_true',
+                        help='estimate starting values and bounds from data')
+    parser.add_argument('--nested', action='store_true',
+                        help='seed richer equations (e.g. HE, CI) from fits of simpler ones (e.g. MM), their restarts '
+                             'are run only if the seeded fit improves on the simpler equation')
+    parser.add_argument('-b', '--bootstrap', type=int, default=0, metavar='SAMPLES',
+                        help='add bootstrap confidence intervals from this many resampled fits to reports')
+    parser.add_argument('--resample', choices=RESAMPLING, default='residuals',
+                        help='what bootstrap resamples (default: residuals)')
+    parser.add_argument('-p', '--profiles', action='store_true',
+                        help='add profile likelihood confidence intervals to reports')
+    parser.add_argument('--mcmc', type=int, default=0, metavar='STEPS',
+                        help='sample posterior of parameters with ensemble sampler for this many steps')
+    parser.add_argument('--thin', type=int, default=1,
+                        help='keep every THIN-th step of posterior chains (default: 1)')
+    parser.add_argument('--scaling', action='store_true',
+                        help='only measure bootstrap throughput of first equation for worker counts up to --workers')
+    parser.add_argument('-g', '--global', dest='global_fit', action='store_true',
+                        help='also fit two substrate equations to all sets at once (one shared parameter set)')
+    parser.add_argument('--screen', action='store_true',
+                        help='only rank equations by information criteria, results are written to one workbook')
+    parser.add_argument('--criterion', choices=CRITERIA, default='aicc',
+                        help='criterion used to rank equations with --screen (default: aicc)')
+    parser.add_argument('-k', '--keep-fits', action='store_true',
+                        help='reuse fits stored in project files ({}) whose data did not change and store new fits '
+                             'in them'.format(EXTENSION))
+    parser.add_argument('--migrate', action='store_true',
+                        help='only convert legacy project pickles to project files ({}) next to them'.format(EXTENSION))
+    parser.add_argument('-c', '--cache', metavar='FOLDER',
+                        help='folder to keep fit results in, unchanged fits are not repeated '
+                             '(used with --seed or without restarts)')
+    args = parser.parse_args(argv)
+
+    if args.migrate:
+        for fname, exp_data in load_projects(args.project):
+            if not is_project_file(fname):
+                print('{}: converted to {}'.format(fname, save_project(exp_data,
+                                                                       os.path.splitext(fname)[0] + EXTENSION)))
+        return 0
+
+    if args.cache is not None:
+        set_fit_cache(FitCache(path=args.cache))
+    planner = RestartPlanner(args.starts, log_space=args.log_space, agree=args.agree)
+
+    # projects are saved back with their fits
+    for fname, exp_data in load_projects(args.project, mmap=not args.keep_fits):
+        try:
+            equations = select_equations(exp_data, args.models)
+        except ValueError as err:
+            parser.error('{}: {}'.format(fname, err))
+        if not equations:
+            print('{}: none of selected equations apply, skipped'.format(fname))
+            continue
+        for equa in equations:
+            equa.initializations = args.restarts
+        if args.scaling:
+            print('{}: bootstrap throughput of {}'.format(fname, equations[0].name))
+            for workers, rate, speedup in bootstrap_scaling(exp_data, equations[0], args.workers,
+                                                            max(args.bootstrap, 200), args.resample):
+                print('  {:3d} workers: {:8.1f} samples/s (x{:.2f})'.format(workers, rate, speedup))
+            continue
+        if args.screen:
+            xls_file, ranking = run_screen(exp_data, args.output, equations, criterion=args.criterion,
+                                           workers=args.workers, seed=args.seed, planner=planner,
+                                           estimate=args.estimate, nested=args.nested)
+            if ranking[0]['rank'] is not None:
+                print('{}: best equation {}'.format(fname, ranking[0]['name']))
+            print('{}: ranking saved to {}'.format(fname, xls_file))
+            continue
+        stored = ProjectFits(fname) if args.keep_fits and is_project_file(fname) else None
+        savefolder = run_analysis(exp_data, args.output, equations, workers=args.workers, seed=args.seed,
+                                  planner=planner, estimate=args.estimate, nested=args.nested,
+                                  bootstrap=(args.bootstrap, args.resample) if args.bootstrap else None,
+                                  profiles=args.profiles, mcmc=(args.mcmc, args.thin) if args.mcmc else None,
+                                  global_fit=args.global_fit, stored=stored)
+        print('{}: results saved to {}'.format(fname, savefolder))
+        if stored is not None:
+            save_project(exp_data, fname, fits=stored.records)
+            print('{}: {} fits stored in project'.format(fname, len(stored)))
+    return 0
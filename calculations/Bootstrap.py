@@ -0,0 +1,146 @@
+"""
+Bootstrap confidence intervals of fitted parameters: data are resampled (residuals or whole
+replicates) and refitted from the best fit, chunks of samples run on process pool
+"""
+import random
+import time
+from copy import deepcopy
+import numpy as np
+
+from calculations.DataFitting import get_executor
+
+
+METHODS = ('residuals', 'replicates')
+
+# samples fitted by one pool job
+CHUNK_SIZE = 50
+
+
+def resample(fitpoints, predicted, method, groups, rng):
+    """
+    Returns one bootstrap sample of fit points: predicted rates with resampled residuals ('residuals')
+    or replicates (points between group bounds) drawn with replacement ('replicates')
+    """
+    if method == 'residuals':
+        errors = fitpoints[1] - predicted
+        rates = predicted + errors[rng.randint(len(errors), size=len(errors))]
+        return (fitpoints[0], rates) + tuple(fitpoints[2:])
+    picked = rng.randint(len(groups) - 1, size=len(groups) - 1)
+    index = np.concatenate([np.arange(groups[pos], groups[pos + 1]) for pos in picked])
+    return tuple(points[index] for points in fitpoints)
+
+
+def run_samples(param_object, fitpoints, predicted, method, groups, seed, samples):
+    """
+    Fits bootstrap samples with given numbers, returns (len(samples), n_params) values in param_order
+    (nan rows where fit failed). Every sample number has its own random stream, so results do not
+    depend on how samples are split between jobs.
+    """
+    values = np.full((len(samples), len(param_object.param_order)), np.nan)
+    for row, sample in enumerate(samples):
+        rng = np.random.RandomState([seed, sample])
+        points = resample(fitpoints, predicted, method, groups, rng)
+        try:
+            solution = param_object.get_solution(*points)
+        except (OverflowError, ZeroDivisionError, ValueError):
+            continue
+        values[row] = [solution.params[par].value for par in param_object.param_order]
+    return values
+
+
+def bootstrap_samples(param_object, best_fit, fitpoints, n_samples=1000, method='residuals', groups=None, workers=1,
+                      seed=None, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Returns (n_samples, n_params) parameter values (in param_order) fitted to resampled data,
+    every fit starts from best_fit values and bounds. groups are point offsets of replicates
+    (needed for 'replicates' method, see ColumnStore.replicate_bounds).
+    progress(done, total) is called after each chunk of samples is fitted.
+    """
+    if method not in METHODS:
+        raise ValueError('Unknown resampling method {} (choose from: {})'.format(method, ', '.join(METHODS)))
+    if seed is None:
+        seed = random.randrange(2**31)
+    fitpoints = tuple(np.asarray(points, dtype=float) for points in fitpoints)
+    if method == 'replicates':
+        groups = np.asarray([0, len(fitpoints[0])] if groups is None else groups, dtype=int)
+        if len(groups) < 3:
+            raise ValueError('Resampling of replicates needs at least two replicates')
+    predicted = fitpoints[1] + best_fit.residual
+
+    # samples are fitted with the bounds and fixed parameters of the best fit
+    start = deepcopy(param_object)
+    for par in start.param_order:
+        fitted = best_fit.params[par]
+        start[par].set(min=fitted.min, max=fitted.max, vary=fitted.vary)
+        start[par].set(value=fitted.value)
+
+    chunks = np.array_split(np.arange(n_samples), max(1, -(-n_samples // chunk_size)))
+    if workers > 1 and len(chunks) > 1:
+        pool = get_executor(workers)
+        jobs = [pool.submit(run_samples, start, fitpoints, predicted, method, groups, seed, chunk)
+                for chunk in chunks]
+        results = (job.result() for job in jobs)
+    else:
+        results = (run_samples(start, fitpoints, predicted, method, groups, seed, chunk) for chunk in chunks)
+    values = []
+    for chunk, chunk_values in zip(chunks, results):
+        values.append(chunk_values)
+        if progress is not None:
+            progress(int(chunk[-1]) + 1 if len(chunk) else 0, n_samples)
+    return np.vstack(values)
+
+
+def percentile_intervals(samples, param_order, level=0.95):
+    """
+    Returns {parameter: (lower, upper)} percentile intervals of successful samples
+    """
+    fitted = samples[np.all(np.isfinite(samples), axis=1)]
+    if len(fitted) == 0:
+        return {par: (np.nan, np.nan) for par in param_order}
+    tail = 50 * (1 - level)
+    lower, upper = np.percentile(fitted, [tail, 100 - tail], axis=0)
+    return {par: (float(low), float(high)) for par, low, high in zip(param_order, lower, upper)}
+
+
+def bootstrap_intervals(param_object, best_fit, fitpoints, n_samples=1000, method='residuals', groups=None,
+                        workers=1, seed=None, level=0.95, progress=None):
+    """
+    Returns percentile confidence intervals {parameter: (lower, upper)}. They are also saved as
+    best_fit.intervals, with settings, failed samples and samples per second in best_fit.bootstrap.
+    progress(done, total) is called as samples are fitted.
+    """
+    started = time.time()
+    samples = bootstrap_samples(param_object, best_fit, fitpoints, n_samples, method, groups, workers, seed,
+                                progress=progress)
+    elapsed = max(time.time() - started, 1e-9)
+    best_fit.intervals = percentile_intervals(samples, param_object.param_order, level)
+    best_fit.bootstrap = {'level': level, 'method': method, 'samples': n_samples,
+                          'failed': int(np.sum(~np.all(np.isfinite(samples), axis=1))),
+                          'workers': workers, 'rate': n_samples / elapsed}
+    return best_fit.intervals
+
+
+def throughput_scaling(param_object, best_fit, fitpoints, worker_counts=(1, 2, 4), n_samples=200,
+                       method='residuals', groups=None, seed=0):
+    """
+    Returns [(workers, samples per second, speedup against first count)] of bootstrap
+    (pool processes are started before timing)
+    """
+    rows = []
+    for workers in worker_counts:
+        if workers > 1:
+            bootstrap_samples(param_object, best_fit, fitpoints, 2 * workers, method, groups, workers, seed,
+                              chunk_size=1)
+        started = time.time()
+        bootstrap_samples(param_object, best_fit, fitpoints, n_samples, method, groups, workers, seed)
+        rate = n_samples / max(time.time() - started, 1e-9)
+        rows.append((workers, rate, rate / rows[0][1] if rows else 1.0))
+    return rows
+
+
+def format_intervals(intervals, level=0.95):
+    """
+    Returns text with one 'parameter: [lower, upper]' line for every parameter
+    """
+    return '\n'.join('{} {:.0%} CI: [{:.5g}, {:.5g}]'.format(par, level, low, high)
+                     for par, (low, high) in intervals.items())
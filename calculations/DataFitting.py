@@ -3,19 +3,189 @@ Functions and classes for data fitting
 """
 import lmfit
 import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from calculations.equations import *
+from calculations.equations.fitparam import rebuild_fitparam
+from calculations.FitCache import fit_key, get_fit_cache, get_warm_starts
+from calculations.RestartPlanner import RestartPlanner
+from calculations.Estimators import with_estimates
 import numpy as np
 from copy import deepcopy
 
 
-def random_start(in_params):
+# shared process pools (by number of workers)
+_executors = {}
+
+# restarts done in one round over process pool (per worker) when restarts can stop early
+ROUND_STARTS = 2
+
+# warm start is accepted if mean squared residual is at most this much (relatively) worse than before
+WARM_TOLERANCE = 0.1
+
+# richer equation seeded from nested simpler one is searched with restarts only if it decreases
+# mean squared residual by more than this (relatively)
+NESTED_GAIN = 0.05
+
+
+def available_equations(single=True):
+    """
+    Returns new parameter objects of all equations applicable to the data
+    """
+    equations = [MMparams(), HEparams(), AInHparams(), CIparams(), MAparams(), NCIparams(),
+                 MIparams(), SAparams(), SUAparams(), UCIparams()]
+    if not single:
+        equations += [PPMparams(), PPMSIparams(), TCparams(), TCSIparams()]
+    return equations
+
+
+def data_equations(exp_data):
+    """
+    Returns new parameter objects of equations applicable to the data object. For data measured
+    at several inhibitor or activator concentrations these are taken from data (one joint fit).
+    """
+    if not exp_data.has_modifier():
+        return available_equations(exp_data.is_single())
+    return [equa.use_modifier_data() if equa.modifier is not None else equa for equa in available_equations()]
+
+
+# equations of two substrate concentrations (fitted globally to both orientations)
+TWO_SUBSTRATE_EQUATIONS = ('PPM', 'PPMSI', 'TC', 'TCSI')
+
+
+def equation_key(param_object):
+    """
+    Returns short equation identifier (class name without 'params', e.g. 'MM')
+    """
+    return param_object.__class__.__name__[:-len('params')]
+
+
+def equation_class(key):
+    """
+    Returns parameter class of equation identifier (see equation_key)
+    """
+    param_class = globals().get(key + 'params')
+    if param_class is None:
+        raise ValueError('Unknown equation {}'.format(key))
+    return param_class
+
+
+class FitResult(object):
+    """
+    Fitted equation: identifier of equation, fitted values, bounds and standard errors (arrays in
+    param_order), residuals and fit statistics. Parameters and fitted equation are rebuilt from them
+    when first needed (and are not pickled), so results are cheap to send to other processes and to
+    store. Calling the result evaluates fitted equation.
+    Confidence intervals, posterior and residual statistics are added by functions computing them.
+    """
+    __slots__ = ('model', 'modifier_data', 'values', 'lower', 'upper', 'vary', 'stderr', 'var_names', 'covar',
+                 'residual', 'nfev', 'evaluations', 'restarts', 'intervals', 'bootstrap', 'profiles', 'posterior',
+                 'set_deviations', 'level_deviations', 'modifier', '_params', '_function')
+
+    # rebuilt objects, not pickled
+    cached = ('_params', '_function')
+
+    def __init__(self, model, values, lower, upper, vary, stderr=None, var_names=(), covar=None, residual=None,
+                 nfev=0, modifier_data=False):
+        self.model = model
+        self.modifier_data = modifier_data
+        self.values = np.asarray(values, dtype=float)
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.vary = np.asarray(vary, dtype=bool)
+        self.stderr = np.full(len(self.values), np.nan) if stderr is None else np.asarray(stderr, dtype=float)
+        self.var_names = list(var_names)
+        self.covar = None if covar is None else np.asarray(covar, dtype=float)
+        self.residual = None if residual is None else np.asarray(residual, dtype=float)
+        self.nfev = nfev
+        self.evaluations = nfev
+        self.restarts = 0
+        self._params = None
+        self._function = None
+
+    @classmethod
+    def from_solution(cls, solution):
+        """
+        Returns result of lmfit solution (minimize of parameter object)
+        """
+        params = solution.params
+        fitted = [params[par] for par in params.param_order]
+        fit = cls(equation_key(params), [par.value for par in fitted], [par.min for par in fitted],
+                  [par.max for par in fitted], [par.vary for par in fitted],
+                  [np.nan if par.stderr is None else par.stderr for par in fitted], solution.var_names,
+                  getattr(solution, 'covar', None), solution.residual, solution.nfev, params.modifier_data)
+        fit.evaluations = getattr(solution, 'evaluations', solution.nfev)
+        fit.restarts = getattr(solution, 'restarts', 0)
+        return fit
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__
+                if name not in self.cached and hasattr(self, name)}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._params = None
+        self._function = None
+
+    @property
+    def params(self):
+        """
+        Parameter object with fitted values, bounds and standard errors (stderr is None if unknown)
+        """
+        if self._params is None:
+            param_class = equation_class(self.model)
+            order = param_class().param_order
+            settings = zip(order, self.values, self.lower, self.upper, self.vary)
+            params = rebuild_fitparam(param_class, settings, modifier_data=self.modifier_data)
+            for par, stderr in zip(order, self.stderr):
+                params[par].stderr = None if np.isnan(stderr) else float(stderr)
+            self._params = params
+        return self._params
+
+    @property
+    def param_order(self):
+        return self.params.param_order
+
+    @property
+    def name(self):
+        return self.params.name
+
+    @property
+    def units(self):
+        return self.params.units
+
+    @property
+    def nvarys(self):
+        return len(self.var_names)
+
+    @property
+    def chisqr(self):
+        return float(np.sum(self.residual ** 2))
+
+    @property
+    def function(self):
+        """
+        Fitted equation (rates of concentrations)
+        """
+        if self._function is None:
+            self._function = self.params.eq(*self.values)
+        return self._function
+
+    def __call__(self, *points):
+        return self.function(*points)
+
+    def get_units(self, par, exp_data):
+        return self.params.get_units(par, exp_data)
+
+
+def fit_result(solution):
     """
-    Creates random starting points
+    Returns FitResult of lmfit solution (results are returned unchanged)
     """
-    params = in_params
-    for param in params:
-        params[param].value = random.uniform(params[param].min, params[param].max)
-    return params
+    if isinstance(solution, FitResult):
+        return solution
+    return FitResult.from_solution(solution)
 
 
 def get_scaling_factor(x_val, y_val):
@@ -30,9 +200,224 @@ def get_scaling_factor(x_val, y_val):
     return 1
 
 
-def find_fit(param_object, inicializations, *fitpoints):
+def cpu_workers():
+    """
+    Returns number of available processors
+    """
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def get_executor(workers):
+    """
+    Returns shared process pool with given number of workers
+    """
+    if workers not in _executors:
+        _executors[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _executors[workers]
+
+
+def sum_squares(solution):
+    """
+    Returns sum of residuals squared for a solution
+    """
+    return sum(solution.residual**2)
+
+
+def run_restarts(param_object, starts, fitpoints):
+    """
+    Fits from each row of starting values (in param_order), returns list of solutions
+    (None where fit failed)
+    """
+    solutions = []
+    for values in starts:
+        for name, value in zip(param_object.param_order, values):
+            param_object[name].value = value
+        try:
+            solutions.append(fit_result(param_object.get_solution(*fitpoints)))
+        except (OverflowError, ZeroDivisionError, ValueError):
+            # equation can not be evaluated from this starting point
+            solutions.append(None)
+    return solutions
+
+
+def search_fit(param_object, inicializations, fitpoints, workers=1, seed=None, planner=None):
+    """
+    Returns best solution from the default start and at most inicializations restarts planned by
+    planner (RestartPlanner() if None). Restarts are done in order (in rounds over process pool
+    if workers > 1) until planner finds search converged, so results do not depend on workers.
+    Number of restarts done is saved as solution.restarts and number of function evaluations
+    of all fits as solution.evaluations.
+    """
+    param_object = deepcopy(param_object)
+    if planner is None:
+        planner = RestartPlanner()
+    if seed is None:
+        seed = random.randrange(2**31)
+    starts = planner.plan(param_object, inicializations, seed)
+
+    try:
+        best_fit = fit_result(param_object.get_solution(*fitpoints))
+        residual_sums = [sum_squares(best_fit)]
+        evaluations = best_fit.nfev
+    except (OverflowError, ZeroDivisionError, ValueError):
+        # restarts may still find a solution
+        if inicializations == 0:
+            raise
+        best_fit = None
+        residual_sums = []
+        evaluations = 0
+    restart_object = deepcopy(param_object)
+    parallel = workers > 1 and inicializations > 1
+    if not parallel:
+        round_size = 1
+    elif planner.agree:
+        round_size = workers * ROUND_STARTS
+    else:
+        round_size = inicializations
+
+    spent = 0
+    for first in range(0, inicializations, round_size):
+        round_starts = starts[first:first + round_size]
+        if parallel:
+            pool = get_executor(workers)
+            jobs = [pool.submit(run_restarts, restart_object, chunk, fitpoints)
+                    for chunk in np.array_split(round_starts, min(len(round_starts), workers * 4))]
+            solutions = [solution for job in jobs for solution in job.result()]
+        else:
+            solutions = run_restarts(restart_object, round_starts, fitpoints)
+
+        # solutions are used in order, so early stop is the same as in serial search
+        for solution in solutions:
+            spent += 1
+            if solution is not None:
+                evaluations += solution.nfev
+                residual_sums.append(sum_squares(solution))
+                if best_fit is None or residual_sums[-1] < sum_squares(best_fit):
+                    best_fit = solution
+            if planner.converged(residual_sums):
+                break
+        if planner.converged(residual_sums):
+            break
+
+    if best_fit is None:
+        raise ValueError('Equation could not be fitted from any starting point')
+    best_fit.restarts = spent
+    best_fit.evaluations = evaluations
+    return best_fit
+
+
+def warm_search(param_object, inicializations, fitpoints, workers=1, seed=None, warm_start=None, planner=None):
+    """
+    Fits from previous (values, mean squared residual) if given. Random restarts are skipped
+    when it converges to comparable residuals, otherwise best of both searches is returned.
+    """
+    if warm_start is None:
+        return search_fit(param_object, inicializations, fitpoints, workers=workers, seed=seed, planner=planner)
+
+    values, last_mean_square = warm_start
+    try:
+        warm_fit = fit_result(with_values(param_object, values).get_solution(*fitpoints))
+    except (OverflowError, ZeroDivisionError, ValueError):
+        return search_fit(param_object, inicializations, fitpoints, workers=workers, seed=seed, planner=planner)
+    warm_fit.restarts = 0
+    warm_fit.evaluations = warm_fit.nfev
+    if np.mean(warm_fit.residual ** 2) <= last_mean_square * (1 + WARM_TOLERANCE):
+        return warm_fit
+    cold_fit = search_fit(param_object, inicializations, fitpoints, workers=workers, seed=seed, planner=planner)
+    return better_fit(warm_fit, cold_fit)
+
+
+def nested_search(param_object, inicializations, fitpoints, workers=1, seed=None, nested=None, planner=None):
+    """
+    Fits richer equation from (values, mean squared residual) of converged simpler equation nested in it
+    (values give the same rates). Restarts are skipped unless the richer equation decreases residuals
+    by more than NESTED_GAIN, best of both searches is returned then.
+    """
+    values, simple_mean_square = nested
+    try:
+        nested_fit = fit_result(with_values(param_object, values).get_solution(*fitpoints))
+    except (OverflowError, ZeroDivisionError, ValueError):
+        return search_fit(param_object, inicializations, fitpoints, workers=workers, seed=seed, planner=planner)
+    nested_fit.restarts = 0
+    nested_fit.evaluations = nested_fit.nfev
+    if inicializations == 0 or np.mean(nested_fit.residual ** 2) >= simple_mean_square * (1 - NESTED_GAIN):
+        return nested_fit
+    cold_fit = search_fit(param_object, inicializations, fitpoints, workers=workers, seed=seed, planner=planner)
+    return better_fit(nested_fit, cold_fit)
+
+
+def with_values(param_object, values):
+    """
+    Returns copy of parameter object starting from values (in param_order) clipped to bounds,
+    fixed parameters are kept
+    """
+    param_object = deepcopy(param_object)
+    for par, value in zip(param_object.param_order, values):
+        if param_object[par].vary and np.isfinite(value):
+            param_object[par].value = min(max(value, param_object[par].min), param_object[par].max)
+    return param_object
+
+
+def better_fit(start_fit, cold_fit):
+    """
+    Returns fit with lower residuals, restarts and evaluations count both searches
+    """
+    best_fit = start_fit if sum_squares(start_fit) < sum_squares(cold_fit) else cold_fit
+    best_fit.restarts = cold_fit.restarts
+    best_fit.evaluations = start_fit.nfev + cold_fit.evaluations
+    return best_fit
+
+
+def warm_key(exp_data, param_object, a_var=None, set_pos=0):
+    """
+    Returns key of warm start for the set of data fitted to equation with its bounds, fixed parameters
+    and number of restarts (starting values are replaced by the warm start, see WarmStarts.forget)
+    """
+    bounds = tuple((param_object[par].min, param_object[par].max, param_object[par].vary)
+                   for par in param_object.param_order)
+    return (exp_data.uid, equation_key(param_object), a_var, set_pos, bounds,
+            getattr(param_object, 'initializations', 0))
+
+
+def select_cache(cache=None):
+    """
+    Returns cache to use (default one if None, no cache if False)
+    """
+    if cache is None:
+        return get_fit_cache()
+    if cache is False:
+        return None
+    return cache
+
+
+def search_key(param_object, inicializations, seed, fitpoints, planner=None, nested=None):
     """
-    Returns best fit for a given function
+    Returns cache key of a search or None if result is not reproducible (restarts without seed)
+    """
+    options = None
+    if nested is not None:
+        options = repr(([float(value) for value in nested[0]], float(nested[1])))
+    if inicializations == 0:
+        return fit_key(param_object, 0, None, fitpoints, options)
+    if seed is None:
+        return None
+    planner = RestartPlanner() if planner is None else planner
+    return fit_key(param_object, inicializations, seed, fitpoints,
+                   repr(planner) if options is None else repr(planner) + options)
+
+
+def find_fit(param_object, inicializations, *fitpoints, workers=1, seed=None, cache=None, warm=None, planner=None,
+             estimate=False, nested=None):
+    """
+    Returns best fit (FitResult) for a given function
+    (reproducible results are taken from cache when the same fit was done before).
+    warm is a warm_key, refit then starts from last solution with the same key.
+    nested is (values, mean squared residual) of simpler equation fit, see nested_search.
+    planner plans restarts (RestartPlanner() if None).
+    If estimate, starting values and bounds are estimated from the data.
     """
     # # scale up rates
     # scaling_factor = get_scaling_factor(np.mean(fitpoints[0]), np.mean(fitpoints[1]))
@@ -42,17 +427,25 @@ def find_fit(param_object, inicializations, *fitpoints):
     # param_object['v_max'].max *= scaling_factor
     # param_object['v_max'].min *= scaling_factor
 
-    # # Multiple Reruns
-    param_object = deepcopy(param_object)
-    best_fit = param_object.get_solution(*fitpoints)
-    # rerun i times
-    #for i in range(5):
-    #    best_fit.minimize()
+    if estimate:
+        param_object = with_estimates(param_object, *fitpoints)
 
-    # search for random inicialization fits
-    if inicializations > 0:
-        alt_fits = [random_start(param_object).get_solution(*fitpoints) for _ in range(inicializations)]
-        best_fit = min(alt_fits + [best_fit], key=lambda sol: sum(sol.residual**2))
+    cache = select_cache(cache)
+    key = search_key(param_object, inicializations, seed, fitpoints, planner, nested) if cache is not None else None
+    best_fit = cache.get(key) if key is not None else None
+    if best_fit is None:
+        warm_start = get_warm_starts().get(warm) if warm is not None else None
+        if warm_start is None and nested is not None:
+            best_fit = nested_search(param_object, inicializations, fitpoints, workers=workers, seed=seed,
+                                     nested=nested, planner=planner)
+        else:
+            best_fit = warm_search(param_object, inicializations, fitpoints, workers=workers, seed=seed,
+                                   warm_start=warm_start, planner=planner)
+        # warm started results depend on history of the data, they are not cached
+        if key is not None and warm_start is None:
+            cache.put(key, best_fit)
+    if warm is not None:
+        get_warm_starts().put(warm, best_fit, param_object.param_order)
 
     # # scale down
     # best_fit.params['v_max'].value /= scaling_factor
@@ -60,8 +453,147 @@ def find_fit(param_object, inicializations, *fitpoints):
     # best_fit.params['v_max'].min /= scaling_factor
     # best_fit.residual /= scaling_factor
 
-    # append the equation
-    best_fit.function = param_object.eq(*[best_fit.values[idx] for idx in param_object.param_order])
-    best_fit.units = param_object.units
-    best_fit.get_units = param_object.get_units
-    return best_fit
+    # results cached by older versions are lmfit solutions
+    return fit_result(best_fit)
+
+
+def find_set_fits(param_object, inicializations, exp_data, orientations=(True, False), workers=1, seed=None,
+                  cache=None, warm=False, planner=None, estimate=False, nested=None):
+    """
+    Fits every set of two substrate data (for each orientation of variable substrate).
+    Sets are independent jobs on process pool if workers > 1.
+    If warm, every set is refitted from its last solution.
+    If estimate, starting values and bounds are estimated from data of each set.
+    nested is {orientation: [nested start for each set]} from simpler equation (see nested_search).
+    Returns {orientation: [fit for each set]}
+    """
+    set_points = [(a_var, fitpoints) for a_var in orientations for fitpoints in exp_data.get_points(a_var)]
+    set_warm = [warm_key(exp_data, param_object, a_var, set_pos) if warm else None
+                for a_var in orientations for set_pos in range(len(exp_data.AllVar[a_var]))]
+    set_nested = [nested[a_var][set_pos] if nested is not None else None
+                  for a_var in orientations for set_pos in range(len(exp_data.AllVar[a_var]))]
+
+    if workers > 1 and len(set_points) > 1:
+        set_params = [with_estimates(param_object, *fitpoints) if estimate else param_object
+                      for _, fitpoints in set_points]
+        cache = select_cache(cache)
+        keys = [search_key(params, inicializations, seed, fitpoints, planner, start) if cache is not None else None
+                for params, (_, fitpoints), start in zip(set_params, set_points, set_nested)]
+        raw_fits = [cache.get(key) if key is not None else None for key in keys]
+
+        warm_starts = [get_warm_starts().get(key) if key is not None else None for key in set_warm]
+
+        # only sets missing from cache are fitted
+        pool = get_executor(workers)
+        jobs = {}
+        for pos, (_, fitpoints) in enumerate(set_points):
+            if raw_fits[pos] is not None:
+                continue
+            if warm_starts[pos] is None and set_nested[pos] is not None:
+                jobs[pos] = pool.submit(nested_search, set_params[pos], inicializations, fitpoints, 1, seed,
+                                        set_nested[pos], planner)
+            else:
+                jobs[pos] = pool.submit(warm_search, set_params[pos], inicializations, fitpoints, 1, seed,
+                                        warm_starts[pos], planner)
+        for pos, job in jobs.items():
+            raw_fits[pos] = job.result()
+            if keys[pos] is not None and warm_starts[pos] is None:
+                cache.put(keys[pos], raw_fits[pos])
+        for key, raw_fit in zip(set_warm, raw_fits):
+            if key is not None:
+                get_warm_starts().put(key, raw_fit, param_object.param_order)
+        solutions = [fit_result(raw_fit) for raw_fit in raw_fits]
+    else:
+        solutions = [find_fit(param_object, inicializations, *fitpoints, workers=workers, seed=seed, cache=cache,
+                              warm=key, planner=planner, estimate=estimate, nested=start)
+                     for (_, fitpoints), key, start in zip(set_points, set_warm, set_nested)]
+
+    fits = {a_var: [] for a_var in orientations}
+    for (a_var, _), solution in zip(set_points, solutions):
+        fits[a_var].append(solution)
+    return fits
+
+
+def residual_stats(residual, set_ids):
+    """
+    Returns (points, mean residual, rms residual) arrays of every set
+    """
+    counts = np.bincount(set_ids)
+    means = np.bincount(set_ids, weights=residual) / counts
+    rms = np.sqrt(np.bincount(set_ids, weights=residual ** 2) / counts)
+    return counts, means, rms
+
+
+def set_deviations(exp_data, residual, set_ids):
+    """
+    Returns residual statistics of global fit for every set: [{'orientation', 'set', 'constant',
+    'points', 'mean residual', 'rms residual'}] (residuals are predicted - measured rates)
+    """
+    counts, means, rms = residual_stats(residual, set_ids)
+    deviations = []
+    for a_var in (True, False):
+        for set_pos, const_mean in enumerate(exp_data.get_const_mean(a_var)):
+            set_id = len(deviations)
+            deviations.append({'orientation': exp_data.nameA if a_var else exp_data.nameB, 'set': set_pos + 1,
+                               'constant': float(np.mean(const_mean)), 'points': int(counts[set_id]),
+                               'mean residual': float(means[set_id]), 'rms residual': float(rms[set_id])})
+    return deviations
+
+
+def find_global_fit(param_object, inicializations, exp_data, workers=1, seed=None, cache=None, warm=False,
+                    planner=None, estimate=False):
+    """
+    Fits one parameter vector to all sets of both orientations of two substrate data at once.
+    Analytic Jacobian of the shared parameters is evaluated for all points together, so cost grows
+    linearly with number of sets. Residual statistics of every set are saved as fit.set_deviations.
+    """
+    subs_a, rate, subs_b, set_ids = exp_data.get_global_points()
+    fit = find_fit(param_object, inicializations, subs_a, rate, subs_b, workers=workers, seed=seed, cache=cache,
+                   warm=warm_key(exp_data, param_object, 'global') if warm else None, planner=planner,
+                   estimate=estimate)
+    fit.set_deviations = set_deviations(exp_data, fit.residual, set_ids)
+    return fit
+
+
+def level_deviations(exp_data, residual):
+    """
+    Returns residual statistics of joint fit for every modifier concentration: [{'set', 'modifier',
+    'points', 'mean residual', 'rms residual'}] (residuals are predicted - measured rates)
+    """
+    counts, means, rms = residual_stats(residual, exp_data.get_set_ids())
+    return [{'set': set_pos + 1, 'modifier': level, 'points': int(counts[set_pos]),
+             'mean residual': float(means[set_pos]), 'rms residual': float(rms[set_pos])}
+            for set_pos, level in enumerate(exp_data.get_levels())]
+
+
+def find_modifier_fit(param_object, inicializations, exp_data, workers=1, seed=None, cache=None, warm=False,
+                      planner=None, estimate=False, nested=None):
+    """
+    Fits one parameter vector to rates at all substrate and modifier concentrations at once
+    (inhibitor or activator concentration of every point is taken from data, not fitted).
+    Equations without modifier are fitted to all points together. Residual statistics of every
+    modifier concentration are saved as fit.level_deviations, name of modifier parameter as fit.modifier.
+    """
+    param_object = modifier_params(param_object)
+    fit = find_fit(param_object, inicializations, *exp_data.get_allpoints(), workers=workers, seed=seed,
+                   cache=cache, warm=warm_key(exp_data, param_object, 'modifier') if warm else None,
+                   planner=planner, estimate=estimate, nested=nested)
+    return attach_levels(fit, param_object, exp_data)
+
+
+def modifier_params(param_object):
+    """
+    Returns equation fitted to modifier series (copy with modifier concentration taken from data)
+    """
+    if param_object.modifier is not None and not param_object.modifier_data:
+        return deepcopy(param_object).use_modifier_data()
+    return param_object
+
+
+def attach_levels(fit, param_object, exp_data):
+    """
+    Appends residual statistics of every modifier concentration and name of modifier parameter to the fit
+    """
+    fit.level_deviations = level_deviations(exp_data, fit.residual)
+    fit.modifier = param_object.modifier
+    return fit
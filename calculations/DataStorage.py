@@ -1,15 +1,5 @@
 import numpy as np
-import random
-
-
-def random_start(in_params):
-    """
-    Creates random starting points
-    """
-    params = in_params
-    for param in params:
-        params[param].value = random.uniform(params[param].min, params[param].max)
-    return params
+import uuid
 
 
 def transform_data(in_string):
@@ -21,19 +11,191 @@ def transform_data(in_string):
     return np.array(proc_vals)
 
 
+class ColumnStore(object):
+    """
+    Holds data columns in contiguous float64 buffer (one row per column) with offsets of
+    replicates and sets. Views returned are read-only and never change: mutations that
+    would move existing values write to a new buffer.
+    """
+    def __init__(self, n_columns):
+        self.buffer = np.empty((n_columns, 0))
+        self.size = 0
+        # point index where each replicate starts (last one is end of data)
+        self.rep_offsets = [0]
+        # replicate index where each set starts (last one is number of replicates)
+        self.set_offsets = [0]
+        self.version = 0
+        self._cache = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # plain array even if buffer is memory mapped from project file
+        state['buffer'] = np.array(self.buffer[:, :self.size])
+        state['_cache'] = {}
+        return state
+
+    def touch(self):
+        """
+        Marks data as changed (drops cached views)
+        """
+        self.version += 1
+        self._cache = {}
+
+    def cached(self, key, builder):
+        """
+        Returns cached value for key, builds it if data changed since last call
+        """
+        if key not in self._cache:
+            self._cache[key] = builder()
+        return self._cache[key]
+
+    def n_sets(self):
+        return len(self.set_offsets) - 1
+
+    def n_reps(self, set_pos=None):
+        """
+        Number of replicates in set (in all sets if set_pos is None)
+        """
+        if set_pos is None:
+            return self.set_offsets[-1]
+        return self.set_offsets[set_pos + 1] - self.set_offsets[set_pos]
+
+    def replicate_bounds(self, set_pos=None):
+        """
+        Returns point offsets of replicates in the set (in all data if set_pos is None), first is 0
+        """
+        if set_pos is None:
+            return np.array(self.rep_offsets)
+        offsets = np.array(self.rep_offsets[self.set_offsets[set_pos]:self.set_offsets[set_pos + 1] + 1])
+        return offsets - offsets[0]
+
+    def _view(self, start, end):
+        view = self.buffer[:, start:end]
+        view.flags.writeable = False
+        return view
+
+    def insert(self, set_pos, columns):
+        """
+        Appends replicate (one array per column) to the set, new set is made if set_pos == n_sets()
+        """
+        columns = np.array(columns, dtype=np.float64, ndmin=2)
+        assert columns.shape[0] == self.buffer.shape[0]
+        if set_pos == self.n_sets():
+            self.set_offsets.append(self.set_offsets[-1])
+        elif not 0 <= set_pos < self.n_sets():
+            raise IndexError('Set {} does not exist'.format(set_pos))
+
+        rep_idx = self.set_offsets[set_pos + 1]
+        start = self.rep_offsets[rep_idx]
+        n_points = columns.shape[1]
+        new_size = self.size + n_points
+
+        if start == self.size and new_size <= self.buffer.shape[1]:
+            # append to spare capacity, nothing already returned is touched
+            self.buffer[:, start:new_size] = columns
+        else:
+            capacity = max(2 * self.buffer.shape[1], new_size, 16)
+            buffer = np.empty((self.buffer.shape[0], capacity))
+            buffer[:, :start] = self.buffer[:, :start]
+            buffer[:, start:start + n_points] = columns
+            buffer[:, start + n_points:new_size] = self.buffer[:, start:self.size]
+            self.buffer = buffer
+
+        self.rep_offsets.insert(rep_idx + 1, start + n_points)
+        for i in range(rep_idx + 2, len(self.rep_offsets)):
+            self.rep_offsets[i] += n_points
+        for i in range(set_pos + 1, len(self.set_offsets)):
+            self.set_offsets[i] += 1
+        self.size = new_size
+        self.touch()
+
+    def remove(self, set_pos, rep_pos):
+        """
+        Removes replicate from the set, set is removed with its last replicate
+        """
+        if not 0 <= rep_pos < self.n_reps(set_pos):
+            raise IndexError('Replicate {} does not exist in set {}'.format(rep_pos, set_pos))
+        rep_idx = self.set_offsets[set_pos] + rep_pos
+        start = self.rep_offsets[rep_idx]
+        end = self.rep_offsets[rep_idx + 1]
+
+        self.buffer = np.delete(self.buffer[:, :self.size], np.s_[start:end], axis=1)
+        self.size -= end - start
+
+        self.rep_offsets.pop(rep_idx + 1)
+        for i in range(rep_idx + 1, len(self.rep_offsets)):
+            self.rep_offsets[i] -= end - start
+        for i in range(set_pos + 1, len(self.set_offsets)):
+            self.set_offsets[i] -= 1
+        if self.n_reps(set_pos) == 0:
+            self.set_offsets.pop(set_pos + 1)
+        self.touch()
+
+    def get_all(self):
+        """
+        Returns all values (columns x points) as read-only view
+        """
+        return self.cached('all', lambda: self._view(0, self.size))
+
+    def get_set(self, set_pos):
+        """
+        Returns values of the set (columns x points) as read-only view
+        """
+        def builder():
+            return self._view(self.rep_offsets[self.set_offsets[set_pos]],
+                              self.rep_offsets[self.set_offsets[set_pos + 1]])
+        return self.cached(('set', set_pos), builder)
+
+    def merge_sets(self, n_columns):
+        """
+        Returns store of first n_columns where every set is a single replicate.
+        Shares (read-only) buffer with this store.
+        """
+        store = ColumnStore(n_columns)
+        store.buffer = self.get_all()[:n_columns]
+        store.size = self.size
+        store.rep_offsets = [self.rep_offsets[rep_idx] for rep_idx in self.set_offsets]
+        store.set_offsets = [0, self.n_sets()] if self.n_sets() else [0]
+        return store
+
+    def get_replicates(self, column):
+        """
+        Returns nested lists ([set][replicate]) of read-only views of the column
+        """
+        def builder():
+            reps = [self._view(start, end)[column] for start, end in
+                    zip(self.rep_offsets[:-1], self.rep_offsets[1:])]
+            return [reps[first:last] for first, last in zip(self.set_offsets[:-1], self.set_offsets[1:])]
+        return self.cached(('reps', column), builder)
+
+
 class OneSubstrate(object):
     """
     Holds experimental data for one enzyme
     """
     def __init__(self, name, tunit='s', cunit='mM'):
-        self.replicates = 0
         self.name = name
-        self.concentrations = None
-        self.rates = None
         self.single = True
         self.cunit = cunit
         self.tunit = tunit
         self.runit = '({})/({})'.format(cunit, tunit)
+        # identifies data (across edits) for warm started fits
+        self.uid = uuid.uuid4().hex
+
+        # columns: concentration, rate
+        self.store = ColumnStore(2)
+
+    def __setstate__(self, state):
+        # projects saved before columnar storage hold lists of arrays
+        if 'store' not in state:
+            concentrations = state.pop('concentrations', None) or []
+            rates = state.pop('rates', None) or []
+            state.pop('replicates', None)
+            state['store'] = ColumnStore(2)
+            for con_rep, rat_rep in zip(concentrations, rates):
+                state['store'].insert(0, (con_rep, rat_rep))
+        state.setdefault('uid', uuid.uuid4().hex)
+        self.__dict__.update(state)
 
     def __len__(self):
         """
@@ -45,6 +207,26 @@ class OneSubstrate(object):
         for con_rep, rat_rep in zip(self.concentrations, self.rates):
             yield con_rep, rat_rep
 
+    @property
+    def replicates(self):
+        return self.store.n_reps()
+
+    @property
+    def concentrations(self):
+        """
+        List of concentrations for each replicate (read-only views)
+        """
+        return self.store.cached('concentrations', lambda: list(self.store.get_replicates(0)[0])
+                                 if self.store.n_sets() else [])
+
+    @property
+    def rates(self):
+        """
+        List of rates for each replicate (read-only views)
+        """
+        return self.store.cached('rates', lambda: list(self.store.get_replicates(1)[0])
+                                 if self.store.n_sets() else [])
+
     def add_replicate(self, n_concetration, n_rate, transform=True):
         """
         Adds replicates
@@ -54,19 +236,58 @@ class OneSubstrate(object):
             n_rate = transform_data(n_rate)
         assert len(n_concetration) == len(n_rate)
 
-        if self.replicates == 0:
-            self.concentrations = [n_concetration]
-            self.rates = [n_rate]
+        # every replicate is kept in the first (only) set
+        self.store.insert(0, (n_concetration, n_rate))
+
+    def remove_replicate(self, rep_pos):
+        """
+        Removes replicate at given position
+        """
+        self.store.remove(0, rep_pos)
+
+    def get_allpoints(self):
+        """
+        Returns all concentrations and rates as flat arrays (read-only views)
+        """
+        return tuple(self.store.get_all())
+
+    def get_transform(self, signal=0, flat=False):
+        """
+        Returns (x values, y values) for each replicate (flat arrays if flat) of given plot:
+        0 - direct, 1 - Lineweaver-Burk, 2 - Hanes-Woolf, 3 - Eadie-Hofstee
+        Values are computed once and reused until data changes.
+        """
+        if flat:
+            return self.store.cached(('flat transform', signal), lambda: self._make_transform(signal))
+
+        def builder():
+            bounds = self.store.rep_offsets[1:-1]
+            return tuple(np.split(values, bounds) for values in self.get_transform(signal, flat=True))
+        return self.store.cached(('transform', signal), builder)
+
+    def _make_transform(self, signal):
+        """
+        Calculates flat transformed values
+        """
+        concentrations, rates = self.get_allpoints()
+        if signal == 1:
+            x_vals, y_vals = 1 / concentrations, 1 / rates
+        elif signal == 2:
+            x_vals, y_vals = concentrations, concentrations / rates
+        elif signal == 3:
+            x_vals, y_vals = rates / concentrations, rates
         else:
-            self.concentrations.append(n_concetration)
-            self.rates.append(n_rate)
-        self.replicates += 1
+            return concentrations, rates
+        x_vals.flags.writeable = False
+        y_vals.flags.writeable = False
+        return x_vals, y_vals
 
     def res_sum(self, fitfunc, *_):
         """
         Return sum of residuals squared based on give function
         """
-        return sum((fitfunc(np.hstack(tuple(self.concentrations))) - np.hstack(tuple(self.rates))) ** 2)
+        concentrations, rates = self.get_allpoints()
+        return sum((fitfunc(concentrations) - rates) ** 2)
 
     def get_replicates(self):
         return self.replicates
@@ -77,6 +298,12 @@ class OneSubstrate(object):
         """
         return self.single
 
+    def has_modifier(self):
+        """
+        States if sets are measured at different inhibitor or activator concentrations
+        """
+        return False
+
 
 class TwoSubstrates():
     """
@@ -90,18 +317,11 @@ class TwoSubstrates():
         self.setindex = 0
         self.is_itc = bool(is_itc)
         self.single = False
+        # identifies data (across edits) for warm started fits
+        self.uid = uuid.uuid4().hex
 
-        # storage objects
-        self.Asets = []
-        self.Bsets = []
-        self.Aconst = []
-        self.Bconst = []
-        self.Arates = []
-        self.Brates = []
-
-        self.AllVar = {True: self.Asets, False: self.Bsets}
-        self.AllConst = {True: self.Aconst, False: self.Bconst}
-        self.AllRates = {True: self.Arates, False: self.Brates}
+        # storage objects (by A is variable), columns: variable, rate, constant
+        self.stores = {True: ColumnStore(3), False: ColumnStore(3)}
         self.stoich = {True: float(brate), False: float(arate)}
 
         # units
@@ -109,6 +329,45 @@ class TwoSubstrates():
         self.tunit = tunit
         self.runit = '({})/({})'.format(cunit, tunit)
 
+    def __setstate__(self, state):
+        # projects saved before columnar storage hold nested lists of arrays
+        if 'stores' not in state:
+            state['stores'] = {}
+            for a_var in (True, False):
+                store = ColumnStore(3)
+                for varset, rateset, constset in zip(state['AllVar'][a_var], state['AllRates'][a_var],
+                                                     state['AllConst'][a_var]):
+                    set_pos = store.n_sets()
+                    for columns in zip(varset, rateset, constset):
+                        store.insert(set_pos, columns)
+                state['stores'][a_var] = store
+            for old_name in ('Asets', 'Bsets', 'Aconst', 'Bconst', 'Arates', 'Brates',
+                             'AllVar', 'AllConst', 'AllRates'):
+                state.pop(old_name, None)
+        state.setdefault('uid', uuid.uuid4().hex)
+        self.__dict__.update(state)
+
+    @property
+    def AllVar(self):
+        """
+        Variable substrate values {A is variable: [set][replicate]} (read-only views)
+        """
+        return {a_var: store.get_replicates(0) for a_var, store in self.stores.items()}
+
+    @property
+    def AllRates(self):
+        """
+        Rates {A is variable: [set][replicate]} (read-only views)
+        """
+        return {a_var: store.get_replicates(1) for a_var, store in self.stores.items()}
+
+    @property
+    def AllConst(self):
+        """
+        Constant substrate values {A is variable: [set][replicate]} (read-only views)
+        """
+        return {a_var: store.get_replicates(2) for a_var, store in self.stores.items()}
+
     def change_varible(self):
         """
         Change if substrate A is variable
@@ -130,9 +389,9 @@ class TwoSubstrates():
         assert len(varvals) == len(constvar)
         assert len(constvar) == len(rates)
 
-        self.AllVar[self.a_is_var][setpos].append(varvals)
-        self.AllRates[self.a_is_var][setpos].append(rates)
-        self.AllConst[self.a_is_var][setpos].append(constvar)
+        if not 0 <= setpos < self.stores[self.a_is_var].n_sets():
+            raise IndexError('Set {} does not exist'.format(setpos))
+        self.stores[self.a_is_var].insert(setpos, (varvals, rates, constvar))
 
     def add_set(self, varvals, constvals, rates):
         """
@@ -145,15 +404,20 @@ class TwoSubstrates():
         assert len(varvals) == len(constvals)
         assert len(varvals) == len(rates)
 
-        self.AllVar[self.a_is_var].append([varvals])
-        self.AllConst[self.a_is_var].append([constvals])
-        self.AllRates[self.a_is_var].append([rates])
+        store = self.stores[self.a_is_var]
+        store.insert(store.n_sets(), (varvals, rates, constvals))
+
+    def remove_rep(self, a_var, set_pos, rep_pos):
+        """
+        Removes replicate from the set (set is removed together with its last replicate)
+        """
+        self.stores[a_var].remove(set_pos, rep_pos)
 
     def next_set(self):
         """
         Switch appending set to next avaliable
         """
-        if self.setindex == len(self.AllConst[self.a_is_var]):
+        if self.setindex == self.stores[self.a_is_var].n_sets():
             self.setindex = 0
         else:
             self.setindex += 1
@@ -162,9 +426,9 @@ class TwoSubstrates():
         """
         Return True if constant substrate needs to be defined
         """
-        if self.setindex == len(self.AllConst[self.a_is_var]):
+        if self.setindex == self.stores[self.a_is_var].n_sets():
             return True
-        elif self.setindex < len(self.AllConst[self.a_is_var]):
+        elif self.setindex < self.stores[self.a_is_var].n_sets():
             return False
         else:
             raise ValueError('Apeenidng index is to high')
@@ -175,6 +439,12 @@ class TwoSubstrates():
         """
         return self.single
 
+    def has_modifier(self):
+        """
+        States if sets are measured at different inhibitor or activator concentrations
+        """
+        return False
+
     def get_last_const(self):
         """
         Returns current constant values
@@ -198,7 +468,7 @@ class TwoSubstrates():
         Returns the number of reps in working set
         """
         if not self.isnewset():
-            return len(self.AllRates[self.a_is_var][self.setindex])
+            return self.stores[self.a_is_var].n_reps(self.setindex)
         return 0
 
     def get_stoch_val(self):
@@ -212,47 +482,56 @@ class TwoSubstrates():
         Returns all points (subA, rate & sub2)
         if not a_var returns data for when a is not variable else when it is variable
         """
-        varss = self.AllVar[a_var]
-        consts = self.AllConst[a_var]
-        rates = self.AllRates[a_var]
-
-        for i in range(len(varss)):
-            var = np.concatenate(varss[i])
-            const = np.concatenate(consts[i])
-            rate = np.concatenate(rates[i])
+        store = self.stores[a_var]
+        for i in range(store.n_sets()):
+            var, rate, const = store.get_set(i)
             yield var, rate, const
 
     def get_repres(self, a_var=True):
         """
-        Returns OneSubstrate objects that reprisents data.
+        Returns OneSubstrate objects that reprisents data (each set is one replicate).
+        Object is shared until data changes, it should not be modified.
         """
-        new_class = OneSubstrate('temp', cunit=self.cunit, tunit=self.tunit)
-        for concx, ratex, _ in self.get_points(a_var):
-            new_class.add_replicate(concx, ratex, transform=False)
-        return new_class
+        def builder():
+            new_class = OneSubstrate('temp', cunit=self.cunit, tunit=self.tunit)
+            new_class.store = self.stores[a_var].merge_sets(2)
+            return new_class
+        return self.stores[a_var].cached('repres', builder)
 
     def get_allpoints(self, a_var=True):
         """
         Returs all data poits in a array
         """
-        fvar = np.array([])
-        fcost = np.array([])
-        frate = np.array([])
-        for concx, ratex, conccx in self.get_points(a_var):
-            fvar = np.append(fvar, concx)
-            fcost = np.append(fcost, conccx)
-            frate = np.append(frate, ratex)
-
+        fvar, frate, fcost = self.stores[a_var].get_all()
         return fvar, frate, fcost
 
+    def get_global_points(self):
+        """
+        Returns points of both orientations as flat arrays (A concentrations, rates, B concentrations,
+        set index), sets with B variable are numbered after sets with A variable
+        """
+        var_a, rate_a, const_b = self.get_allpoints(True)
+        var_b, rate_b, const_a = self.get_allpoints(False)
+        set_ids = []
+        first = 0
+        for a_var in (True, False):
+            store = self.stores[a_var]
+            set_sizes = np.diff([store.rep_offsets[rep_idx] for rep_idx in store.set_offsets])
+            set_ids.append(np.repeat(np.arange(first, first + store.n_sets()), set_sizes))
+            first += store.n_sets()
+        return (np.concatenate((var_a, const_a)), np.concatenate((rate_a, rate_b)),
+                np.concatenate((const_b, var_b)), np.concatenate(set_ids).astype(int))
+
     def get_const_mean(self, a_isvar=True):
         """
         Returns list of means for second values
         """
-        all_set_means = []
-        for my_set in self.AllConst[a_isvar]:
-            all_set_means.append(np.array(my_set).mean(axis=0))
-        return all_set_means
+        def builder():
+            all_set_means = []
+            for my_set in self.AllConst[a_isvar]:
+                all_set_means.append(np.array(my_set).mean(axis=0))
+            return all_set_means
+        return self.stores[a_isvar].cached('const means', builder)
 
     def res_sum(self, fitfunc, a_var):
         """
@@ -260,3 +539,147 @@ class TwoSubstrates():
         """
         a_var, a_rate, a_const = self.get_allpoints(a_var)
         return sum((fitfunc(a_var, a_const) - a_rate) ** 2)
+
+
+class ModifierSeries(object):
+    """
+    Stores rates of one substrate measured at several inhibitor or activator concentrations,
+    every modifier concentration is one set. Sets are read like sets of TwoSubstrates with
+    substrate A variable (modifier takes place of constant substrate).
+    """
+    def __init__(self, name, sname='Substrate', mname='Inhibitor', activator=False, tunit='s', cunit='mM'):
+        self.name = str(name)
+        self.nameA = str(sname)
+        self.nameB = str(mname)
+        self.activator = bool(activator)
+        self.single = False
+        # identifies data (across edits) for warm started fits
+        self.uid = uuid.uuid4().hex
+
+        # columns: substrate, rate, modifier
+        self.store = ColumnStore(3)
+
+        # units
+        self.cunit = cunit
+        self.tunit = tunit
+        self.runit = '({})/({})'.format(cunit, tunit)
+
+    def __setstate__(self, state):
+        state.setdefault('uid', uuid.uuid4().hex)
+        self.__dict__.update(state)
+
+    @property
+    def AllVar(self):
+        """
+        Substrate values {True: [set][replicate]} (read-only views)
+        """
+        return {True: self.store.get_replicates(0)}
+
+    @property
+    def AllRates(self):
+        """
+        Rates {True: [set][replicate]} (read-only views)
+        """
+        return {True: self.store.get_replicates(1)}
+
+    @property
+    def AllConst(self):
+        """
+        Modifier values {True: [set][replicate]} (read-only views)
+        """
+        return {True: self.store.get_replicates(2)}
+
+    def is_single(self):
+        """
+        States if given objects hold information for only one substrate (sets are fitted together)
+        """
+        return self.single
+
+    def has_modifier(self):
+        """
+        States if sets are measured at different inhibitor or activator concentrations
+        """
+        return True
+
+    def get_levels(self):
+        """
+        Returns modifier concentration of every set
+        """
+        return list(self.get_const_mean())
+
+    def add_replicate(self, n_concetration, n_rate, modifier, transform=True):
+        """
+        Adds replicate measured at modifier concentration to its set (new set for new concentration)
+        """
+        if transform:
+            n_concetration = transform_data(n_concetration)
+            n_rate = transform_data(n_rate)
+        assert len(n_concetration) == len(n_rate)
+        modifier = float(modifier)
+
+        levels = self.get_levels()
+        set_pos = levels.index(modifier) if modifier in levels else self.store.n_sets()
+        self.store.insert(set_pos, (n_concetration, n_rate, np.full(len(n_rate), modifier)))
+
+    def add_data(self, exp_data, modifier):
+        """
+        Adds all replicates of single substrate data measured at modifier concentration
+        """
+        for con_rep, rat_rep in exp_data:
+            self.add_replicate(con_rep, rat_rep, modifier, transform=False)
+
+    def remove_rep(self, set_pos, rep_pos):
+        """
+        Removes replicate from the set (set is removed together with its last replicate)
+        """
+        self.store.remove(set_pos, rep_pos)
+
+    def get_points(self, a_var=True):
+        """
+        Returns points (substrate, rate & modifier) of every set
+        """
+        for i in range(self.store.n_sets()):
+            subs, rate, modifier = self.store.get_set(i)
+            yield subs, rate, modifier
+
+    def get_allpoints(self, a_var=True):
+        """
+        Returns all data points (substrate, rate & modifier) as flat arrays (read-only views)
+        """
+        subs, rate, modifier = self.store.get_all()
+        return subs, rate, modifier
+
+    def get_set_ids(self):
+        """
+        Returns set index of every point
+        """
+        def builder():
+            set_sizes = np.diff([self.store.rep_offsets[rep_idx] for rep_idx in self.store.set_offsets])
+            return np.repeat(np.arange(self.store.n_sets()), set_sizes)
+        return self.store.cached('set ids', builder)
+
+    def get_repres(self, a_var=True):
+        """
+        Returns OneSubstrate object that reprisents data (each set is one replicate).
+        Object is shared until data changes, it should not be modified.
+        """
+        def builder():
+            new_class = OneSubstrate('temp', cunit=self.cunit, tunit=self.tunit)
+            new_class.store = self.store.merge_sets(2)
+            return new_class
+        return self.store.cached('repres', builder)
+
+    def get_const_mean(self, a_isvar=True):
+        """
+        Returns list of modifier concentrations (mean) of every set
+        """
+        def builder():
+            return [float(np.mean(np.concatenate(my_set))) for my_set in self.AllConst[True]]
+        return self.store.cached('const means', builder)
+
+    def res_sum(self, fitfunc, *_):
+        """
+        Return sum of residuals squared based on give function (of substrate and modifier)
+        """
+        subs, rate, modifier = self.get_allpoints()
+        return sum((fitfunc(subs, modifier) - rate) ** 2)
@@ -0,0 +1,156 @@
+"""
+Starting values and bounds of equation parameters estimated from data
+"""
+from copy import deepcopy
+import numpy as np
+
+from calculations.LinearEstimates import mm_estimates
+
+
+# constants at half saturation of (variable) substrate
+HALF_SATURATION = ('km', 'kms', 'ks', 'ksa', 'kma')
+# dissociation constants of substrate A and B
+A_CONSTANTS = ('kda',)
+B_CONSTANTS = ('kmb', 'kdb', 'ksib')
+# inhibition and activation constants (scaled by inhibitor / activator concentration)
+INHIBITION = ('ki', 'kis', 'kic')
+ACTIVATION = ('ka', 'kac', 'kas')
+# modifier concentrations
+MODIFIERS = ('Inh', 'inh', 'act')
+
+# upper bound relative to the estimate
+BOUND_SPAN = 100
+
+
+def mean_curve(subs_c, rate):
+    """
+    Returns sorted unique concentrations and mean rate at each
+    """
+    concs, inverse = np.unique(np.asarray(subs_c, dtype=float), return_inverse=True)
+    mean_rates = np.bincount(inverse, weights=np.asarray(rate, dtype=float)) / np.bincount(inverse)
+    return concs, mean_rates
+
+
+def top_rate(rate):
+    """
+    Returns mean of top 10 % of rates (at least one point)
+    """
+    rate = np.sort(np.asarray(rate, dtype=float))
+    return rate[-max(1, len(rate) // 10):].mean()
+
+
+def half_saturation(subs_c, rate, v_top):
+    """
+    Returns concentration at which mean rate first reaches half of v_top
+    """
+    concs, mean_rates = mean_curve(subs_c, rate)
+    above = np.nonzero(mean_rates >= v_top / 2)[0]
+    if len(above) == 0:
+        return concs[-1]
+    pos = above[0]
+    if pos == 0:
+        return concs[0]
+    # linear interpolation between neighbouring points
+    c_low, c_high = concs[pos - 1], concs[pos]
+    r_low, r_high = mean_rates[pos - 1], mean_rates[pos]
+    return c_low + (v_top / 2 - r_low) * (c_high - c_low) / (r_high - r_low)
+
+
+def hill_slope(subs_c, rate, v_max):
+    """
+    Returns Hill coefficient from slope of log(v / (v_max - v)) against log(S), 1 if undefined
+    """
+    concs, mean_rates = mean_curve(subs_c, rate)
+    used = (concs > 0) & (mean_rates > 0.1 * v_max) & (mean_rates < 0.9 * v_max)
+    if used.sum() < 2:
+        return 1.0
+    slope = np.polyfit(np.log(concs[used]), np.log(mean_rates[used] / (v_max - mean_rates[used])), 1)[0]
+    return float(np.clip(slope, 0.1, 10)) if np.isfinite(slope) else 1.0
+
+
+def estimate_params(param_object, subs_c, rate, subs_b=None, *_):
+    """
+    Returns {parameter: (value, lower bound, upper bound)} estimated from data points
+    for varying parameters of the equation (fixed ones and modifier concentrations are kept).
+    Third column of points is modifier concentration if equation takes it from data.
+    """
+    subs_c = np.asarray(subs_c, dtype=float)
+    rate = np.asarray(rate, dtype=float)
+    if len(rate) == 0:
+        return {}
+    c_max = max(subs_c.max(), np.finfo(float).tiny)
+    v_top = max(top_rate(rate), np.finfo(float).tiny)
+    # direct linear plot Km if it is meaningful, else half saturation concentration
+    k_half = mm_estimates(subs_c, rate, method='direct')[0][0]
+    if not (np.isfinite(k_half) and 0 < k_half <= BOUND_SPAN * c_max):
+        k_half = half_saturation(subs_c, rate, v_top)
+    k_half = max(k_half, c_max * 1e-3)
+
+    modifier_scale = None
+    if subs_b is not None:
+        subs_b = np.asarray(subs_b, dtype=float)
+        b_scale = max(subs_b.mean(), np.finfo(float).tiny)
+        if param_object.modifier_data:
+            b_scale = None
+            present = subs_b[subs_b > 0]
+            modifier_scale = present.mean() if len(present) else None
+    else:
+        b_scale = None
+    hill = hill_slope(subs_c, rate, 1.05 * v_top)
+
+    def scale_of(names):
+        if modifier_scale is not None:
+            return modifier_scale
+        values = [param_object[name].value for name in names if name in param_object]
+        return values[0] if values and values[0] > 0 else c_max
+
+    estimates = {}
+    for name in param_object.param_order:
+        param = param_object[name]
+        if not param.vary or name in MODIFIERS:
+            continue
+        if name == 'v_max':
+            value = v_top
+        elif name == 'n':
+            value = hill
+        elif name == 'kh':
+            value = k_half ** hill
+        elif name in HALF_SATURATION or name in A_CONSTANTS:
+            value = k_half
+        elif name in B_CONSTANTS and b_scale is not None:
+            value = b_scale
+        elif name == 'ksc':
+            # substrate inhibition at concentrations above measured
+            value = 10 * c_max
+        elif name in INHIBITION:
+            value = scale_of(('Inh', 'inh'))
+        elif name in ACTIVATION:
+            value = scale_of(('act',))
+        else:
+            continue
+        upper = 10 if name == 'n' else BOUND_SPAN * value
+        estimates[name] = (value, 0, upper)
+
+    # rate is proportional to v_max, best v_max for other values has closed form
+    if 'v_max' in estimates:
+        values = [estimates[name][0] if name in estimates else param_object[name].value
+                  for name in param_object.param_order]
+        values[param_object.param_order.index('v_max')] = 1.0
+        with np.errstate(all='ignore'):
+            shape = param_object.eq(*values)(subs_c, *([] if subs_b is None else [subs_b]))
+        shape_norm = np.dot(shape, shape)
+        if np.isfinite(shape_norm) and shape_norm > 0:
+            v_max = max(np.dot(shape, rate) / shape_norm, v_top)
+            estimates['v_max'] = (v_max, 0, BOUND_SPAN * v_max)
+    return estimates
+
+
+def with_estimates(param_object, *fitpoints):
+    """
+    Returns copy of parameter object with values and bounds estimated from data
+    """
+    param_object = deepcopy(param_object)
+    for name, (value, min_val, max_val) in estimate_params(param_object, *fitpoints).items():
+        param_object[name].set(min=min_val, max=max_val)
+        param_object[name].set(value=value)
+    return param_object
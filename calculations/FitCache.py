@@ -0,0 +1,174 @@
+"""
+Content addressed cache of fit results (in memory LRU with optional on-disk store)
+and last converged parameters used as warm starts for refits
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+import numpy as np
+
+
+# suffix of cached results on disk (cache folder may hold other files, e.g. projects)
+CACHE_SUFFIX = '.fitcache'
+
+
+def fit_key(param_object, inicializations, seed, fitpoints, options=None):
+    """
+    Returns hash of equation settings (values, bounds, vary), restarts, seed, other search
+    options (string) and data points
+    """
+    digest = hashlib.sha1()
+    header = (param_object.__class__.__name__, param_object.get_settings(), inicializations, seed, options)
+    digest.update(repr(header).encode())
+    for points in fitpoints:
+        points = np.ascontiguousarray(points, dtype=np.float64)
+        digest.update(repr(points.shape).encode())
+        digest.update(points.tobytes())
+    return digest.hexdigest()
+
+
+class FitCache(object):
+    """
+    Holds pickled fit results by key. Least recently used results are dropped from memory
+    once maxsize is reached; with path every result is also saved to that folder, so it is
+    shared between processes and sessions.
+    """
+    def __init__(self, maxsize=256, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        if path is not None and not os.path.exists(path):
+            os.makedirs(path)
+
+    def __getstate__(self):
+        # only settings are sent to worker processes
+        state = self.__dict__.copy()
+        state['_memory'] = OrderedDict()
+        return state
+
+    def __len__(self):
+        return len(self._memory)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        """
+        Returns new copy of cached result or None
+        """
+        blob = self._memory.get(key)
+        if blob is not None:
+            self._memory.move_to_end(key)
+        elif self.path is not None and os.path.exists(self._file(key)):
+            with open(self._file(key), 'rb') as cfile:
+                blob = cfile.read()
+            self._remember(key, blob)
+
+        if blob is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(blob)
+
+    def put(self, key, result):
+        """
+        Stores result under the key
+        """
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, blob)
+        if self.path is not None:
+            # write to temporary file first, other processes may read the same key
+            handle, temp_name = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(handle, 'wb') as cfile:
+                cfile.write(blob)
+            os.replace(temp_name, self._file(key))
+
+    def _remember(self, key, blob):
+        self._memory[key] = blob
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all results from memory (and disk, other files in the folder are kept)
+        """
+        self._memory.clear()
+        if self.path is not None:
+            for fname in os.listdir(self.path):
+                if fname.endswith(CACHE_SUFFIX):
+                    os.remove(os.path.join(self.path, fname))
+
+
+# cache used by fitting functions unless other is given
+_fit_cache = FitCache()
+
+
+def get_fit_cache():
+    """
+    Returns cache used by default
+    """
+    return _fit_cache
+
+
+def set_fit_cache(cache):
+    """
+    Sets cache used by default (None disables caching)
+    """
+    global _fit_cache
+    _fit_cache = cache
+
+
+class WarmStarts(object):
+    """
+    Holds last converged values (in param_order) and mean squared residual by
+    (data uid, equation, orientation, set, bounds, restarts), see warm_key. Least recently
+    used are dropped after maxsize.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._starts = OrderedDict()
+
+    def __len__(self):
+        return len(self._starts)
+
+    def get(self, key):
+        """
+        Returns (values, mean squared residual) or None
+        """
+        start = self._starts.get(key)
+        if start is not None:
+            self._starts.move_to_end(key)
+        return start
+
+    def put(self, key, solution, param_order):
+        """
+        Remembers converged solution
+        """
+        values = np.array([solution.params[par].value for par in param_order], dtype=float)
+        mean_square = float(np.mean(solution.residual ** 2))
+        self._starts[key] = (values, mean_square)
+        self._starts.move_to_end(key)
+        while len(self._starts) > self.maxsize:
+            self._starts.popitem(last=False)
+
+    def forget(self, uid, model=None):
+        """
+        Removes all starts of given data (only of equation identifier model if given)
+        """
+        for key in [key for key in self._starts if key[0] == uid and model in (None, key[1])]:
+            del self._starts[key]
+
+
+_warm_starts = WarmStarts()
+
+
+def get_warm_starts():
+    """
+    Returns warm starts used by fitting functions
+    """
+    return _warm_starts
@@ -0,0 +1,104 @@
+"""
+Closed-form Km and Vmax estimates from linearised Michaelis-Menten plots
+(Lineweaver-Burk, Hanes-Woolf, Eadie-Hofstee and direct linear plot), batched over groups of points
+"""
+import numpy as np
+
+
+METHODS = ('lb', 'hw', 'eh', 'direct')
+
+
+def group_bounds(n_points, bounds=None):
+    """
+    Returns array of group boundaries (first is 0, last n_points), one group if bounds is None
+    """
+    if bounds is None:
+        return np.array([0, n_points])
+    return np.asarray(bounds, dtype=int)
+
+
+def line_fits(x_vals, y_vals, bounds):
+    """
+    Returns slopes and intercepts of least squares lines for every group of points
+    (all groups are solved together from sums of each group)
+    """
+    starts = bounds[:-1]
+    counts = np.diff(bounds)
+    sum_x = np.add.reduceat(x_vals, starts)
+    sum_y = np.add.reduceat(y_vals, starts)
+    sum_xx = np.add.reduceat(x_vals * x_vals, starts)
+    sum_xy = np.add.reduceat(x_vals * y_vals, starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = (counts * sum_xy - sum_x * sum_y) / (counts * sum_xx - sum_x ** 2)
+        intercepts = (sum_y - slopes * sum_x) / counts
+    return slopes, intercepts
+
+
+def transformed_estimates(subs_c, rate, bounds, method):
+    """
+    Returns Km and Vmax of every group from line fitted to transformed data
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if method == 'lb':
+            # 1/v = Km/V * 1/S + 1/V
+            slopes, intercepts = line_fits(1 / subs_c, 1 / rate, bounds)
+            v_max = 1 / intercepts
+            return slopes * v_max, v_max
+        if method == 'hw':
+            # S/v = 1/V * S + Km/V
+            slopes, intercepts = line_fits(subs_c, subs_c / rate, bounds)
+            v_max = 1 / slopes
+            return intercepts * v_max, v_max
+        # v = -Km * v/S + V
+        slopes, intercepts = line_fits(rate / subs_c, rate, bounds)
+        return -slopes, intercepts
+
+
+def direct_linear(subs_c, rate, bounds):
+    """
+    Returns Km and Vmax of every group as medians of intersections of all pairs of lines
+    V = v + v / S * Km (Eisenthal & Cornish-Bowden). Intersections with both values negative
+    count as infinite.
+    """
+    pairs_i, pairs_j, pair_bounds = [], [], [0]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        first, second = np.triu_indices(end - start, 1)
+        pairs_i.append(first + start)
+        pairs_j.append(second + start)
+        pair_bounds.append(pair_bounds[-1] + len(first))
+    pairs_i = np.concatenate(pairs_i)
+    pairs_j = np.concatenate(pairs_j)
+
+    s_i, s_j = subs_c[pairs_i], subs_c[pairs_j]
+    v_i, v_j = rate[pairs_i], rate[pairs_j]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        km_pairs = (v_j - v_i) / (v_i / s_i - v_j / s_j)
+        v_pairs = v_i + v_i * km_pairs / s_i
+    negative = (km_pairs < 0) & (v_pairs < 0)
+    km_pairs[negative] = np.inf
+    v_pairs[negative] = np.inf
+    # same concentration gives parallel lines
+    valid = (s_i != s_j) & ~np.isnan(km_pairs) & ~np.isnan(v_pairs)
+
+    km_vals, v_vals = [], []
+    for first, last in zip(pair_bounds[:-1], pair_bounds[1:]):
+        used = valid[first:last]
+        km_vals.append(np.median(km_pairs[first:last][used]) if used.any() else np.nan)
+        v_vals.append(np.median(v_pairs[first:last][used]) if used.any() else np.nan)
+    return np.array(km_vals), np.array(v_vals)
+
+
+def mm_estimates(subs_c, rate, bounds=None, method='direct'):
+    """
+    Returns arrays of Km and Vmax estimates for every group of points (whole data if bounds is None).
+    method: 'lb' (Lineweaver-Burk), 'hw' (Hanes-Woolf), 'eh' (Eadie-Hofstee) or 'direct' (direct linear plot)
+    """
+    if method not in METHODS:
+        raise ValueError('Unknown method {} (choose from: {})'.format(method, ', '.join(METHODS)))
+    subs_c = np.asarray(subs_c, dtype=float)
+    rate = np.asarray(rate, dtype=float)
+    bounds = group_bounds(len(subs_c), bounds)
+    if method == 'direct':
+        return direct_linear(subs_c, rate, bounds)
+    return transformed_estimates(subs_c, rate, bounds, method)
+
@@ -0,0 +1,98 @@
+"""
+Nesting of equations (simpler equation is a special or limiting case of richer one), used to fit
+simple equations first and seed richer ones from their converged parameters
+"""
+import numpy as np
+
+from calculations.DataFitting import equation_key
+
+
+# richer equation: simpler equation nested in it
+NESTED_IN = {'HE': 'MM', 'CI': 'MM', 'NCI': 'MM', 'UCI': 'MM', 'MI': 'MM',
+             'PPMSI': 'PPM', 'TCSI': 'TC'}
+
+# substrate inhibition constants, simpler equation is their limit to infinity
+LIMIT_PARAMS = {'PPMSI': 'kdb', 'TCSI': 'ksib'}
+
+# inhibition constants (limit to infinity) when inhibitor concentration is taken from data
+MODIFIER_LIMITS = {'CI': ('ki',), 'NCI': ('ki',), 'UCI': ('ki',), 'MI': ('kis', 'kic')}
+
+
+def fit_levels(equations):
+    """
+    Returns list of equation lists, equations of each level are seeded from the previous level
+    (equations without simpler one among equations are in the first level)
+    """
+    keys = [equation_key(equa) for equa in equations]
+    first = [equa for equa, key in zip(equations, keys) if NESTED_IN.get(key) not in keys]
+    second = [equa for equa, key in zip(equations, keys) if NESTED_IN.get(key) in keys]
+    return [level for level in (first, second) if level]
+
+
+def fit_record(solution):
+    """
+    Returns picklable summary of fit: {'values', 'mean_square', 'evaluations', 'restarts'}
+    """
+    return {'values': {name: par.value for name, par in solution.params.items()},
+            'mean_square': float(np.mean(solution.residual ** 2)),
+            'evaluations': getattr(solution, 'evaluations', solution.nfev),
+            'restarts': getattr(solution, 'restarts', 0)}
+
+
+def nested_values(param_object, simple_values):
+    """
+    Returns values (in param_order) of richer equation giving the same rates as nested equation
+    with simple_values. Inhibition constants keep their values, Km and v_max are rescaled
+    (inhibition constants are set to upper bound if inhibitor concentration is taken from data).
+    """
+    key = equation_key(param_object)
+    values = {name: param_object[name].value for name in param_object.param_order}
+    values.update((name, value) for name, value in simple_values.items() if name in values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if param_object.modifier_data and key in MODIFIER_LIMITS:
+            # inhibitor concentration differs between points, simpler equation is the limit of
+            # inhibition constants to infinity
+            for name in MODIFIER_LIMITS[key]:
+                if np.isfinite(param_object[name].max):
+                    values[name] = param_object[name].max
+        elif key == 'HE':
+            values['kh'] = simple_values['km']
+            values['n'] = 1.0
+        elif key == 'CI':
+            values['km'] = simple_values['km'] / (1 + values['Inh'] / values['ki'])
+        elif key == 'NCI':
+            values['v_max'] = simple_values['v_max'] * (1 + values['inh'] / values['ki'])
+        elif key == 'UCI':
+            factor = 1 + values['inh'] / values['ki']
+            values['km'] = simple_values['km'] * factor
+            values['v_max'] = simple_values['v_max'] * factor
+        elif key == 'MI':
+            competitive = 1 + values['inh'] / values['kis']
+            uncompetitive = 1 + values['inh'] / values['kic']
+            values['km'] = simple_values['km'] * uncompetitive / competitive
+            values['v_max'] = simple_values['v_max'] * uncompetitive
+        elif key in LIMIT_PARAMS:
+            name = LIMIT_PARAMS[key]
+            if np.isfinite(param_object[name].max):
+                values[name] = param_object[name].max
+    return np.array([values[name] for name in param_object.param_order], dtype=float)
+
+
+def nested_start(param_object, simple_record):
+    """
+    Returns (values, mean squared residual) used by nested_search from record of simpler equation fit
+    """
+    return nested_values(param_object, simple_record['values']), simple_record['mean_square']
+
+
+def saved_evaluations(record, inicializations, planner=None):
+    """
+    Returns lower estimate of evaluations saved by seeded fit: restarts which search from default start
+    needs at least (before planner can stop it), at evaluations per fit of the seeded search
+    """
+    if inicializations == 0:
+        return 0
+    agree = 3 if planner is None else planner.agree
+    needed = min(inicializations, agree - 1) if agree else inicializations
+    skipped = max(needed - record['restarts'], 0)
+    return int(round(skipped * record['evaluations'] / (record['restarts'] + 1)))
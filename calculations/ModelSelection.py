@@ -0,0 +1,171 @@
+"""
+Screening of all applicable equations in one pass: fits on shared data arrays, information
+criteria (AIC, AICc, BIC), F-tests of nested equation pairs and ranking
+"""
+import numpy as np
+from scipy import stats
+
+from calculations.DataFitting import data_equations, equation_key, get_executor, search_fit, nested_search, \
+    search_key, select_cache, sum_squares
+from calculations.Estimators import with_estimates
+from calculations.ModelHierarchy import NESTED_IN, fit_levels, fit_record, nested_start
+
+
+CRITERIA = ('aicc', 'aic', 'bic')
+
+
+def data_sets(exp_data):
+    """
+    Returns fit points of whole data (one substrate, modifier series) or of every set of both orientations
+    (two substrates)
+    """
+    if exp_data.is_single() or exp_data.has_modifier():
+        return [exp_data.get_allpoints()]
+    return [fitpoints for a_var in (True, False) for fitpoints in exp_data.get_points(a_var)]
+
+
+def information_criteria(ssr, n_points, n_params):
+    """
+    Returns {'aic', 'aicc', 'bic'} of least squares fit with n_params varying parameters
+    """
+    log_term = n_points * np.log(max(ssr, np.finfo(float).tiny) / n_points)
+    aic = log_term + 2 * n_params
+    if n_points - n_params - 1 > 0:
+        aicc = aic + 2 * n_params * (n_params + 1) / (n_points - n_params - 1)
+    else:
+        aicc = np.inf
+    return {'aic': aic, 'aicc': aicc, 'bic': log_term + n_params * np.log(n_points)}
+
+
+def f_test(simple, rich):
+    """
+    Returns (F, p) of extra sum of squares test of rich equation against simple one nested in it
+    (summaries from model_summary), nan if the test is undefined
+    """
+    extra = rich['n_params'] - simple['n_params']
+    dof = rich['n_points'] - rich['n_params']
+    if extra <= 0 or dof <= 0 or rich['ssr'] <= 0:
+        return np.nan, np.nan
+    f_val = ((simple['ssr'] - rich['ssr']) / extra) / (rich['ssr'] / dof)
+    return f_val, stats.f.sf(f_val, extra, dof)
+
+
+def fit_job(param_object, inicializations, fitpoints, workers=1, seed=None, nested=None, planner=None):
+    """
+    Returns fit of one data set (seeded from nested start if given) or None if equation can not be fitted
+    """
+    try:
+        if nested is None:
+            return search_fit(param_object, inicializations, fitpoints, workers=workers, seed=seed, planner=planner)
+        return nested_search(param_object, inicializations, fitpoints, workers=workers, seed=seed, nested=nested,
+                             planner=planner)
+    except (OverflowError, ZeroDivisionError, ValueError):
+        return None
+
+
+def screen_fits(exp_data, equations, workers=1, seed=None, cache=None, planner=None, estimate=False, nested=False):
+    """
+    Fits every equation to all data sets (arrays are prepared once and shared by all equations).
+    If nested, simpler equations are fitted first and seed richer ones (see ModelHierarchy).
+    Fits of a level are independent jobs on process pool if workers > 1.
+    Returns {equation key: [fit or None for each data set]}
+    """
+    datasets = data_sets(exp_data)
+    cache = select_cache(cache)
+    fits = {}
+    for level in (fit_levels(equations) if nested else [equations]):
+        pending = []
+        for equa in level:
+            key = equation_key(equa)
+            simple_fits = fits.get(NESTED_IN.get(key)) if nested else None
+            fits[key] = []
+            for pos, fitpoints in enumerate(datasets):
+                params = with_estimates(equa, *fitpoints) if estimate else equa
+                start = None
+                if simple_fits is not None and simple_fits[pos] is not None:
+                    start = nested_start(params, fit_record(simple_fits[pos]))
+                cache_key = search_key(params, equa.initializations, seed, fitpoints, planner, start) \
+                    if cache is not None else None
+                fits[key].append(cache.get(cache_key) if cache_key is not None else None)
+                if fits[key][-1] is None:
+                    pending.append((key, pos, cache_key, params, equa.initializations, fitpoints, start))
+
+        if workers > 1 and len(pending) > 1:
+            pool = get_executor(workers)
+            jobs = [pool.submit(fit_job, params, inic, fitpoints, 1, seed, start, planner)
+                    for _, _, _, params, inic, fitpoints, start in pending]
+            results = [job.result() for job in jobs]
+        else:
+            results = [fit_job(params, inic, fitpoints, workers, seed, start, planner)
+                       for _, _, _, params, inic, fitpoints, start in pending]
+        for (key, pos, cache_key, *_), fit in zip(pending, results):
+            fits[key][pos] = fit
+            if cache_key is not None and fit is not None:
+                cache.put(cache_key, fit)
+    return fits
+
+
+def model_summary(param_object, set_fits):
+    """
+    Returns summary of equation fitted to all data sets (None values if any set could not be fitted)
+    """
+    summary = {'key': equation_key(param_object), 'name': param_object.name, 'sets': len(set_fits)}
+    if any(fit is None for fit in set_fits):
+        summary.update({'ssr': None, 'n_points': None, 'n_params': None, 'evaluations': None})
+        summary.update((criterion, None) for criterion in CRITERIA)
+        return summary
+    summary['ssr'] = float(sum(sum_squares(fit) for fit in set_fits))
+    summary['n_points'] = int(sum(len(fit.residual) for fit in set_fits))
+    summary['n_params'] = int(sum(fit.nvarys for fit in set_fits))
+    summary['evaluations'] = int(sum(getattr(fit, 'evaluations', fit.nfev) for fit in set_fits))
+    summary.update(information_criteria(summary['ssr'], summary['n_points'], summary['n_params']))
+    return summary
+
+
+def rank_models(summaries, criterion='aicc'):
+    """
+    Returns summaries sorted by criterion with 'rank', 'delta' (difference from the best) and
+    'weight' (Akaike weight) added; equations which could not be fitted are last
+    """
+    if criterion not in CRITERIA:
+        raise ValueError('Unknown criterion {} (choose from: {})'.format(criterion, ', '.join(CRITERIA)))
+    fitted = sorted((summary for summary in summaries if summary[criterion] is not None),
+                    key=lambda summary: summary[criterion])
+    failed = [summary for summary in summaries if summary[criterion] is None]
+    if fitted:
+        values = np.array([summary[criterion] for summary in fitted])
+        deltas = values - values[0] if np.isfinite(values[0]) else np.full(len(values), np.nan)
+        likelihoods = np.exp(-0.5 * deltas)
+        weights = likelihoods / np.nansum(likelihoods)
+        for rank, (summary, delta, weight) in enumerate(zip(fitted, deltas, weights), 1):
+            summary.update(rank=rank, delta=float(delta), weight=float(weight))
+    for summary in failed:
+        summary.update(rank=None, delta=None, weight=None)
+    return fitted + failed
+
+
+def nested_tests(summaries):
+    """
+    Returns F-tests of every nested equation pair among fitted equations
+    as [(simple key, rich key, F, p)]
+    """
+    by_key = {summary['key']: summary for summary in summaries if summary['ssr'] is not None}
+    tests = []
+    for rich_key, simple_key in sorted(NESTED_IN.items()):
+        if rich_key in by_key and simple_key in by_key:
+            f_val, p_val = f_test(by_key[simple_key], by_key[rich_key])
+            tests.append((simple_key, rich_key, float(f_val), float(p_val)))
+    return tests
+
+
+def screen_models(exp_data, equations=None, criterion='aicc', workers=1, seed=None, cache=None, planner=None,
+                  estimate=False, nested=False):
+    """
+    Fits all equations (all applicable if None) and returns (ranked summaries, nested F-tests)
+    """
+    if equations is None:
+        equations = data_equations(exp_data)
+    fits = screen_fits(exp_data, equations, workers=workers, seed=seed, cache=cache, planner=planner,
+                       estimate=estimate, nested=nested)
+    summaries = [model_summary(equa, fits[equation_key(equa)]) for equa in equations]
+    return rank_models(summaries, criterion), nested_tests(summaries)
@@ -1,6 +1,21 @@
+import math
+from itertools import zip_longest
+import numpy as np
 import openpyxl
 
 
+def new_workbook(streaming=True):
+    """
+    Returns empty workbook. Streaming (write-only) workbook writes every appended row straight
+    to a temporary file, so memory does not grow with size of the data.
+    """
+    if streaming:
+        return openpyxl.Workbook(write_only=True)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.worksheets[0])
+    return wb
+
+
 def new_tab(wb, tab_name):
     """
     Creates and returns new xls tab
@@ -11,6 +26,83 @@ def new_tab(wb, tab_name):
     return ws
 
 
+def append_rows(ws, rows):
+    """
+    Appends rows (any iterable, generators are consumed one row at a time)
+    """
+    for row in rows:
+        ws.append(row)
+
+
+def fit_columns(rate, predicted):
+    """
+    Returns predicted rate, residual (predicted - experimental) and squared residual columns,
+    predicted rates of the whole replicate or set come from one evaluation of the equation
+    """
+    predicted = np.broadcast_to(np.asarray(predicted, dtype=float), np.shape(rate))
+    residual = predicted - rate
+    return predicted, residual, residual ** 2
+
+
+def predicted_headers(runit):
+    """
+    Returns names of predicted rate, residual and squared residual columns
+    """
+    return ['Rate (predicted) [{}]'.format(runit),
+            'Residual [{}]'.format(runit),
+            'Squared residual [({})^2]'.format(runit)]
+
+
+def replicate_rows(exp_data, fit=None):
+    """
+    Yields rows of single substrate replicates side by side: concentration, rate (and predicted
+    rate, residual and squared residual if fit is given) of every replicate, empty cells where
+    replicate has no more points
+    """
+    columns = []
+    for con_rep, rat_rep in exp_data:
+        if fit is None:
+            columns.append((con_rep, rat_rep))
+        else:
+            columns.append((con_rep, rat_rep) + fit_columns(rat_rep, fit(con_rep)))
+    width = 2 if fit is None else 5
+    for points in zip_longest(*(zip(*rep_columns) for rep_columns in columns)):
+        row = []
+        for point in points:
+            row += [''] * width if point is None else list(point)
+        yield row
+
+
+def set_rows(varset, consset, rateset, fit=None):
+    """
+    Yields rows of double substrate set with replicates side by side: variable and constant
+    concentration, rate (and predicted rate, residual and squared residual if fit is given)
+    of every replicate
+    """
+    columns = []
+    for var_rep, cons_rep, rate_rep in zip(varset, consset, rateset):
+        if fit is None:
+            columns.append((var_rep, cons_rep, rate_rep))
+        else:
+            columns.append((var_rep, cons_rep, rate_rep) + fit_columns(rate_rep, fit(var_rep, cons_rep)))
+    for p_count in range(len(varset[0])):
+        row = []
+        for rep_columns in columns:
+            row += [column[p_count] for column in rep_columns]
+        yield row
+
+
+def parameter_rows(fit, exp_data):
+    """
+    Yields name, fitted value, bounds and units of every parameter of the fit (FitResult)
+    """
+    for param, value, min_val, max_val in zip(fit.param_order, fit.values, fit.lower, fit.upper):
+        # unbounded values are written as text ('-inf', 'inf')
+        min_val = str(min_val) if math.isinf(min_val) else float(min_val)
+        max_val = str(max_val) if math.isinf(max_val) else float(max_val)
+        yield [param, float(value), min_val, max_val, fit.get_units(param, exp_data)]
+
+
 def output_data_ss(ws, exp_data):
     """
     Adds single substrate data to current worksheet.
@@ -26,16 +118,7 @@ def output_data_ss(ws, exp_data):
     ws.append(row)
 
     # data rows
-    row_nums = max([len(rep) for rep in exp_data.concentrations])
-    for drow in range(row_nums):
-        row = []
-        for i in range(exp_data.replicates):
-            if len(exp_data.rates[i]) - 1 < drow:
-                row += ['', '']
-                continue
-            row += [exp_data.concentrations[i][drow],
-                    exp_data.rates[i][drow]]
-        ws.append(row)
+    append_rows(ws, replicate_rows(exp_data))
 
 
 def output_ds_subgroup(ws, subgroup, exp_data):
@@ -60,11 +143,7 @@ def output_ds_subgroup(ws, subgroup, exp_data):
         ws.append(row)
 
         # insert values
-        for p_count in range(len(varset[0])):
-            row = []
-            for rep_count in range(len(varset)):
-                row += [varset[rep_count][p_count], consset[rep_count][p_count], rateset[rep_count][p_count]]
-            ws.append(row)
+        append_rows(ws, set_rows(varset, consset, rateset))
         ws.append([])
 
 
@@ -75,17 +154,19 @@ def output_data_ds(wb, exp_data):
     output_ds_subgroup(ws, False, exp_data)
 
 
-def data_to_xls(data, w_file):
+def data_to_xls(data, w_file, streaming=True):
     """
-    Write data to excel File
+    Write data to excel File (rows are streamed to file unless streaming is False)
     """
-    wb = openpyxl.Workbook()
+    wb = new_workbook(streaming)
     if data.is_single():
         ws = new_tab(wb, data.name + " - input_data")
         output_data_ss(ws, data)
+    elif data.has_modifier():
+        ws = new_tab(wb, data.name + " - input_data")
+        output_ds_subgroup(ws, True, data)
     else:
         output_data_ds(wb, data)
-    wb.worksheets = wb.worksheets[1:]
     wb.save(w_file)
 
 
@@ -95,35 +176,75 @@ def output_fit_ss(ws, exp_data, fit):
     """
     row = []
     for i in range(exp_data.replicates):
-        row += ['Replicate {}'.format(i+1), '', '']
+        row += ['Replicate {}'.format(i+1), '', '', '', '']
     ws.append(row)
 
     # naming row
     row = ['Concentration [{}]'.format(exp_data.cunit),
-           'Rate (experimental) [{}]'.format(exp_data.runit),
-           'Rate (predicted) [{}]'.format(exp_data.runit)] * exp_data.replicates
+           'Rate (experimental) [{}]'.format(exp_data.runit)] + predicted_headers(exp_data.runit)
+    row *= exp_data.replicates
     ws.append(row)
 
     # data rows
-    row_nums = max([len(rep) for rep in exp_data.concentrations])
-    for drow in range(row_nums):
-        row = []
-        for i in range(exp_data.replicates):
-            if len(exp_data.rates[i]) - 1 < drow:
-                row += ['', '', '']
-                continue
-            row += [exp_data.concentrations[i][drow],
-                    exp_data.rates[i][drow],
-                    fit.function(exp_data.concentrations[i][drow])]
-        ws.append(row)
+    append_rows(ws, replicate_rows(exp_data, fit))
     ws.append([])
     ws.append(['Fit parameters'])
     ws.append(['', 'Fitted value', 'Lower bound', 'Upper bound'])
-    for param in fit.params:
-        vals = fit.params[param]
-        min_val = str(vals.min) if vals.min == float('-inf') else vals.min
-        max_val = str(vals.max) if vals.max == float('-inf') else vals.max
-        ws.append([param, vals.value, min_val, max_val, fit.get_units(param, exp_data)])
+    append_rows(ws, parameter_rows(fit, exp_data))
+    if hasattr(fit, 'restarts'):
+        ws.append(['Restarts done', fit.restarts])
+    output_intervals(ws, fit)
+    output_profiles(ws, fit)
+    output_posterior(ws, fit)
+
+
+def output_intervals(ws, fit):
+    """
+    Adds bootstrap confidence intervals of the fit (if it has them)
+    """
+    if not hasattr(fit, 'intervals'):
+        return
+    settings = fit.bootstrap
+    ws.append([])
+    ws.append(['Bootstrap {:.0%} confidence intervals'.format(settings['level']),
+               '{} samples, {} resampled'.format(settings['samples'], settings['method'])])
+    ws.append(['', 'Lower', 'Upper'])
+    for param, (low, high) in fit.intervals.items():
+        ws.append(finite_row([param, low, high]))
+    ws.append(['Failed samples', settings['failed']])
+    ws.append(['Samples per second', settings['rate'], '{} workers'.format(settings['workers'])])
+
+
+def output_profiles(ws, fit):
+    """
+    Adds profile likelihood confidence intervals of the fit (if it has them)
+    """
+    if not hasattr(fit, 'profiles'):
+        return
+    ws.append([])
+    ws.append(['Profile likelihood {:.0%} confidence intervals'.format(fit.profiles['level']),
+               'Sum of squares threshold', fit.profiles['threshold']])
+    ws.append(['', 'Lower', 'Upper'])
+    for param, ends in fit.profiles['intervals'].items():
+        ws.append([param] + ['not reached' if end is None else end for end in ends])
+
+
+def output_posterior(ws, fit):
+    """
+    Adds posterior medians and credible intervals of the fit (if it was sampled)
+    """
+    if not hasattr(fit, 'posterior'):
+        return
+    posterior = fit.posterior
+    ws.append([])
+    ws.append(['Posterior (ensemble sampler)', '{} walkers, {} steps, thinned by {}, {} saved steps burned'.format(
+        posterior['walkers'], posterior['steps'], posterior['thin'], posterior['burn'])])
+    ws.append(['', 'Median', '{:.0%} lower'.format(posterior['level']), '{:.0%} upper'.format(posterior['level'])])
+    for param, values in posterior['summary'].items():
+        ws.append(finite_row([param] + list(values)))
+    ws.append(['Acceptance fraction', posterior['acceptance']])
+    if posterior['path'] is not None:
+        ws.append(['Chain file', posterior['path']])
 
 
 def output_fit_ds(wb, exp_data, fits):
@@ -149,42 +270,133 @@ def output_fit_subgroup(ws, exp_data, fits, subgroup):
         row = []
         #  rep row
         for i in range(len(varset)):
-            row += ['Replicate {}'.format(i+1), '', '', '']
+            row += ['Replicate {}'.format(i+1), '', '', '', '', '']
         ws.append(row)
         # naming row
         row = ['Concentration ({}) [{}]'.format(exp_data.nameA if subgroup else exp_data.nameB, exp_data.cunit),
                'Concentration ({}) [{}]'.format(exp_data.nameB if subgroup else exp_data.nameA, exp_data.cunit),
-               'Rate (experimental) [{}]'.format(exp_data.runit),
-               'Rate (predicted) [{}]'.format(exp_data.runit)] * len(varset)
+               'Rate (experimental) [{}]'.format(exp_data.runit)] + predicted_headers(exp_data.runit)
+        row *= len(varset)
         ws.append(row)
         # insert values
-        for p_count in range(len(varset[0])):
-            row = []
-            for rep_count in range(len(varset)):
-                row += [varset[rep_count][p_count], consset[rep_count][p_count], rateset[rep_count][p_count],
-                        fit.function(varset[rep_count][p_count], consset[rep_count][p_count])]
-            ws.append(row)
+        append_rows(ws, set_rows(varset, consset, rateset, fit))
         ws.append([])
         ws.append(['Fit parameters'])
         ws.append(['', 'Fitted value', 'Lower bound', 'Upper bound'])
-        for param in fit.params:
-            vals = fit.params[param]
-            min_val = str(vals.min) if vals.min == float('-inf') else vals.min
-            max_val = str(vals.max) if vals.max == float('-inf') else vals.max
-            ws.append([param, vals.value, min_val, max_val, fit.get_units(param, exp_data)])
+        append_rows(ws, parameter_rows(fit, exp_data))
+        if hasattr(fit, 'restarts'):
+            ws.append(['Restarts done', fit.restarts])
+        output_intervals(ws, fit)
+        output_profiles(ws, fit)
+        output_posterior(ws, fit)
         ws.append([])
         ws.append([])
 
 
-def fit_to_xls(data, fit, w_file):
+def fit_to_xls(data, fit, w_file, streaming=True):
     """
-    Writes fitting results to excel file
+    Writes fitting results (FitResult of one substrate, {orientation: [FitResult for each set]} of two
+    substrates) to excel file (rows are streamed to file unless streaming is False)
     """
-    wb = openpyxl.Workbook()
+    wb = new_workbook(streaming)
     if data.is_single():
         ws = new_tab(wb, "fit results")
         output_fit_ss(ws, data, fit)
     else:
         output_fit_ds(wb, data, fit)
-    wb.worksheets = wb.worksheets[1:]
+    wb.save(w_file)
+
+
+def finite_row(row):
+    """
+    Returns row with undefined (nan or infinite) numbers left empty
+    """
+    return [None if isinstance(value, float) and not math.isfinite(value) else value for value in row]
+
+
+def selection_to_xls(data, ranking, tests, w_file, criterion='aicc'):
+    """
+    Writes ranking of screened equations and F-tests of nested pairs to excel file
+    """
+    wb = new_workbook()
+    ws = new_tab(wb, "model ranking")
+    ws.append(['Data', data.name])
+    ws.append(['Ranked by', criterion.upper()])
+    ws.append([])
+    ws.append(['Rank', 'Equation', 'Key', 'Sets', 'Points', 'Parameters', 'Sum of squares',
+               'AIC', 'AICc', 'BIC', 'Delta ' + criterion.upper(), 'Weight', 'Evaluations'])
+    for summary in ranking:
+        ws.append(finite_row([summary['rank'], summary['name'], summary['key'], summary['sets'], summary['n_points'],
+                              summary['n_params'], summary['ssr'], summary['aic'], summary['aicc'], summary['bic'],
+                              summary['delta'], summary['weight'], summary['evaluations']]))
+
+    ws = new_tab(wb, "nested F-tests")
+    ws.append(['Simpler equation', 'Richer equation', 'F', 'p'])
+    for simple_key, rich_key, f_val, p_val in tests:
+        ws.append(finite_row([simple_key, rich_key, f_val, p_val]))
+    wb.save(w_file)
+
+
+def output_joint_fit(ws, data, fit, title):
+    """
+    Adds parameters (with standard errors) of one fit to all sets of the data
+    (modifier concentration taken from data is left out)
+    """
+    ws.append([title, data.name])
+    ws.append([])
+    ws.append(['', 'Fitted value', 'Standard error', 'Lower bound', 'Upper bound'])
+    for param in fit.params:
+        if param == getattr(fit, 'modifier', None):
+            continue
+        vals = fit.params[param]
+        ws.append(finite_row([param, vals.value, vals.stderr, vals.min, vals.max,
+                              fit.get_units(param, data)]))
+    ws.append(['Points', len(fit.residual)])
+    ws.append(['Sum of squares', float(sum(fit.residual ** 2))])
+    if hasattr(fit, 'restarts'):
+        ws.append(['Restarts done', fit.restarts])
+
+
+def global_fit_to_xls(data, fit, w_file):
+    """
+    Writes global fit of all sets (parameters and residuals of every set) to excel file
+    """
+    wb = new_workbook()
+    ws = new_tab(wb, "global fit")
+    output_joint_fit(ws, data, fit, 'Global fit of all sets')
+
+    ws = new_tab(wb, "set deviations")
+    ws.append(['Variable substrate', 'Set', 'Constant substrate [{}]'.format(data.cunit), 'Points',
+               'Mean residual [{}]'.format(data.runit), 'RMS residual [{}]'.format(data.runit)])
+    for deviation in fit.set_deviations:
+        ws.append([deviation['orientation'], deviation['set'], deviation['constant'], deviation['points'],
+                   deviation['mean residual'], deviation['rms residual']])
+    wb.save(w_file)
+
+
+def modifier_fit_to_xls(data, fit, w_file):
+    """
+    Writes joint fit of all modifier concentrations (parameters, residuals of every concentration
+    and predicted rates) to excel file
+    """
+    wb = new_workbook()
+    ws = new_tab(wb, "joint fit")
+    output_joint_fit(ws, data, fit, 'Joint fit of all {} concentrations'.format(data.nameB))
+    output_intervals(ws, fit)
+    output_profiles(ws, fit)
+    output_posterior(ws, fit)
+
+    ws = new_tab(wb, "level deviations")
+    ws.append(['Set', '{} concentration [{}]'.format(data.nameB, data.cunit), 'Points',
+               'Mean residual [{}]'.format(data.runit), 'RMS residual [{}]'.format(data.runit)])
+    for deviation in fit.level_deviations:
+        ws.append([deviation['set'], deviation['modifier'], deviation['points'], deviation['mean residual'],
+                   deviation['rms residual']])
+
+    ws = new_tab(wb, "fitted data")
+    ws.append(['Concentration ({}) [{}]'.format(data.nameA, data.cunit),
+               'Concentration ({}) [{}]'.format(data.nameB, data.cunit),
+               'Rate (experimental) [{}]'.format(data.runit)] + predicted_headers(data.runit))
+    subs, rate, modifier = data.get_allpoints()
+    append_rows(ws, zip(subs, modifier, rate, *fit_columns(rate, fit(subs, modifier))))
     wb.save(w_file)
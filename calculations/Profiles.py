@@ -0,0 +1,128 @@
+"""
+Profile likelihood confidence intervals: every parameter is stepped away from the best fit (both
+directions) with the other parameters refitted, until residuals reach the F-test threshold
+"""
+from copy import deepcopy
+import numpy as np
+from scipy import stats
+
+from calculations.DataFitting import get_executor, select_cache, sum_squares
+from calculations.FitCache import fit_key
+
+
+# first step relative to standard error (or to the value if there is none) and step growth
+FIRST_STEP = 0.5
+STEP_GROWTH = 1.5
+MAX_STEPS = 30
+
+
+def profile_threshold(best_ssr, n_points, n_params, level=0.95):
+    """
+    Returns sum of squares at the edge of profile interval: ssr * (1 + F(1, n - p) / (n - p))
+    """
+    dof = n_points - n_params
+    if dof <= 0:
+        raise ValueError('Profiles need more points than varying parameters')
+    return best_ssr * (1 + stats.f.ppf(level, 1, dof) / dof)
+
+
+def constrained_fit(param_object, fitpoints, name, value, start_values):
+    """
+    Returns (sum of squares, values in param_order) of fit with parameter name fixed at value,
+    other varying parameters start from start_values
+    """
+    params = deepcopy(param_object)
+    for par, start in zip(params.param_order, start_values):
+        if params[par].vary:
+            params[par].value = min(max(start, params[par].min), params[par].max)
+    params[name].set(value=value, vary=False)
+    if not any(params[par].vary for par in params.param_order):
+        return float(np.sum(params.fitf(params, *fitpoints) ** 2)), params.get_values()
+    solution = params.get_solution(*fitpoints)
+    return sum_squares(solution), np.array([solution.params[par].value for par in params.param_order])
+
+
+def profile_branch(param_object, best_values, best_ssr, fitpoints, name, direction, threshold, first_step,
+                   max_steps=MAX_STEPS):
+    """
+    Steps parameter from its best value in direction (-1 or 1), every point is refitted from the
+    previous one. Returns ([(value, sum of squares)], interval end) where end is interpolated at
+    threshold, parameter bound if threshold is not reached before it, None if not reached at all.
+    """
+    param = param_object[name]
+    start_values = np.array(best_values, dtype=float)
+    last_value, last_ssr = start_values[param_object.param_order.index(name)], best_ssr
+    step = first_step
+    points = []
+    for _ in range(max_steps):
+        value = min(max(last_value + direction * step, param.min), param.max)
+        if value == last_value:
+            # started at the bound
+            return points, value
+        try:
+            ssr, start_values = constrained_fit(param_object, fitpoints, name, value, start_values)
+        except (OverflowError, ZeroDivisionError, ValueError):
+            return points, None
+        points.append((float(value), float(ssr)))
+        if ssr >= threshold:
+            return points, float(last_value + (threshold - last_ssr) * (value - last_value) / (ssr - last_ssr))
+        if value in (param.min, param.max):
+            return points, float(value)
+        last_value, last_ssr = value, ssr
+        step *= STEP_GROWTH
+    return points, None
+
+
+def profile_key(param_object, best_fit, fitpoints, level, max_steps):
+    """
+    Returns cache key of profiles of the fit
+    """
+    best_values = [float(best_fit.params[par].value) for par in param_object.param_order]
+    return fit_key(param_object, 'profile', None, fitpoints, repr((level, max_steps, best_values)))
+
+
+def profile_intervals(param_object, best_fit, fitpoints, level=0.95, workers=1, cache=None, max_steps=MAX_STEPS):
+    """
+    Returns profile likelihood intervals {parameter: (lower, upper)} of varying parameters
+    (None where profile did not reach threshold). Both directions of all parameters are independent
+    jobs on process pool if workers > 1. Intervals, profile points and threshold are saved as
+    best_fit.profiles and kept in the fit cache.
+    """
+    fitpoints = tuple(np.asarray(points, dtype=float) for points in fitpoints)
+    cache = select_cache(cache)
+    key = profile_key(param_object, best_fit, fitpoints, level, max_steps) if cache is not None else None
+    profiles = cache.get(key) if key is not None else None
+    if profiles is not None:
+        best_fit.profiles = profiles
+        return profiles['intervals']
+
+    best_values = [best_fit.params[par].value for par in param_object.param_order]
+    best_ssr = sum_squares(best_fit)
+    names = [par for par in param_object.param_order if param_object[par].vary]
+    threshold = profile_threshold(best_ssr, len(best_fit.residual), len(names), level)
+
+    branches = []
+    for name in names:
+        stderr = best_fit.params[name].stderr
+        scale = stderr if stderr is not None and np.isfinite(stderr) and stderr > 0 else \
+            0.1 * (abs(best_fit.params[name].value) or 1)
+        for direction in (-1, 1):
+            branches.append((param_object, best_values, best_ssr, fitpoints, name, direction, threshold,
+                             FIRST_STEP * scale, max_steps))
+    if workers > 1:
+        pool = get_executor(workers)
+        jobs = [pool.submit(profile_branch, *args) for args in branches]
+        results = [job.result() for job in jobs]
+    else:
+        results = [profile_branch(*args) for args in branches]
+
+    intervals, points = {}, {}
+    for pos, name in enumerate(names):
+        (low_points, low_end), (high_points, high_end) = results[2 * pos], results[2 * pos + 1]
+        intervals[name] = (low_end, high_end)
+        points[name] = low_points[::-1] + [(float(best_fit.params[name].value), float(best_ssr))] + high_points
+    profiles = {'level': level, 'threshold': float(threshold), 'intervals': intervals, 'points': points}
+    if key is not None:
+        cache.put(key, profiles)
+    best_fit.profiles = profiles
+    return intervals
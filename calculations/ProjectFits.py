@@ -0,0 +1,167 @@
+"""
+Fit results kept in project files: compact JSON records (parameters, bounds, covariance,
+sum of squares, evaluations, equation and hash of fitted data) which are restored without
+refitting while the data they were fitted to do not change
+"""
+import hashlib
+import numpy as np
+
+from calculations.DataFitting import FitResult, equation_key, fit_result
+from calculations.Estimators import with_estimates
+from calculations.ProjectIO import ORIENTATIONS, is_project_file, load_fits
+
+
+# orientation letter of two substrate sets (A is variable)
+ORIENTATION_NAMES = {a_var: name for name, a_var in ORIENTATIONS.items()}
+
+
+def data_hash(fitpoints):
+    """
+    Returns hash of fitted data points (values and shapes of all arrays)
+    """
+    digest = hashlib.sha1()
+    for points in fitpoints:
+        points = np.ascontiguousarray(points, dtype=np.float64)
+        digest.update(repr(points.shape).encode())
+        digest.update(points.tobytes())
+    return digest.hexdigest()
+
+
+def encode_numbers(values):
+    """
+    Returns list of numbers valid in JSON: nan as None, infinities as 'inf' and '-inf'
+    """
+    return [None if np.isnan(value) else str(value) if np.isinf(value) else value for value in values]
+
+
+def decode_numbers(values):
+    """
+    Returns list of floats of encoded numbers (see encode_numbers)
+    """
+    return [np.nan if value is None else float(value) for value in values]
+
+
+def fit_slot(param_object, a_var=None, set_pos=0):
+    """
+    Returns name of fit in project: equation key (whole data) or key, orientation and set number
+    (set of two substrate data), e.g. 'MM' or 'PPM A 2'
+    """
+    if a_var is None:
+        return equation_key(param_object)
+    return '{} {} {}'.format(equation_key(param_object), ORIENTATION_NAMES[a_var], set_pos + 1)
+
+
+def serialize_fit(fit, param_object, fitpoints):
+    """
+    Returns JSON serializable record of fit (residuals are not kept, they are recomputed from data,
+    non-finite numbers are encoded, see encode_numbers)
+    """
+    fit = fit_result(fit)
+    covariance = None if fit.covar is None else [encode_numbers(row) for row in fit.covar.tolist()]
+    return {'model': equation_key(param_object), 'name': param_object.name,
+            'param_order': list(param_object.param_order), 'values': encode_numbers(fit.values.tolist()),
+            'min': encode_numbers(fit.lower.tolist()), 'max': encode_numbers(fit.upper.tolist()),
+            'vary': fit.vary.tolist(), 'stderr': encode_numbers(fit.stderr.tolist()),
+            'var_names': fit.var_names, 'covariance': covariance, 'ssr': encode_numbers([fit.chisqr])[0],
+            'nfev': int(fit.nfev), 'evaluations': int(fit.evaluations),
+            'restarts': int(fit.restarts), 'start': encode_numbers(param_object.get_values().tolist()),
+            'initializations': int(getattr(param_object, 'initializations', 0)), 'data_hash': data_hash(fitpoints)}
+
+
+def matches(record, param_object, fitpoints):
+    """
+    States if record is a fit of the equation (with the same starting values, bounds, fixed parameters
+    and number of restarts) to fitpoints
+    """
+    if record.get('model') != equation_key(param_object) or record['param_order'] != list(param_object.param_order):
+        return False
+    if 'start' not in record or decode_numbers(record['start']) != param_object.get_values().tolist() or \
+            record.get('initializations') != getattr(param_object, 'initializations', 0):
+        return False
+    for par, low, high, vary in zip(record['param_order'], decode_numbers(record['min']),
+                                    decode_numbers(record['max']), record['vary']):
+        if (param_object[par].min, param_object[par].max, param_object[par].vary) != (low, high, vary):
+            return False
+    return record['data_hash'] == data_hash(fitpoints)
+
+
+def restore_fit(record, param_object, fitpoints):
+    """
+    Returns fit rebuilt from record (residuals of fitted values are evaluated once on fitpoints)
+    """
+    covariance = None if record['covariance'] is None else [decode_numbers(row) for row in record['covariance']]
+    fit = FitResult(record['model'], decode_numbers(record['values']), decode_numbers(record['min']),
+                    decode_numbers(record['max']), record['vary'], decode_numbers(record['stderr']),
+                    record['var_names'], covariance, nfev=record['nfev'], modifier_data=param_object.modifier_data)
+    fit.residual = np.asarray(fit.params.fitf(fit.params, *fitpoints), dtype=float)
+    fit.evaluations = record['evaluations']
+    fit.restarts = record['restarts']
+    return fit
+
+
+class ProjectFits(object):
+    """
+    Fit records of a project by slot (see fit_slot). Records of project file at path are read
+    on first use, so opening a project does not load them.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self._records = None
+
+    @property
+    def records(self):
+        """
+        {slot: record} (JSON serializable, saved with save_project(..., fits=records))
+        """
+        if self._records is None:
+            self._records = load_fits(self.path) if self.path is not None and is_project_file(self.path) else {}
+        return self._records
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, param_object, fitpoints, a_var=None, set_pos=0):
+        """
+        Returns stored fit of the equation to fitpoints or None (no fit, or data or settings have changed)
+        """
+        record = self.records.get(fit_slot(param_object, a_var, set_pos))
+        if record is None or not matches(record, param_object, fitpoints):
+            return None
+        return restore_fit(record, param_object, fitpoints)
+
+    def put(self, param_object, fitpoints, fit, a_var=None, set_pos=0):
+        """
+        Stores fit of the equation to fitpoints (replaces older fit of the same slot)
+        """
+        self.records[fit_slot(param_object, a_var, set_pos)] = serialize_fit(fit, param_object, fitpoints)
+
+    def get_sets(self, param_object, exp_data, orientations=(True, False), estimate=False):
+        """
+        Returns stored fits of every two substrate set {orientation: [fit for each set]},
+        None if any of them is missing or outdated. If estimate, bounds of every set are
+        estimated from its data (as in find_set_fits).
+        """
+        fits = {}
+        for a_var in orientations:
+            fits[a_var] = [self.get(with_estimates(param_object, *fitpoints) if estimate else param_object,
+                                    fitpoints, a_var, set_pos)
+                           for set_pos, fitpoints in enumerate(exp_data.get_points(a_var))]
+            if any(fit is None for fit in fits[a_var]):
+                return None
+        return fits
+
+    def put_sets(self, param_object, exp_data, fits, estimate=False):
+        """
+        Stores fits of two substrate sets {orientation: [fit for each set]}
+        """
+        for a_var, set_fits in fits.items():
+            for set_pos, (fit, fitpoints) in enumerate(zip(set_fits, exp_data.get_points(a_var))):
+                self.put(with_estimates(param_object, *fitpoints) if estimate else param_object,
+                         fitpoints, fit, a_var, set_pos)
+
+    def equation_records(self, param_object):
+        """
+        Returns {slot: record} of all fits of the equation
+        """
+        key = equation_key(param_object)
+        return {slot: record for slot, record in self.records.items() if record.get('model') == key}
@@ -0,0 +1,192 @@
+"""
+Versioned project files: zip container (not compressed) with JSON header, one raw .npy array
+for every column store (memory mapped on load) and optional cached fit results
+"""
+import io
+import json
+import os
+import pickle
+import struct
+import zipfile
+import numpy as np
+
+from calculations.DataStorage import ColumnStore, OneSubstrate, TwoSubstrates, ModifierSeries
+
+
+FORMAT_NAME = 'iteka-project'
+FORMAT_VERSION = 1
+EXTENSION = '.iteka'
+
+HEADER_FILE = 'project.json'
+FITS_FILE = 'fits.json'
+
+PROJECT_CLASSES = {cls.__name__: cls for cls in (OneSubstrate, TwoSubstrates, ModifierSeries)}
+
+# plain attributes saved in header (those the data object has)
+ATTRIBUTES = ('name', 'nameA', 'nameB', 'cunit', 'tunit', 'runit', 'uid', 'single', 'a_is_var', 'setindex',
+              'is_itc', 'activator')
+
+# stores of two substrate data by orientation (A is variable)
+ORIENTATIONS = {'A': True, 'B': False}
+
+
+def is_project_file(path):
+    """
+    States if file is a versioned project (not legacy pickle)
+    """
+    return zipfile.is_zipfile(path)
+
+
+def data_stores(exp_data):
+    """
+    Returns {store name: ColumnStore} of the data object
+    """
+    if hasattr(exp_data, 'stores'):
+        return {name: exp_data.stores[a_var] for name, a_var in ORIENTATIONS.items()}
+    return {'store': exp_data.store}
+
+
+def store_header(store, array_file):
+    """
+    Returns JSON description of column store (offsets and array member)
+    """
+    return {'columns': store.buffer.shape[0], 'points': store.size, 'rep_offsets': list(store.rep_offsets),
+            'set_offsets': list(store.set_offsets), 'array': array_file}
+
+
+def project_header(exp_data):
+    """
+    Returns JSON header of data object (arrays are described, not included)
+    """
+    header = {'format': FORMAT_NAME, 'version': FORMAT_VERSION, 'class': exp_data.__class__.__name__,
+              'attributes': {name: getattr(exp_data, name) for name in ATTRIBUTES if hasattr(exp_data, name)},
+              'stores': {name: store_header(store, 'stores/{}.npy'.format(name))
+                         for name, store in data_stores(exp_data).items()}}
+    if hasattr(exp_data, 'stoich'):
+        header['stoich'] = {name: exp_data.stoich[a_var] for name, a_var in ORIENTATIONS.items()}
+    return header
+
+
+def save_project(exp_data, path, fits=None):
+    """
+    Saves data object (and fits, JSON serializable {key: record}, if given) to project file.
+    File is written next to path and moved over it. A project saved to its own file must be
+    loaded with mmap=False, mapped files can not be replaced on Windows.
+    """
+    header = project_header(exp_data)
+    temp_path = path + '.tmp'
+    with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_STORED) as zfile:
+        zfile.writestr(HEADER_FILE, json.dumps(header, indent=1))
+        for name, store in data_stores(exp_data).items():
+            array_bytes = io.BytesIO()
+            np.lib.format.write_array(array_bytes, np.ascontiguousarray(store.get_all(), dtype=np.float64))
+            zfile.writestr(header['stores'][name]['array'], array_bytes.getvalue())
+        if fits:
+            # fits are read by other programs too, non-finite numbers must be encoded
+            zfile.writestr(FITS_FILE, json.dumps(fits, allow_nan=False))
+    os.replace(temp_path, path)
+    return path
+
+
+def read_header(path):
+    """
+    Returns JSON header of project file (arrays are not read)
+    """
+    with zipfile.ZipFile(path) as zfile:
+        header = json.loads(zfile.read(HEADER_FILE).decode())
+    if header.get('format') != FORMAT_NAME:
+        raise ValueError('{} is not a project file'.format(path))
+    if header.get('version', 0) > FORMAT_VERSION:
+        raise ValueError('{} was saved by newer version (format {}, supported {})'.format(
+            path, header['version'], FORMAT_VERSION))
+    return header
+
+
+def read_array(path, zfile, member, mmap=True):
+    """
+    Returns .npy array of zip member, memory mapped (read-only) if member is not compressed
+    """
+    info = zfile.getinfo(member)
+    if not mmap or info.compress_type != zipfile.ZIP_STORED:
+        with zfile.open(member) as afile:
+            return np.lib.format.read_array(afile)
+    with open(path, 'rb') as pfile:
+        # data follow local file header, its extra field may differ from the central directory
+        pfile.seek(info.header_offset)
+        name_len, extra_len = struct.unpack('<HH', pfile.read(30)[26:30])
+        pfile.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(pfile)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(pfile)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(pfile)
+        offset = pfile.tell()
+    if 0 in shape:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=shape, order='F' if fortran else 'C', offset=offset)
+
+
+def build_store(description, buffer):
+    """
+    Returns ColumnStore on buffer (columns x points) with offsets from header
+    """
+    store = ColumnStore(description['columns'])
+    store.buffer = buffer
+    store.size = description['points']
+    store.rep_offsets = list(description['rep_offsets'])
+    store.set_offsets = list(description['set_offsets'])
+    return store
+
+
+def load_project(path, mmap=True):
+    """
+    Returns data object of project file. With mmap data columns are memory mapped from the file
+    (read-only, edits copy them to memory).
+    """
+    header = read_header(path)
+    if header['class'] not in PROJECT_CLASSES:
+        raise ValueError('Unknown data class {} in {}'.format(header['class'], path))
+    exp_data = PROJECT_CLASSES[header['class']].__new__(PROJECT_CLASSES[header['class']])
+    exp_data.__dict__.update(header['attributes'])
+    with zipfile.ZipFile(path) as zfile:
+        stores = {name: build_store(description, read_array(path, zfile, description['array'], mmap))
+                  for name, description in header['stores'].items()}
+    if 'stoich' in header:
+        exp_data.stoich = {ORIENTATIONS[name]: value for name, value in header['stoich'].items()}
+    if 'store' in stores:
+        exp_data.store = stores['store']
+    else:
+        exp_data.stores = {a_var: stores[name] for name, a_var in ORIENTATIONS.items()}
+    return exp_data
+
+
+def load_fits(path):
+    """
+    Returns cached fit records {key: record} of project file ({} if it has none)
+    """
+    with zipfile.ZipFile(path) as zfile:
+        if FITS_FILE not in zfile.namelist():
+            return {}
+        return json.loads(zfile.read(FITS_FILE).decode())
+
+
+def open_project(path, mmap=True):
+    """
+    Returns data object of project file or of legacy project pickle (trusted files only)
+    """
+    if is_project_file(path):
+        return load_project(path, mmap)
+    with open(path, 'rb') as pfile:
+        return pickle.load(pfile)
+
+
+def migrate_project(pkl_path, path=None):
+    """
+    Converts legacy project pickle to project file (same name with project extension if path is None),
+    returns path of the new file
+    """
+    if path is None:
+        path = os.path.splitext(pkl_path)[0] + EXTENSION
+    with open(pkl_path, 'rb') as pfile:
+        exp_data = pickle.load(pfile)
+    return save_project(exp_data, path)
@@ -2,22 +2,35 @@
 Functions to create reaction plots
 """
 from matplotlib.pyplot import get_cmap
-from matplotlib.pyplot import figure
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 import os
 import statistics
 
+from calculations.LinearEstimates import mm_estimates
+
+
+def new_figure():
+    """
+    Returns figure for saving to files (does not depend on the GUI backend)
+    """
+    my_figure = Figure()
+    FigureCanvasAgg(my_figure)
+    return my_figure
+
 
 def plotoutput(reac_obj, sfolder, grid=False, plot_fun=None):
     """
-    saves basic graphs to sfolder
+    saves basic graphs to sfolder, plot_fun is fitted equation or FitResult (one substrate, modifier
+    series) or {orientation: [FitResult for each set]} (two substrates)
     """
     plot_pairs = {0: 'Michaelis-Menten',
                   1: 'Lineweaver-Buck',
                   2: 'Hans-Woolf',
                   3: 'Eadue-Hofstee'}
 
-    my_figure = figure()
+    my_figure = new_figure()
     xsubplot = my_figure.add_subplot(111)
     for singnal in plot_pairs:
         # SS plots
@@ -27,15 +40,22 @@ def plotoutput(reac_obj, sfolder, grid=False, plot_fun=None):
             my_figure.savefig(fig_name)
             xsubplot.clear()
 
+        # modifier series plots (one joint fit)
+        elif reac_obj.has_modifier():
+            plot_dsegraph(reac_obj, xsubplot, singnal, grid, equation=plot_fun, a_isvar=True)
+            fig_name = os.path.join(sfolder, plot_pairs[singnal] + '_plot.pdf')
+            my_figure.savefig(fig_name)
+            xsubplot.clear()
+
         # DS plots
         else:
-            plot_dsegraph(reac_obj, xsubplot, singnal, grid, equations=[eq.function for eq in plot_fun[True]],
+            plot_dsegraph(reac_obj, xsubplot, singnal, grid, equations=plot_fun[True],
                           a_isvar=True)
             fig_name = os.path.join(sfolder, '{}_{}_plot.pdf'.format(reac_obj.nameA, plot_pairs[singnal]))
             my_figure.savefig(fig_name)
             xsubplot.clear()
 
-            plot_dsegraph(reac_obj, xsubplot, singnal, grid, equations=[eq.function for eq in plot_fun[False]],
+            plot_dsegraph(reac_obj, xsubplot, singnal, grid, equations=plot_fun[False],
                           a_isvar=False)
             fig_name = os.path.join(sfolder, '{}_{}_plot.pdf'.format(reac_obj.nameB, plot_pairs[singnal]))
             my_figure.savefig(fig_name)
@@ -47,14 +67,19 @@ def plotoutput(reac_obj, sfolder, grid=False, plot_fun=None):
         fig_name = os.path.join(sfolder, plot_pairs[0] + '_plot_LEGEND.pdf')
         my_figure.savefig(fig_name)
         xsubplot.clear()
+    elif reac_obj.has_modifier():
+        plot_dsegraph(reac_obj, xsubplot, 0, grid, equation=plot_fun, a_isvar=True, legend='Set ')
+        fig_name = os.path.join(sfolder, plot_pairs[0] + '_plot_LEGEND.pdf')
+        my_figure.savefig(fig_name)
+        xsubplot.clear()
     else:
-        plot_dsegraph(reac_obj, xsubplot, 0, grid, equations=[eq.function for eq in plot_fun[True]],
+        plot_dsegraph(reac_obj, xsubplot, 0, grid, equations=plot_fun[True],
               a_isvar=True, legend='Set ')
         fig_name = os.path.join(sfolder, '{}_{}_plot_LEGEND.pdf'.format(reac_obj.nameA, plot_pairs[0]))
         my_figure.savefig(fig_name)
         xsubplot.clear()
 
-        plot_dsegraph(reac_obj, xsubplot, 0, grid, equations=[eq.function for eq in plot_fun[False]],
+        plot_dsegraph(reac_obj, xsubplot, 0, grid, equations=plot_fun[False],
                       a_isvar=False, legend='Set ')
         fig_name = os.path.join(sfolder, '{}_{}_plot_LEGEND.pdf'.format(reac_obj.nameB, plot_pairs[0]))
         my_figure.savefig(fig_name)
@@ -63,9 +88,9 @@ def plotoutput(reac_obj, sfolder, grid=False, plot_fun=None):
 
 def resi_to_file(reac_obj, sfolder, equation=None, equations=None):
     """
-    Makes residuals plot file
+    Makes residuals plot file (equation or FitResult, equations are {orientation: [FitResult for each set]})
     """
-    my_figure = figure()
+    my_figure = new_figure()
     xsubplot = my_figure.add_subplot(111)
 
     # SS
@@ -74,15 +99,21 @@ def resi_to_file(reac_obj, sfolder, equation=None, equations=None):
         fig_name = os.path.join(sfolder, 'residuals_plot.pdf')
         my_figure.savefig(fig_name)
 
+    # modifier series
+    elif reac_obj.has_modifier():
+        plot_res(reac_obj, xsubplot, equation=equation, a_isvar=True)
+        fig_name = os.path.join(sfolder, 'residuals_plot.pdf')
+        my_figure.savefig(fig_name)
+
     # DS
     else:
-        plot_res(reac_obj, xsubplot, equations=[eq.function for eq in equations[True]],
+        plot_res(reac_obj, xsubplot, equations=equations[True],
                  a_isvar=True)
         fig_name = os.path.join(sfolder, '{}_residuals_plot.pdf'.format(reac_obj.nameA))
         my_figure.savefig(fig_name)
         xsubplot.clear()
 
-        plot_res(reac_obj, xsubplot, equations=[eq.function for eq in equations[False]],
+        plot_res(reac_obj, xsubplot, equations=equations[False],
                  a_isvar=False)
         fig_name = os.path.join(sfolder, '{}_residuals_plot.pdf'.format(reac_obj.nameB))
         my_figure.savefig(fig_name)
@@ -90,7 +121,7 @@ def resi_to_file(reac_obj, sfolder, equation=None, equations=None):
 
 def plot_eq_n_point(fit_results, reac_obj, sfolder, grid=False):
     for equat in fit_results.results_c:
-        my_figure = figure()
+        my_figure = new_figure()
         xsubplot = my_figure.add_subplot(111)
         plot_singlegraph(reac_obj, xsubplot, 0, grid=grid, equation=fit_results.eqs[equat])
         fig_name = os.path.join(sfolder, equat + '_plot.pdf')
@@ -115,33 +146,26 @@ def plot_singlegraph(reac_obj, plot_obj, signal=0, grid=False, equation=None, le
     cols = [cm(1.*i/reac_obj.get_replicates()) for i in range(reac_obj.get_replicates())]
 
     #grid settings
-    plot_obj.grid(b=grid)
+    plot_obj.grid(grid)
 
     # setup for proper graph
     if signal == 1:
         x_name = "1 / {} concentration [1 / {}]".format(sname, reac_obj.cunit)
         y_name = "1 / Reaction rate [{}]".format(reac_obj.runit)
-        x_vals = [1 / tfset for tfset in reac_obj.concentrations]
-        y_vals = [1 / tfset for tfset in reac_obj.rates]
 
     elif signal == 2:
         x_name = "{} concentration [{}]".format(sname, reac_obj.cunit)
         y_name = "{} concentration / Reaction rate [{}]".format(sname, reac_obj.tunit)
-        x_vals = reac_obj.concentrations
-        y_vals = [tfset1 / tfset2 for tfset1, tfset2 in
-                  zip(reac_obj.concentrations, reac_obj.rates)]
 
     elif signal == 3:
         x_name = "Reaction rate / {} concentration [1 / {}]".format(sname, reac_obj.tunit)
         y_name = "Reaction rate [{}]".format(reac_obj.runit)
-        x_vals = [tfset1 / tfset2 for tfset1, tfset2 in
-                  zip(reac_obj.rates, reac_obj.concentrations)]
-        y_vals = reac_obj.rates
     else:
         x_name = "{} concentration [{}]".format(sname, reac_obj.cunit)
         y_name = "Reaction rate [{}]".format(reac_obj.runit)
-        x_vals = reac_obj.concentrations
-        y_vals = reac_obj.rates
+
+    # transformed values are cached by data object
+    x_vals, y_vals = reac_obj.get_transform(signal)
 
     # plot the objects
     for x_rep, y_rep, count in zip(x_vals, y_vals, range(len(y_vals))):
@@ -160,8 +184,8 @@ def plot_singlegraph(reac_obj, plot_obj, signal=0, grid=False, equation=None, le
                           alpha=alp)
 
         # Plot linear fits
-        extrap_val = (max(x_rep) - min(x_rep)) * extrapolation / 100
-        line_vals = np.linspace(min(x_rep) - extrap_val, max(x_rep) + extrap_val, 100)
+        extrap_val = (x_rep.max() - x_rep.min()) * extrapolation / 100
+        line_vals = np.linspace(x_rep.min() - extrap_val, x_rep.max() + extrap_val, 100)
         if (signal == 1 or signal == 2) and rep_fit:
             fit = np.polyfit(x_rep, y_rep, rep_fit)
             fit_fn = np.poly1d(fit)
@@ -175,26 +199,29 @@ def plot_singlegraph(reac_obj, plot_obj, signal=0, grid=False, equation=None, le
 
     # plot global fit
     if (signal == 1 or signal == 2) and global_fit:
-        x_globs = np.hstack(tuple(x_vals))
-        y_globs = np.hstack(tuple(y_vals))
+        x_globs, y_globs = reac_obj.get_transform(signal, flat=True)
         fit = np.polyfit(x_globs, y_globs, global_fit)
         fit_fn = np.poly1d(fit)
-        extrap_val = (max(x_rep) - min(x_rep)) * extrapolation / 100
-        line_vals = np.linspace(min(x_globs) - extrap_val, max(x_globs) + extrap_val, 100)
+        extrap_val = (x_rep.max() - x_rep.min()) * extrapolation / 100
+        line_vals = np.linspace(x_globs.min() - extrap_val, x_globs.max() + extrap_val, 100)
+        glob_label = "Global fit"
+        if global_fit == 1:
+            # Michaelis-Menten constants of the same line
+            km_est, v_est = mm_estimates(*reac_obj.get_allpoints(), method='lb' if signal == 1 else 'hw')
+            glob_label += " (Km = {:.4g}, Vmax = {:.4g})".format(km_est[0], v_est[0])
         plot_obj.plot(line_vals, fit_fn(line_vals),
                       ms=4,
                       color='b',
-                      label="Global fit")
+                      label=glob_label)
 
     # Plot legend
     if legend:
         plot_obj.legend(loc=0)
 
     # set limits
-    x_min = min([min(d_set) for d_set in x_vals])
-    x_max = max([max(d_set) for d_set in x_vals])
-    y_min = min([min(d_set) for d_set in y_vals])
-    y_max = max([max(d_set) for d_set in y_vals])
+    x_globs, y_globs = reac_obj.get_transform(signal, flat=True)
+    x_min, x_max = x_globs.min(), x_globs.max()
+    y_min, y_max = y_globs.min(), y_globs.max()
 
     extrap_val = (x_max - x_min) * extrapolation / 100
     x_max = x_max + extrap_val
@@ -236,7 +263,7 @@ def plot_res(reac_obj, plot_obj, equation=None, equations=None, grid=False, a_is
         return
 
     #grid settings
-    plot_obj.grid(b=grid)
+    plot_obj.grid(grid)
 
     # naming
     x_name = "Substrate concentration"
@@ -313,10 +340,10 @@ def plot_dsegraph(reac_obj, plot_obj, signal=0, grid=False, equation=None, equat
     """
     Plots points and additional fits
     """
-    ebars = calc_ebars(reac_obj, a_isvar)
+    ebars = calc_ebars(reac_obj, a_isvar) if errors else False
     sname = reac_obj.nameA if a_isvar else reac_obj.nameB
     plot_singlegraph(reac_obj=reac_obj.get_repres(a_isvar), plot_obj=plot_obj, signal=signal, grid=grid, legend=legend,
-                     pick=pick, errorbars=ebars if errors else False, sname=sname)
+                     pick=pick, errorbars=ebars, sname=sname)
     s2_means = reac_obj.get_const_mean(a_isvar)
     x_all = [x[0] for x in reac_obj.AllVar[a_isvar]]
 
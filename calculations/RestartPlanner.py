@@ -0,0 +1,137 @@
+"""
+Planning of restart starting points (quasi-random designs) and early stopping of restarts
+"""
+import warnings
+import numpy as np
+
+try:
+    from scipy.stats import qmc
+except ImportError:
+    qmc = None
+
+
+# log space lower bound (relative to upper) for constants with lower bound of 0
+LOG_RANGE = 1e-6
+
+# half width of range used instead of infinite bound (relative to current value)
+OPEN_RANGE = 100
+
+
+def halton(n_points, dims, rng):
+    """
+    Returns Halton sequence (randomly shifted) of shape (n_points, dims) in [0, 1)
+    """
+    primes = []
+    candidate = 2
+    while len(primes) < dims:
+        if all(candidate % prime for prime in primes):
+            primes.append(candidate)
+        candidate += 1
+
+    design = np.zeros((n_points, dims))
+    for dim, base in enumerate(primes):
+        index = np.arange(1, n_points + 1)
+        fraction = 1.0
+        while np.any(index > 0):
+            fraction /= base
+            design[:, dim] += fraction * (index % base)
+            index //= base
+    return (design + rng.random_sample(dims)) % 1
+
+
+def latin_hypercube(n_points, dims, rng):
+    """
+    Returns Latin hypercube design of shape (n_points, dims) in [0, 1)
+    """
+    design = np.empty((n_points, dims))
+    for dim in range(dims):
+        design[:, dim] = (rng.permutation(n_points) + rng.random_sample(n_points)) / n_points
+    return design
+
+
+class RestartPlanner(object):
+    """
+    Creates starting points of restarts inside parameter bounds and decides when to stop.
+    method: 'random', 'lhs' (Latin hypercube), 'halton' or 'sobol' (needs scipy, else Halton)
+    log_space: sample constants (parameters starting with k) in log space (linear by default)
+    agree: stop when this many solutions (default start included) reached best residuals within rtol,
+    0 never stops early
+    """
+    methods = ('random', 'lhs', 'halton', 'sobol')
+
+    def __init__(self, method='lhs', log_space=False, agree=3, rtol=1e-6):
+        if method not in self.methods:
+            raise ValueError('Unknown restart method {} (choose from: {})'.format(method, ', '.join(self.methods)))
+        self.method = method
+        self.log_space = log_space
+        self.agree = agree
+        self.rtol = rtol
+
+    def __repr__(self):
+        return 'RestartPlanner(method={!r}, log_space={!r}, agree={!r}, rtol={!r})'.format(
+            self.method, self.log_space, self.agree, self.rtol)
+
+    def bounds(self, param_object):
+        """
+        Returns varying parameters, their finite (lower, upper) bounds and log space flags
+        """
+        names, lower, upper, logs = [], [], [], []
+        for name in param_object.param_order:
+            param = param_object[name]
+            if not param.vary:
+                continue
+            low = param.min if np.isfinite(param.min) else param.value - OPEN_RANGE * (abs(param.value) + 1)
+            high = param.max if np.isfinite(param.max) else param.value + OPEN_RANGE * (abs(param.value) + 1)
+            is_log = self.log_space and name.lower().startswith('k') and high > 0
+            if is_log:
+                low = max(low, high * LOG_RANGE)
+            names.append(name)
+            lower.append(low)
+            upper.append(high)
+            logs.append(is_log)
+        return names, np.array(lower, dtype=float), np.array(upper, dtype=float), np.array(logs, dtype=bool)
+
+    def unit_design(self, n_points, dims, seed):
+        """
+        Returns design of shape (n_points, dims) in unit hypercube (same for the same seed)
+        """
+        if self.method == 'random':
+            # independent stream for every restart (as before)
+            return np.array([np.random.RandomState([seed, restart]).random_sample(dims)
+                             for restart in range(n_points)]).reshape(n_points, dims)
+        rng = np.random.RandomState(seed)
+        if self.method == 'lhs':
+            return latin_hypercube(n_points, dims, rng)
+        if self.method == 'sobol' and qmc is not None:
+            with warnings.catch_warnings():
+                # balance warning for sizes which are not powers of 2
+                warnings.simplefilter('ignore', UserWarning)
+                return qmc.Sobol(dims, scramble=True, seed=rng.randint(2**31)).random(n_points)
+        return halton(n_points, dims, rng)
+
+    def plan(self, param_object, n_points, seed):
+        """
+        Returns (n_points, number of parameters) starting values in param_order.
+        Fixed parameters keep their values.
+        """
+        names, lower, upper, logs = self.bounds(param_object)
+        starts = np.tile(param_object.get_values(), (n_points, 1))
+        if not names or n_points == 0:
+            return starts
+
+        unit = self.unit_design(n_points, len(names), seed)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            linear = lower + unit * (upper - lower)
+            log_scale = np.exp(np.log(lower) + unit * (np.log(upper) - np.log(lower)))
+        columns = [param_object.param_order.index(name) for name in names]
+        starts[:, columns] = np.where(logs, log_scale, linear)
+        return starts
+
+    def converged(self, residual_sums):
+        """
+        Returns True if enough solutions reached the best residuals
+        """
+        if not self.agree or len(residual_sums) < self.agree:
+            return False
+        best = min(residual_sums)
+        return sum(ssr <= best + self.rtol * abs(best) for ssr in residual_sums) >= self.agree
@@ -0,0 +1,159 @@
+"""
+Affine invariant ensemble sampler (stretch move of Goodman & Weare) of posterior distributions of
+equation parameters. Log probability of all walkers is computed in one population_residuals call.
+"""
+import numpy as np
+
+
+# walkers start in a ball of this size (relative to parameter value) around the best fit
+START_SPREAD = 1e-3
+
+
+class EnsembleSampler(object):
+    """
+    Samples varying parameters of equation fitted to fitpoints (fixed parameters keep their values).
+    Priors are uniform within parameter bounds. Likelihood is Gaussian with unknown noise
+    integrated out (Jeffreys prior), log L = -n / 2 * log(sum of squares).
+    stretch: scale parameter of the stretch move (2 is usual)
+    """
+    def __init__(self, param_object, fitpoints, n_walkers=None, stretch=2.0, seed=None):
+        self.param_object = param_object
+        self.fitpoints = tuple(np.asarray(points, dtype=float) for points in fitpoints)
+        self.n_points = len(self.fitpoints[0])
+        self.columns = [pos for pos, par in enumerate(param_object.param_order) if param_object[par].vary]
+        self.lower = np.array([param_object[param_object.param_order[pos]].min for pos in self.columns])
+        self.upper = np.array([param_object[param_object.param_order[pos]].max for pos in self.columns])
+        n_dims = len(self.columns)
+        if n_dims == 0:
+            raise ValueError('Equation has no varying parameters')
+        if n_walkers is None:
+            n_walkers = max(2 * n_dims + 2, 16)
+        if n_walkers % 2 or n_walkers < 2 * n_dims:
+            raise ValueError('Number of walkers must be even and at least twice the number of varying parameters')
+        self.n_walkers = n_walkers
+        self.stretch = stretch
+        self.rng = np.random.RandomState(seed)
+        self.accepted = 0
+        self.proposed = 0
+
+    @property
+    def acceptance_fraction(self):
+        return self.accepted / self.proposed if self.proposed else 0.0
+
+    def full_values(self, positions):
+        """
+        Returns (walkers, parameters in param_order) values with fixed parameters added
+        """
+        values = np.tile(self.param_object.get_values(), (len(positions), 1))
+        values[:, self.columns] = positions
+        return values
+
+    def log_prob(self, positions):
+        """
+        Returns log posterior (up to a constant) of every walker position (rows of varying parameters)
+        """
+        positions = np.atleast_2d(positions)
+        inside = np.all((positions >= self.lower) & (positions <= self.upper), axis=1)
+        log_probs = np.full(len(positions), -np.inf)
+        if inside.any():
+            with np.errstate(all='ignore'):
+                ssr = self.param_object.population_ssr(self.full_values(positions[inside]), *self.fitpoints)
+                log_probs[inside] = np.where(np.isfinite(ssr) & (ssr > 0),
+                                             -0.5 * self.n_points * np.log(ssr), -np.inf)
+        return log_probs
+
+    def initial_positions(self, best_fit=None, spread=START_SPREAD):
+        """
+        Returns walker positions in small ball around best fit (current values if None), inside bounds
+        """
+        order = self.param_object.param_order
+        if best_fit is None:
+            center = self.param_object.get_values()[self.columns]
+        else:
+            center = np.array([best_fit.params[order[pos]].value for pos in self.columns])
+        steps = spread * (np.abs(center) + spread) * self.rng.standard_normal((self.n_walkers, len(center)))
+        positions = center + steps
+        # walkers outside bounds are mirrored to the other side of the center
+        outside = (positions < self.lower) | (positions > self.upper)
+        positions[outside] = (center - steps)[outside]
+        return np.clip(positions, self.lower, self.upper)
+
+    def step(self, positions, log_probs):
+        """
+        Moves both halves of the ensemble once (every walker is stretched towards a walker of the other half)
+        """
+        n_half = self.n_walkers // 2
+        n_dims = positions.shape[1]
+        for first in (0, n_half):
+            moving = slice(first, first + n_half)
+            others = positions[n_half - first:2 * n_half - first]
+            scale = ((self.stretch - 1) * self.rng.random_sample(n_half) + 1) ** 2 / self.stretch
+            partners = others[self.rng.randint(n_half, size=n_half)]
+            proposals = partners + scale[:, np.newaxis] * (positions[moving] - partners)
+            new_log_probs = self.log_prob(proposals)
+            with np.errstate(invalid='ignore'):
+                log_accept = (n_dims - 1) * np.log(scale) + new_log_probs - log_probs[moving]
+            accept = np.log(self.rng.random_sample(n_half)) < log_accept
+            positions[moving][accept] = proposals[accept]
+            log_probs[moving][accept] = new_log_probs[accept]
+            self.accepted += int(accept.sum())
+            self.proposed += n_half
+        return positions, log_probs
+
+    def run(self, n_steps, start=None, thin=1, path=None, progress=None):
+        """
+        Runs n_steps moves from start positions (initial_positions() if None) and returns chain of
+        shape (n_steps // thin, walkers, parameters in param_order + 1), last column is log posterior.
+        With path chain is written to .npy file as it is sampled (memory mapped array is returned),
+        so only current positions are kept in memory. progress(done, n_steps) is called after each step.
+        """
+        positions = np.array(self.initial_positions() if start is None else start, dtype=float)
+        log_probs = self.log_prob(positions)
+        if not np.all(np.isfinite(log_probs)):
+            raise ValueError('All walkers have to start inside parameter bounds')
+
+        shape = (n_steps // thin, self.n_walkers, len(self.param_object.param_order) + 1)
+        if path is None:
+            chain = np.empty(shape)
+        else:
+            chain = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape)
+        for done in range(1, n_steps + 1):
+            positions, log_probs = self.step(positions, log_probs)
+            if done % thin == 0 and done // thin <= shape[0]:
+                chain[done // thin - 1, :, :-1] = self.full_values(positions)
+                chain[done // thin - 1, :, -1] = log_probs
+            if progress is not None:
+                progress(done, n_steps)
+        if path is not None:
+            chain.flush()
+        return chain
+
+
+def posterior_summary(chain, param_order, burn=0, level=0.95):
+    """
+    Returns {parameter: (median, lower, upper)} of chain (from run) after burn saved steps,
+    parameters are read one at a time so memory mapped chains are not loaded whole
+    """
+    tail = 50 * (1 - level)
+    summary = {}
+    for pos, par in enumerate(param_order):
+        values = np.asarray(chain[burn:, :, pos]).ravel()
+        median, low, high = np.percentile(values, [50, tail, 100 - tail])
+        summary[par] = (float(median), float(low), float(high))
+    return summary
+
+
+def sample_posterior(param_object, best_fit, fitpoints, n_steps=2000, n_walkers=None, thin=1, burn=None,
+                     path=None, seed=None, level=0.95):
+    """
+    Samples posterior around best fit and returns (chain, summary). First quarter of saved steps
+    is discarded in summary if burn is None. Summary, acceptance fraction and chain file are saved
+    as best_fit.posterior.
+    """
+    sampler = EnsembleSampler(param_object, fitpoints, n_walkers=n_walkers, seed=seed)
+    chain = sampler.run(n_steps, sampler.initial_positions(best_fit), thin=thin, path=path)
+    burn = len(chain) // 4 if burn is None else burn
+    summary = posterior_summary(chain, param_object.param_order, burn, level)
+    best_fit.posterior = {'level': level, 'summary': summary, 'steps': n_steps, 'thin': thin, 'burn': burn,
+                          'walkers': sampler.n_walkers, 'acceptance': sampler.acceptance_fraction, 'path': path}
+    return chain, summary
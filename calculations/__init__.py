@@ -1,3 +1,14 @@
 from calculations.DataFitting import *
 from calculations.DataStorage import *
 from calculations.ModelsIO import *
+from calculations.FitCache import *
+from calculations.RestartPlanner import *
+from calculations.Estimators import *
+from calculations.LinearEstimates import *
+from calculations.ModelHierarchy import *
+from calculations.ModelSelection import *
+from calculations.Bootstrap import *
+from calculations.Profiles import *
+from calculations.Sampler import *
+from calculations.ProjectIO import *
+from calculations.ProjectFits import *
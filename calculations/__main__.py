@@ -0,0 +1,12 @@
+"""
+Command line batch fitting (python -m calculations --help)
+"""
+import sys
+import matplotlib
+# no display needed - select file backend before anything imports pyplot
+matplotlib.use('Agg')
+
+from calculations.BatchFitting import main
+
+if __name__ == '__main__':
+    sys.exit(main())
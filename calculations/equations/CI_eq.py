@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -15,6 +16,23 @@ def my_fiteq(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def my_jacobian(params, subs_c, *_):
+    """
+    Competitive inhibition (irr) equation derivatives (km, v_max, Inh, ki)
+    """
+    km = params['km'].value
+    v_max = params['v_max'].value
+    inh = params['Inh'].value
+    ki = params['ki'].value
+
+    denom = km + subs_c + km * inh / ki
+    numer = v_max * subs_c
+    return np.column_stack((-numer * (1 + inh / ki) / denom ** 2,
+                            subs_c / denom,
+                            -numer * km / ki / denom ** 2,
+                            numer * km * inh / ki ** 2 / denom ** 2))
+
+
 def create_my_eq(km, v_max, inh, ki, *_):
     """
     Competitive inhibition (irr) equation
@@ -37,7 +55,9 @@ class CIparams(FitParam):
         self.add('ki', value=ki[0], min=ki[1], max=ki[2])
 
         self.param_order = ['km', 'v_max', 'Inh', 'ki']
+        self.modifier = 'Inh'
         self.units = ['c', 'r', 'c', 'c']
         self.fitf = my_fiteq
+        self.jacf = my_jacobian
         self.eq = create_my_eq
         self.name = 'Competitive inhibition (irr)'
@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations.fitparam import FitParam
 
 
@@ -15,6 +16,22 @@ def he_function(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def he_jacobian(params, subs_c, *_):
+    """
+    Hills equation derivatives (kh, v_max, n)
+    """
+    kh = params['kh'].value
+    v_max = params['v_max'].value
+    n = params['n'].value
+
+    subs_n = subs_c ** n
+    denom = kh + subs_n
+    log_subs = np.log(np.where(subs_c > 0, subs_c, 1.))
+    return np.column_stack((-v_max * subs_n / denom ** 2,
+                            subs_n / denom,
+                            v_max * kh * subs_n * log_subs / denom ** 2))
+
+
 def create_he(kh, v_max, n, *_):
     """
     Create hills equation
@@ -35,6 +52,7 @@ class HEparams(FitParam):
         self.add('v_max', value=vmax[0], min=vmax[1], max=vmax[2])
         self.add('n', value=n[0], min=n[1], max=n[2])
         self.fitf = he_function
+        self.jacf = he_jacobian
         self.eq = create_he
         self.name = 'Hills equation'
         self.param_order = ['kh', 'v_max', 'n']
@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -17,6 +18,34 @@ def ainh_function(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def ainh_jacobian(params, subs_c, *_):
+    """
+    Allosteric inhibition equation derivatives (ks, v_max, n, L, Inh, ki)
+    """
+    ks = params['ks'].value
+    v_max = params['v_max'].value
+    n = params['n'].value
+    l = params['L'].value
+    inh = params['Inh'].value
+    ki = params['ki'].value
+
+    free = ks + subs_c
+    inh_fac = 1 + inh / ki
+    bound = ks * inh_fac
+    denom = l * bound ** n + free ** n
+    rate_calc = v_max * subs_c * free ** (n-1) / denom
+    # derivative of denominator by bound
+    d_bound = l * n * bound ** (n-1)
+    return np.column_stack((v_max * subs_c * (n-1) * free ** (n-2) / denom -
+                            rate_calc * (d_bound * inh_fac + n * free ** (n-1)) / denom,
+                            subs_c * free ** (n-1) / denom,
+                            rate_calc * np.log(free) -
+                            rate_calc * (l * bound ** n * np.log(bound) + free ** n * np.log(free)) / denom,
+                            -rate_calc * bound ** n / denom,
+                            -rate_calc * d_bound * ks / ki / denom,
+                            rate_calc * d_bound * ks * inh / ki ** 2 / denom))
+
+
 def create_ainh(ks, v_max, n, l, inh, ki, *_):
     """
     Create Allosteric inhibition equation
@@ -41,7 +70,9 @@ class AInHparams(FitParam):
         self.add('ki', value=ki[0], min=ki[1], max=ki[2])
 
         self.param_order = ['ks', 'v_max', 'n', 'L', 'Inh', 'ki']
+        self.modifier = 'Inh'
         self.units = ['c', 'r', 'c', '', 'c', 'c']
         self.fitf = ainh_function
+        self.jacf = ainh_jacobian
         self.eq = create_ainh
         self.name = 'Allosteric inhibition (MWC)'
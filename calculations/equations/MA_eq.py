@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -16,6 +17,25 @@ def my_fiteq(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def my_jacobian(params, subs_c, *_):
+    """
+    Mixed activation (irrev) equation derivatives (kms, v_max, act, kac, kas)
+    """
+    kms = params['kms'].value
+    v_max = params['v_max'].value
+    act = params['act'].value
+    kac = params['kac'].value
+    kas = params['kas'].value
+
+    denom = kms * (kas + act) + subs_c * (kac + act)
+    numer = v_max * subs_c * act
+    return np.column_stack((-numer * (kas + act) / denom ** 2,
+                            subs_c * act / denom,
+                            v_max * subs_c / denom - numer * (kms + subs_c) / denom ** 2,
+                            -numer * subs_c / denom ** 2,
+                            -numer * kms / denom ** 2))
+
+
 def create_my_eq(kms, v_max, act, kac, kas, *_):
     """
     Mixed activation (irrev) equation
@@ -39,7 +59,9 @@ class MAparams(FitParam):
         self.add('kas', value=kas[0], min=kas[1], max=kas[2])
 
         self.param_order = ['kms', 'v_max', 'act', 'kac', 'kas']
+        self.modifier = 'act'
         self.units = ['c', 'r', 'c', 'c', 'c']
         self.fitf = my_fiteq
+        self.jacf = my_jacobian
         self.eq = create_my_eq
         self.name = 'Mixed activation (irrev)'
@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -16,6 +17,25 @@ def my_fiteq(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def my_jacobian(params, subs_c, *_):
+    """
+    Mixed inhibition (irr) equation derivatives (km, v_max, inh, kis, kic)
+    """
+    km = params['km'].value
+    v_max = params['v_max'].value
+    inh = params['inh'].value
+    kis = params['kis'].value
+    kic = params['kic'].value
+
+    denom = km * (1 + inh / kis) + subs_c * (1 + inh / kic)
+    numer = v_max * subs_c
+    return np.column_stack((-numer * (1 + inh / kis) / denom ** 2,
+                            subs_c / denom,
+                            -numer * (km / kis + subs_c / kic) / denom ** 2,
+                            numer * km * inh / kis ** 2 / denom ** 2,
+                            numer * subs_c * inh / kic ** 2 / denom ** 2))
+
+
 def create_my_eq(km, v_max, inh, kis, kic, *_):
     """
     Mixed inhibition (irr) equation
@@ -39,7 +59,9 @@ class MIparams(FitParam):
         self.add('kic', value=kic[0], min=kic[1], max=kic[2])
 
         self.param_order = ['km', 'v_max', 'inh', 'kis', 'kic']
+        self.modifier = 'inh'
         self.units = ['c', 'r', 'c', 'c', 'c']
         self.fitf = my_fiteq
+        self.jacf = my_jacobian
         self.eq = create_my_eq
         self.name = 'Mixed inhibition (irr)'
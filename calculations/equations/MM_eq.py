@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -13,6 +14,18 @@ def mm_function(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def mm_jacobian(params, subs_c, *_):
+    """
+    Michaelis–Menten equation derivatives (km, v_max)
+    """
+    km = params['km'].value
+    v_max = params['v_max'].value
+
+    denom = km + subs_c
+    return np.column_stack((-v_max * subs_c / denom ** 2,
+                            subs_c / denom))
+
+
 def create_mm(km, v_max, *_):
     """
     Create hills equation
@@ -33,5 +46,6 @@ class MMparams(FitParam):
         self.param_order = ['km', 'v_max']
         self.units = ['c', 'r']
         self.fitf = mm_function
+        self.jacf = mm_jacobian
         self.eq = create_mm
         self.name = 'Michaelis-Menten equation'
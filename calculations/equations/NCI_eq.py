@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -15,6 +16,23 @@ def my_fiteq(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def my_jacobian(params, subs_c, *_):
+    """
+    Noncompetitive inhibition (irr) equation derivatives (km, v_max, inh, ki)
+    """
+    km = params['km'].value
+    v_max = params['v_max'].value
+    inh = params['inh'].value
+    ki = params['ki'].value
+
+    inh_fac = 1 + inh / ki
+    rate_calc = v_max * subs_c / ((km + subs_c) * inh_fac)
+    return np.column_stack((-rate_calc / (km + subs_c),
+                            subs_c / ((km + subs_c) * inh_fac),
+                            -rate_calc / (ki + inh),
+                            rate_calc * inh / (ki * (ki + inh))))
+
+
 def create_my_eq(km, v_max, inh, ki, *_):
     """
     Noncompetitive inhibition (irr) equation
@@ -37,7 +55,9 @@ class NCIparams(FitParam):
         self.add('ki', value=ki[0], min=ki[1], max=ki[2])
 
         self.param_order = ['km', 'v_max', 'inh', 'ki']
+        self.modifier = 'inh'
         self.units = ['c', 'r', 'c', 'c']
         self.fitf = my_fiteq
+        self.jacf = my_jacobian
         self.eq = create_my_eq
         self.name = 'Noncompetitive inhibition (irr)'
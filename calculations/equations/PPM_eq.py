@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -15,6 +16,23 @@ def ppmsi_function(params, subsa, rate, subsb, *_):
     return rate_calc - rate
 
 
+def ppmsi_jacobian(params, subsa, rate, subsb, *_):
+    """
+    Ping pong mechanism (substrate inhibition) derivatives (v_max, kdb, kma, kmb)
+    """
+    v_max = params['v_max'].value
+    kdb = params['kdb'].value
+    kma = params['kma'].value
+    kmb = params['kmb'].value
+
+    denom = kmb * subsa + (kma * subsb) * (1 + (subsb / kdb)) + subsa * subsb
+    numer = v_max * subsb * subsa
+    return np.column_stack((subsb * subsa / denom,
+                            numer * kma * subsb ** 2 / kdb ** 2 / denom ** 2,
+                            -numer * subsb * (1 + (subsb / kdb)) / denom ** 2,
+                            -numer * subsa / denom ** 2))
+
+
 def create_ppmsi(v_max, kdb, kma, kmb, *_):
     """
     Create Ping pong mechanism equation
@@ -36,6 +54,7 @@ class PPMSIparams(FitParam):
         self.add('kma', value=kma[0], min=kma[1], max=kma[2])
         self.add('kmb', value=kmb[0], min=kmb[1], max=kmb[2])
         self.fitf = ppmsi_function
+        self.jacf = ppmsi_jacobian
         self.eq = create_ppmsi
         self.name = 'Ping-pong (substrate inhibition)'
         self.param_order = ['v_max', 'kdb', 'kma', 'kmb']
@@ -53,6 +72,21 @@ def ppm_function(params, subsa, rate, subsb, *_):
     return rate_calc - rate
 
 
+def ppm_jacobian(params, subsa, rate, subsb, *_):
+    """
+    Ping pong mechanism derivatives (v_max, kma, kmb)
+    """
+    v_max = params['v_max'].value
+    kma = params['kma'].value
+    kmb = params['kmb'].value
+
+    denom = kmb * subsa + (kma * subsb) + subsa * subsb
+    numer = v_max * subsb * subsa
+    return np.column_stack((subsb * subsa / denom,
+                            -numer * subsb / denom ** 2,
+                            -numer * subsa / denom ** 2))
+
+
 def create_ppm(v_max, kma, kmb, *_):
     """
     Create Ping pong mechanism equation
@@ -73,6 +107,7 @@ class PPMparams(FitParam):
         self.add('kma', value=kma[0], min=kma[1], max=kma[2])
         self.add('kmb', value=kmb[0], min=kmb[1], max=kmb[2])
         self.fitf = ppm_function
+        self.jacf = ppm_jacobian
         self.eq = create_ppm
         self.name = 'Ping-pong mechanism'
         self.param_order = ['v_max', 'kma', 'kmb']
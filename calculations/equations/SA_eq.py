@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -15,6 +16,23 @@ def my_fiteq(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def my_jacobian(params, subs_c, *_):
+    """
+    Specific activation (irrev) equation derivatives (kms, v_max, ka, act)
+    """
+    kms = params['kms'].value
+    v_max = params['v_max'].value
+    ka = params['ka'].value
+    act = params['act'].value
+
+    denom = kms * ka + (kms + subs_c) * act
+    numer = v_max * subs_c * act
+    return np.column_stack((-numer * (ka + act) / denom ** 2,
+                            subs_c * act / denom,
+                            -numer * kms / denom ** 2,
+                            v_max * subs_c / denom - numer * (kms + subs_c) / denom ** 2))
+
+
 def create_my_eq(kms, v_max, ka, act, *_):
     """
     Mixed inhibition (irr) equation
@@ -37,7 +55,9 @@ class SAparams(FitParam):
         self.add('act', value=act[0], min=act[1], max=act[2])
 
         self.param_order = ['kms', 'v_max', 'ka', 'act']
+        self.modifier = 'act'
         self.fitf = my_fiteq
+        self.jacf = my_jacobian
         self.eq = create_my_eq
         self.name = 'Specific activation (irrev)'
         self.units = ['c', 'r', 'c', 'c']
\ No newline at end of file
@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -14,6 +15,21 @@ def my_fiteq(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def my_jacobian(params, subs_c, *_):
+    """
+    Substrate activation (irr) equation derivatives (ksa, v_max, ksc)
+    """
+    ksa = params['ksa'].value
+    v_max = params['v_max'].value
+    ksc = params['ksc'].value
+
+    ratio = subs_c / ksa
+    denom = 1 + subs_c / ksc + ratio + ratio ** 2
+    return np.column_stack((-v_max * ratio ** 2 * (2 + 2 * subs_c / ksc + ratio) / (ksa * denom ** 2),
+                            ratio ** 2 / denom,
+                            v_max * ratio ** 2 * subs_c / (ksc ** 2 * denom ** 2)))
+
+
 def create_my_eq(ksa, v_max, ksc, *_):
     """
     Substrate activation (irr) equation
@@ -36,6 +52,7 @@ class SUAparams(FitParam):
 
         self.param_order = ['ksa', 'v_max', 'ksc']
         self.fitf = my_fiteq
+        self.jacf = my_jacobian
         self.eq = create_my_eq
         self.name = 'Substrate activation (irr)'
         self.units = ['c', 'r', 'c']
\ No newline at end of file
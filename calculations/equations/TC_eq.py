@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 
@@ -15,6 +16,23 @@ def tc_function(params, subsa, rate, subsb, *_):
     return rate_calc - rate
 
 
+def tc_jacobian(params, subsa, rate, subsb, *_):
+    """
+    Ternary complex mechanism derivatives (v_max, kda, kma, kmb)
+    """
+    v_max = params['v_max'].value
+    kda = params['kda'].value
+    kma = params['kma'].value
+    kmb = params['kmb'].value
+
+    denom = kda * kmb + kmb * subsa + kma * subsb + subsb * subsa
+    numer = v_max * subsb * subsa
+    return np.column_stack((subsb * subsa / denom,
+                            -numer * kmb / denom ** 2,
+                            -numer * subsb / denom ** 2,
+                            -numer * (kda + subsa) / denom ** 2))
+
+
 def create_tc(v_max, kda, kma, kmb, *_):
     """
     Ternary complex mechanism equation
@@ -36,6 +54,7 @@ class TCparams(FitParam):
         self.add('kma', value=kma[0], min=kma[1], max=kma[2])
         self.add('kmb', value=kmb[0], min=kmb[1], max=kmb[2])
         self.fitf = tc_function
+        self.jacf = tc_jacobian
         self.eq = create_tc
         self.name = 'Ternary complex'
         self.param_order = ['v_max', 'kda', 'kma', 'kmb']
@@ -55,6 +74,25 @@ def tcsi_function(params, subsa, rate, subsb, *_):
     return rate_calc - rate
 
 
+def tcsi_jacobian(params, subsa, rate, subsb, *_):
+    """
+    Substrate inhibited ternary complex mechanism derivatives (v_max, kma, kmb, kda, ksib)
+    """
+    v_max = params['v_max'].value
+    kma = params['kma'].value
+    kmb = params['kmb'].value
+    kda = params['kda'].value
+    ksib = params['ksib'].value
+
+    denom = kda * kmb + kmb * subsa + kma * subsb + subsa * subsb * (1 + (subsb / ksib))
+    numer = v_max * subsb * subsa
+    return np.column_stack((subsb * subsa / denom,
+                            -numer * subsb / denom ** 2,
+                            -numer * (kda + subsa) / denom ** 2,
+                            -numer * kmb / denom ** 2,
+                            numer * subsa * subsb ** 2 / ksib ** 2 / denom ** 2))
+
+
 def create_tcsi(v_max, kma, kmb, kda, ksib, *_):
     """
     Substrate inhibited ternary complex equation
@@ -77,6 +115,7 @@ class TCSIparams(FitParam):
         self.add('kda', value=kda[0], min=kda[1], max=kda[2])
         self.add('ksib', value=ksib[0], min=ksib[1], max=ksib[2])
         self.fitf = tcsi_function
+        self.jacf = tcsi_jacobian
         self.eq = create_tcsi
         self.name = 'Ternary complex (substrate inhibition)'
         self.param_order = ['v_max', 'kma', 'kmb', 'kda', 'ksib']
@@ -1,4 +1,5 @@
 import lmfit
+import numpy as np
 from calculations.equations import FitParam
 
 def my_fiteq(params, subs_c, rate, *_):
@@ -14,6 +15,23 @@ def my_fiteq(params, subs_c, rate, *_):
     return rate_calc - rate
 
 
+def my_jacobian(params, subs_c, *_):
+    """
+    Uncompetitive inhibition (irr) equation derivatives (km, v_max, inh, ki)
+    """
+    km = params['km'].value
+    v_max = params['v_max'].value
+    inh = params['inh'].value
+    ki = params['ki'].value
+
+    denom = km + subs_c * (1 + inh / ki)
+    numer = v_max * subs_c
+    return np.column_stack((-numer / denom ** 2,
+                            subs_c / denom,
+                            -numer * subs_c / ki / denom ** 2,
+                            numer * subs_c * inh / ki ** 2 / denom ** 2))
+
+
 def create_my_eq(km, v_max, inh, ki, *_):
     """
     Uncompetitive inhibition (irr) equation
@@ -36,7 +54,9 @@ class UCIparams(FitParam):
         self.add('ki', value=ki[0], min=ki[1], max=ki[2])
 
         self.param_order = ['km', 'v_max', 'inh', 'ki']
+        self.modifier = 'inh'
         self.units = ['c', 'r', 'c', 'c']
         self.fitf = my_fiteq
+        self.jacf = my_jacobian
         self.eq = create_my_eq
         self.name = 'Uncompetitive inhibition (irr)'
@@ -1,10 +1,84 @@
 import lmfit
+import numpy as np
+from functools import partial
+
+
+def rebuild_fitparam(param_class, settings, initializations=0, modifier_data=False):
+    """
+    Recreates parameter object from its class and (name, value, min, max, vary) settings
+    """
+    params = param_class()
+    for name, value, min_val, max_val, vary in settings:
+        params[name].set(min=min_val, max=max_val, vary=vary)
+        params[name].set(value=value)
+    params.initializations = initializations
+    if modifier_data:
+        params.use_modifier_data()
+    return params
+
+
+class ParamValue(object):
+    """
+    Parameter value as read by fit functions (value may be an array)
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+def modifier_view(params, name, modifier):
+    """
+    Returns parameter values with modifier parameter replaced by concentration of every point
+    """
+    view = {par: ParamValue(params[par].value) for par in params}
+    view[name] = ParamValue(np.asarray(modifier, dtype=float))
+    return view
+
+
+def modifier_residuals(fitf, name, params, subs_c, rate, modifier, *_):
+    """
+    Residuals of fit function with modifier concentrations taken from data
+    """
+    return fitf(modifier_view(params, name, modifier), subs_c, rate)
+
+
+def modifier_jacobian(jacf, name, params, subs_c, rate, modifier, *_):
+    """
+    Jacobian of fit function with modifier concentrations taken from data
+    (column of the modifier parameter is dropped by varying_jacobian, it is fixed)
+    """
+    return jacf(modifier_view(params, name, modifier), subs_c)
+
+
+def modifier_equation(eq, position, *values):
+    """
+    Returns equation of (substrate, modifier) concentrations, value at position is replaced by modifier
+    """
+    def modifier_eq(subs_c, modifier):
+        point_values = list(values)
+        point_values[position] = np.asarray(modifier, dtype=float)
+        return eq(*point_values)(subs_c)
+    return modifier_eq
+
+
+def varying_jacobian(jacf, param_order, params, *fitpoints):
+    """
+    Analytic Jacobian reduced to columns of varying parameters (as lmfit expects)
+    """
+    jac = jacf(params, *fitpoints)
+    return jac[:, [param_order.index(par) for par in params if params[par].vary]]
 
 
 class FitParam(lmfit.Parameters):
     """
     Parent class for fit equations
     """
+    # name of inhibitor or activator concentration parameter (None if equation has none)
+    modifier = None
+    # modifier concentrations are the third column of fit points (see use_modifier_data)
+    modifier_data = False
+
     def __int__(self):
         lmfit.Parameters.__init__(self)
         self.initializations = 0
@@ -22,12 +96,80 @@ class FitParam(lmfit.Parameters):
         for param, nu in zip(self.param_order, range(6)):
             self[param].set(value=new_vals[nu][0], min=new_vals[nu][1], max=new_vals[nu][2])
 
+    def use_modifier_data(self):
+        """
+        Takes inhibitor or activator concentration from data (third column of fit points, one value
+        for every point) instead of fitting it. Modifier parameter is fixed, equation becomes
+        function of (substrate, modifier) concentrations. Returns self.
+        """
+        if self.modifier is None:
+            raise ValueError('{} has no inhibitor or activator concentration'.format(self.name))
+        if not self.modifier_data:
+            self[self.modifier].set(vary=False)
+            self.fitf = partial(modifier_residuals, self.fitf, self.modifier)
+            if getattr(self, 'jacf', None) is not None:
+                self.jacf = partial(modifier_jacobian, self.jacf, self.modifier)
+            self.eq = partial(modifier_equation, self.eq, self.param_order.index(self.modifier))
+            self.modifier_data = True
+        return self
+
     def get_solution(self, *fitpoints):
         """
         Uses lmfit to find optimal solution
         first point is concentration, followed by rate (and constant concentration)
         """
-        return lmfit.minimize(self.fitf, self, args=fitpoints)
+        jacf = getattr(self, 'jacf', None)
+        if jacf is None:
+            return lmfit.minimize(self.fitf, self, args=fitpoints)
+        return lmfit.minimize(self.fitf, self, args=fitpoints,
+                              Dfun=partial(varying_jacobian, jacf, self.param_order), col_deriv=False)
+
+    def get_values(self):
+        """
+        Returns array of current values (in param_order)
+        """
+        return np.array([self[par].value for par in self.param_order], dtype=float)
+
+    def population_residuals(self, pvals, subs_c, rate, *subs_b):
+        """
+        Returns (P, n_points) residuals for (P, n_params) array of parameter sets
+        (columns in param_order). Every set is evaluated in a single broadcast call.
+        """
+        pvals = np.atleast_2d(np.asarray(pvals, dtype=float))
+        if pvals.ndim != 2 or pvals.shape[1] != len(self.param_order):
+            raise ValueError('Expected array of shape (P, {})'.format(len(self.param_order)))
+        batch_eq = self.eq(*pvals.T[:, :, np.newaxis])
+        return batch_eq(np.asarray(subs_c, dtype=float), *subs_b) - np.asarray(rate, dtype=float)
+
+    def population_ssr(self, pvals, *fitpoints):
+        """
+        Returns sum of residuals squared for every parameter set in pvals
+        """
+        return (self.population_residuals(pvals, *fitpoints) ** 2).sum(axis=1)
+
+    def get_settings(self):
+        """
+        Returns (name, value, min, max, vary) for every parameter
+        """
+        return [(par, self[par].value, self[par].min, self[par].max, self[par].vary) for par in self.param_order]
+
+    def __reduce__(self):
+        """
+        Pickles only class and parameter settings, so objects can be sent to worker processes
+        """
+        return rebuild_fitparam, (self.__class__, self.get_settings(), getattr(self, 'initializations', 0),
+                                  self.modifier_data)
+
+    def __deepcopy__(self, memo):
+        """
+        Copies parameters (lmfit rebuilds the object from its class), modifier data mode and number
+        of restarts are kept
+        """
+        params = lmfit.Parameters.__deepcopy__(self, memo)
+        params.initializations = getattr(self, 'initializations', 0)
+        if self.modifier_data:
+            params.use_modifier_data()
+        return params
 
     def get_units(self, par, dat_obj):
         idx = self.param_order.index(par)
@@ -7,10 +7,9 @@ from qt_design.main_ui import *
 from qt_design.widget_windows import *
 
 import calculations
-import qt_design.reaction_plots as reaction_plots
+import calculations.ReactionPlots as reaction_plots
 from qt_design.calc_functions import *
 
-import pickle
 import sys
 import os
 
@@ -38,7 +37,7 @@ class DefaultWindow(Ui_MainWindow, DsMethods, SsMethods):
         Creates fitting and saves the results
         """
 
-        dlg = BatchRun(self.reaction_data)
+        dlg = BatchRun(self.reaction_data, self.fitresults)
         dlg.exec_()
 
     def load_data(self):
@@ -98,6 +97,7 @@ class DefaultWindow(Ui_MainWindow, DsMethods, SsMethods):
                 self.reaction_data = calculations.OneSubstrate(dlg.ProjectName.text().strip(),
                                                                cunit=dlg.ConcVal.text(),
                                                                tunit=dlg.TimeVal.text())
+            self.fitresults = calculations.ProjectFits()
 
             # enable new options
             self.LoadButton.setEnabled(True)
@@ -122,6 +122,7 @@ class DefaultWindow(Ui_MainWindow, DsMethods, SsMethods):
 
         MainWindow.setWindowTitle("ITEKA")
         self.fitparams = None
+        self.fitresults = None
         self.reaction_data = None
         self.project_name = None
         self.NewProButton.setEnabled(True)
@@ -257,25 +258,33 @@ class DefaultWindow(Ui_MainWindow, DsMethods, SsMethods):
 
     def load_from_file(self):
         """
-        Loads pickle file
+        Loads project file (or legacy pickle)
         """
         if self.reset_project() == -1:
             return
         dialog = QtGui.QFileDialog()
-        filename = QtGui.QFileDialog.getOpenFileName(dialog, 'Open File', os.getenv('HOME'), 'Pickle (*.pkl)')
+        filename = QtGui.QFileDialog.getOpenFileName(dialog, 'Open File', os.getenv('HOME'),
+                                                     'ITEKA project (*{});;Pickle (*.pkl)'.format(
+                                                         calculations.EXTENSION))
         if filename:
             self.reset_project()
-            self.reaction_data = pickle.load(open(filename, 'rb'))
+            # data are edited in the window, columns are read to memory
+            self.reaction_data = calculations.open_project(filename, mmap=False)
+            # stored fits are read when they are first needed
+            self.fitresults = calculations.ProjectFits(filename)
             self.post_load()
 
     def save_to_file(self):
         """
-        Saves data pickle
+        Saves project file (with fits made in this session or loaded with the project)
         """
         dialog = QtGui.QFileDialog()
-        filename = QtGui.QFileDialog.getSaveFileName(dialog, 'Save File', os.getenv('HOME'), 'Pickle (*.pkl)')
+        filename = QtGui.QFileDialog.getSaveFileName(dialog, 'Save File', os.getenv('HOME'),
+                                                     'ITEKA project (*{})'.format(calculations.EXTENSION))
         if filename:
-            pickle.dump(self.reaction_data, open(filename, 'wb'))
+            if not filename.endswith(calculations.EXTENSION):
+                filename += calculations.EXTENSION
+            calculations.save_project(self.reaction_data, filename, fits=self.fitresults.records)
 
     def save_to_excel(self):
         """
@@ -315,6 +324,10 @@ class DefaultWindow(Ui_MainWindow, DsMethods, SsMethods):
         Ui_MainWindow.__init__(self)
         self.setupUi(MainWindow)
 
+        # project files (legacy pickles are still opened)
+        self.actionSave_input_data.setText('Save project (*{})'.format(calculations.EXTENSION))
+        self.actionLoad_input_data.setText('Open project (*{}, *.pkl)'.format(calculations.EXTENSION))
+
         # data object inicialization
         self.reaction_data = None
         self.fitparams = None
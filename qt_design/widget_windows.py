@@ -11,11 +11,29 @@ from qt_design.twosubstr.preload2subs import *
 from qt_design.twosubstr.load_data_ds import *
 from qt_design.solutionexplorer import *
 from qt_design.batch import *
-import qt_design.reaction_plots as reaction_plots
+import calculations.ReactionPlots as reaction_plots
+import calculations.BatchFitting as batch_fitting
 import calculations
 import os
 
 
+# significant digits shown in spin boxes of parameter values and bounds
+SPINBOX_DIGITS = 4
+MAX_DECIMALS = 15
+
+
+def set_spinbox_value(spbox, value):
+    """
+    Sets value of double spin box, decimals are added to show SPINBOX_DIGITS significant digits
+    (spin boxes round to their decimals, so small estimates would become 0)
+    """
+    if np.isfinite(value) and value != 0:
+        decimals = SPINBOX_DIGITS - 1 - int(np.floor(np.log10(abs(value))))
+        spbox.setDecimals(min(MAX_DECIMALS, max(spbox.decimals(), decimals)))
+        spbox.setMaximum(max(spbox.maximum(), value))
+    spbox.setValue(value)
+
+
 class StartProject(QtGui.QDialog, Ui_start_dial):
     """
     Window for project setup
@@ -32,10 +50,12 @@ class FitSetup(QtGui.QDialog, Ui_FitSetup):
     """
     Project setup window
     """
-    def __init__(self, eq_params, parent=None):
+    def __init__(self, eq_params, parent=None, fitpoints=None):
         QtGui.QDialog.__init__(self, parent)
         self.setupUi(self)
         self.setWindowTitle("{} - fitting settings".format(eq_params.name))
+        self.eq_params = eq_params
+        self.fitpoints = fitpoints
         self.LBSet.stateChanged.connect(self.setinterface)
         self.UBSet.stateChanged.connect(self.setinterface)
         self.InclRand.stateChanged.connect(self.setinterface)
@@ -66,9 +86,8 @@ class FitSetup(QtGui.QDialog, Ui_FitSetup):
 
         for sboxes, param in zip(self.spboxes, parameters):
             param_vals = eq_params[param]
-            sboxes[0].setValue(param_vals.value)
-            sboxes[1].setValue(param_vals.min)
-            sboxes[2].setValue(param_vals.max)
+            for sbox, value in zip(sboxes, (param_vals.value, param_vals.min, param_vals.max)):
+                set_spinbox_value(sbox, value)
 
         # hide redundant
         for labels, spboxes, fixbox in zip(self.samelabels[n_params:], self.spboxes[n_params:], self.fixcbs[n_params:]):
@@ -89,6 +108,25 @@ class FitSetup(QtGui.QDialog, Ui_FitSetup):
         # inicialization setup
         self.InicN.setValue(eq_params.initializations)
 
+        # estimation from data (above dialog buttons)
+        if fitpoints is not None:
+            self.EstBut = QtGui.QPushButton('Estimate from data', self)
+            self.EstBut.clicked.connect(self.fill_estimates)
+            self.verticalLayout.insertWidget(self.verticalLayout.indexOf(self.buttonBox), self.EstBut)
+
+    def fill_estimates(self):
+        """
+        Sets starting values and bounds estimated from data (fixed parameters are kept)
+        """
+        estimates = calculations.estimate_params(self.eq_params, *self.fitpoints)
+        for sboxes, fixcb, param in zip(self.spboxes, self.fixcbs, self.eq_params.param_order):
+            if param in estimates and not fixcb.isChecked():
+                for sbox, value in zip(sboxes, estimates[param]):
+                    set_spinbox_value(sbox, value)
+        self.LBSet.setChecked(True)
+        self.UBSet.setChecked(True)
+        self.setinterface()
+
     def setinterface(self):
         """
         Redraws the window interface
@@ -303,9 +341,9 @@ class LoadDataDs(QtGui.QDialog, Ui_LoadDataDs):
 
 class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
     """
-    Class for exploring solutions
+    Class for exploring solutions (fits are reused from and saved to fits, ProjectFits of the project)
     """
-    def __init__(self, reacs, parent=None):
+    def __init__(self, reacs, fits=None, parent=None):
         QtGui.QDialog.__init__(self, parent)
         self.setupUi(self)
         self.setWindowTitle('Explore solutions')
@@ -331,6 +369,7 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
 
         # data setup
         self.alldata = reacs
+        self.fits = calculations.ProjectFits() if fits is None else fits
         if reacs.is_single():
             self.data = reacs
             self.SetCB.hide()
@@ -356,13 +395,7 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
         self.ulabs = [self.ulab1, self.ulab2, self.ulab3, self.ulab4, self.ulab5, self.ulab6]
 
         # formula setup
-        self.equations = [calculations.MMparams(), calculations.HEparams(), calculations.AInHparams(),
-                          calculations.CIparams(), calculations.MAparams(), calculations.NCIparams(),
-                          calculations.MIparams(), calculations.SAparams(), calculations.SUAparams(),
-                          calculations.UCIparams()]
-        if not self.alldata.is_single():
-            self.equations += [calculations.PPMparams(), calculations.PPMSIparams(),
-                               calculations.TCparams(), calculations.TCSIparams()]
+        self.equations = calculations.available_equations(self.alldata.is_single())
         self.equations_formulas = [i.eq for i in self.equations]
         self.EqSel.addItems([eqparams.name for eqparams in self.equations])
         self.set_equations = []
@@ -390,6 +423,18 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
         self.multi_cach = False
         self.LegendCB.clicked.connect(self.legend_display)
 
+        # bootstrap confidence intervals of last fit
+        self.ss_fit = None
+        self.BootBut = QtGui.QPushButton('Bootstrap confidence intervals', self)
+        self.BootBut.clicked.connect(self.bootstrap_fit)
+        self.CILab = QtGui.QLabel(self)
+        self.verticalLayout.addWidget(self.BootBut)
+        self.verticalLayout.addWidget(self.CILab)
+
+        # restarts spent by last fit (restarts stop early once fits agree on the minimum)
+        self.RestartLab = QtGui.QLabel(self)
+        self.verticalLayout.addWidget(self.RestartLab)
+
         # set up equation and make plot
         self.change_layout()
 
@@ -411,7 +456,7 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
         """
         n_params = range(len(self.equations[self.EqSel.currentIndex()].param_order))
         for parval, cbox, _ in zip(self.allvallabs, self.vals, n_params):
-            cbox.setValue(float(parval.text()))
+            set_spinbox_value(cbox, float(parval.text()))
         self.change_equation()
 
     def legend_display(self):
@@ -472,7 +517,11 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
         only changes fitting parameters(ds)
         """
         sel_eq = self.equations[self.EqSel.currentIndex()]
-        dlg = FitSetup(sel_eq)
+        if self.alldata.is_single():
+            fitpoints = self.data.get_allpoints()
+        else:
+            fitpoints = self.alldata.get_allpoints(False if self.SetCB.currentIndex() == 1 else True)
+        dlg = FitSetup(sel_eq, fitpoints=fitpoints)
 
         if dlg.exec_():
             if dlg.LBSet.isChecked() and dlg.UBSet.isChecked() and dlg.InclRand.isChecked():
@@ -504,20 +553,35 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
                 else:
                     param.set(vary=True)
 
+            # refits start from the new values, not from the last solution
+            fitted_data = self.data if self.alldata.is_single() else self.alldata
+            calculations.get_warm_starts().forget(fitted_data.uid, calculations.equation_key(sel_eq))
+
         if self.alldata.is_single():
             self.change_layout()
 
     def make_fit(self, sel_set):
+        """
+        Fits all sets (sel_set -1, stored fits of unchanged data are reused) or refits selected set
+        """
         sel_eq = self.equations[self.EqSel.currentIndex()]
 
         # SS fitting
         if self.alldata.is_single():
-            calc_res = calculations.find_fit(sel_eq,
-                                             sel_eq.initializations,
-                                             np.hstack(self.data.concentrations),
-                                             np.hstack(self.data.rates))
-            for par_id, spbox in zip(sel_eq.param_order, self.vals):
-                spbox.setValue(calc_res.params[par_id].value)
+            fitpoints = self.data.get_allpoints()
+            calc_res = self.fits.get(sel_eq, fitpoints)
+            if calc_res is None:
+                calc_res = calculations.find_fit(sel_eq,
+                                                 sel_eq.initializations,
+                                                 *fitpoints,
+                                                 workers=calculations.cpu_workers(),
+                                                 warm=calculations.warm_key(self.data, sel_eq))
+                self.fits.put(sel_eq, fitpoints, calc_res)
+            self.ss_fit = calc_res
+            self.CILab.clear()
+            self.show_restarts(sel_eq, [calc_res])
+            for value, spbox in zip(calc_res.values, self.vals):
+                set_spinbox_value(spbox, float(value))
 
         # DS fitting
         else:
@@ -525,13 +589,23 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
             # fit all
             if sel_set == -1:
                 self.EncCB.setCurrentIndex(0)
-                self.set_equations = [calculations.find_fit(sel_eq,
-                                      sel_eq.initializations, x, y, x2)
-                                      for x, y, x2 in self.alldata.get_points(a_isvar)]
+                set_fits = self.fits.get_sets(sel_eq, self.alldata, orientations=(a_isvar,))
+                if set_fits is None:
+                    set_fits = calculations.find_set_fits(sel_eq, sel_eq.initializations, self.alldata,
+                                                          orientations=(a_isvar,),
+                                                          workers=calculations.cpu_workers(),
+                                                          warm=True)
+                    self.fits.put_sets(sel_eq, self.alldata, set_fits)
+                self.set_equations = set_fits[a_isvar]
             # fit selected
             else:
                 x, y, x2 = list(self.alldata.get_points(a_isvar))[sel_set]
-                self.set_equations[sel_set] = calculations.find_fit(sel_eq, sel_eq.initializations, x, y, x2)
+                self.set_equations[sel_set] = calculations.find_fit(sel_eq, sel_eq.initializations, x, y, x2,
+                                                                    workers=calculations.cpu_workers(),
+                                                                    warm=calculations.warm_key(self.alldata, sel_eq,
+                                                                                               a_isvar, sel_set))
+                self.fits.put(sel_eq, (x, y, x2), self.set_equations[sel_set], a_isvar, sel_set)
+            self.show_restarts(sel_eq, self.set_equations if sel_set == -1 else [self.set_equations[sel_set]])
 
             self.make_plot(multiple=True)
 
@@ -540,6 +614,50 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
                 sel_set = 0 if sel_set < 0 else sel_set
                 self.show_best_fit(set_num=sel_set)
 
+    def show_restarts(self, sel_eq, fits):
+        """
+        Displays restarts done by fits out of restarts set for the equation
+        """
+        self.RestartLab.setText('Restarts done: {} of {}'.format(sum(fit.restarts for fit in fits),
+                                                                 sel_eq.initializations * len(fits)))
+
+    def bootstrap_fit(self):
+        """
+        Shows bootstrap confidence intervals of the last fit (of selected set for two substrates)
+        """
+        sel_eq = self.equations[self.EqSel.currentIndex()]
+        if self.alldata.is_single():
+            fit = self.ss_fit
+            fitpoints = self.data.get_allpoints()
+            groups = self.data.store.replicate_bounds()
+        elif self.set_equations and self.set_fit_widget.isVisible():
+            a_isvar = False if self.SetCB.currentIndex() == 1 else True
+            set_idx = self.setsel.currentIndex()
+            fit = self.set_equations[set_idx]
+            fitpoints = list(self.alldata.get_points(a_isvar))[set_idx]
+            groups = self.alldata.stores[a_isvar].replicate_bounds(set_idx)
+        else:
+            fit = None
+        if fit is None:
+            WarningMessage("Fit the data first")
+            return
+        self.BootBut.setEnabled(False)
+        try:
+            intervals = calculations.bootstrap_intervals(sel_eq, fit, fitpoints, groups=groups,
+                                                         workers=calculations.cpu_workers(),
+                                                         progress=self.show_bootstrap_progress)
+        finally:
+            self.BootBut.setEnabled(True)
+            self.setWindowTitle('Explore solutions')
+        self.CILab.setText(calculations.format_intervals(intervals))
+
+    def show_bootstrap_progress(self, done, total):
+        """
+        Displays bootstrap progress and keeps window responsive
+        """
+        self.setWindowTitle('Explore solutions - bootstrap {}/{} samples'.format(done, total))
+        QtGui.QApplication.processEvents()
+
     def show_best_fit(self, set_num=0):
         """
         Disaplys new fit resuls
@@ -550,20 +668,23 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
             Update fit label display
             """
             set_idx = self.setsel.currentIndex()
-            fit_par_fun = self.set_equations[set_idx].params
-            for dislab, vallab, fitparam in zip(self.allfitlabs, self.allvallabs, fit_par_fun):
+            set_fit = self.set_equations[set_idx]
+            for dislab, vallab, fitparam, value in zip(self.allfitlabs, self.allvallabs, set_fit.param_order,
+                                                       set_fit.values):
                 dislab.setVisible(True)
                 vallab.setVisible(True)
                 dislab.setText(fitparam)
-                vallab.setText('{0:.5f}'.format(fit_par_fun[fitparam].value))
+                vallab.setText('{0:.6g}'.format(value))
 
             # hide redundant
-            for dislab, vallab in zip(self.allfitlabs[len(fit_par_fun):], self.allvallabs[len(fit_par_fun):]):
+            n_params = len(set_fit.values)
+            for dislab, vallab in zip(self.allfitlabs[n_params:], self.allvallabs[n_params:]):
                 dislab.setVisible(False)
                 vallab.setVisible(False)
 
         def change_fitview():
             self.EncCB.setCurrentIndex(self.setsel.currentIndex() + 1)
+            self.CILab.clear()
             fit_display_update()
 
         self.set_fit_widget.setVisible(True)
@@ -581,7 +702,7 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
         Calculate and change sum of residuals
         """
         group_index = True if self.SetCB.currentIndex() == 0 else False
-        eqs = [fit.function for fit in self.set_equations]
+        eqs = self.set_equations
         sem_sum = 0.
         for seta, setb, setr, equation in zip(self.alldata.AllVar[group_index],
                                               self.alldata.AllConst[group_index],
@@ -611,6 +732,8 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
         eq_idx = self.EqSel.currentIndex()
         sel_eq = self.equations[eq_idx]
         params = sel_eq.param_order
+        self.ss_fit = None
+        self.CILab.clear()
         # show
         for label, spbox, slider, line, param, ulab in zip(self.labs[:len(params)],
                                                            self.vals[:len(params)],
@@ -624,7 +747,7 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
             ulab.show()
             spbox.show()
             if self.alldata.is_single():
-                spbox.setValue(sel_eq[param].value)
+                set_spinbox_value(spbox, sel_eq[param].value)
             line.show()
             slider.show()
 
@@ -712,10 +835,10 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
             # plot when finding fits
             if multiple:
                 reaction_plots.plot_dsegraph(self.alldata, self.axes, signal=self.PlotCB.currentIndex(),
-                                             equations=[eq.function for eq in self.set_equations],
+                                             equations=self.set_equations,
                                              a_isvar=a_isvar, legend=legend, pick=self.EncCB.currentIndex() - 1,
                                              errors=ebars)
-                reaction_plots.plot_res(self.alldata, self.axes2, equations=[eq.function for eq in self.set_equations],
+                reaction_plots.plot_res(self.alldata, self.axes2, equations=self.set_equations,
                                         a_isvar=a_isvar, pick=self.EncCB.currentIndex() - 1)
             # plot when adusting values
             else:
@@ -727,25 +850,12 @@ class ExploreSolutions(QtGui.QDialog, Ui_SolutionExplorer):
         self.canvas.draw()
 
 
-def make_file_path(path_list, filename=None):
-    """
-    Creates a path for your file and returns ful path
-    """
-    fullpath = os.path.join(*path_list)
-    if not os.path.exists(fullpath):
-        os.makedirs(fullpath)
-    if filename is not None:
-        return os.path.join(fullpath, filename)
-    else:
-        return fullpath
-
-
-def adjustvals(sel_eq):
+def adjustvals(sel_eq, fitpoints=None):
     """
     Set values for batch run
     """
     def make_change():
-        dlg = FitSetup(sel_eq)
+        dlg = FitSetup(sel_eq, fitpoints=fitpoints)
         if dlg.exec_():
             if dlg.LBSet.isChecked() and dlg.UBSet.isChecked() and dlg.InclRand.isChecked():
                 sel_eq.initializations = dlg.InicN.value()
@@ -781,9 +891,9 @@ def adjustvals(sel_eq):
 
 class BatchRun(QtGui.QDialog, Ui_BatchDialog):
     """
-    Window for fast multiple fitting
+    Window for fast multiple fitting (fits are reused from and saved to fits, ProjectFits of the project)
     """
-    def __init__(self, in_data, parent=None):
+    def __init__(self, in_data, fits=None, parent=None):
         QtGui.QDialog.__init__(self, parent)
         self.setupUi(self)
         self.setWindowTitle('Multiple equation fit')
@@ -795,14 +905,9 @@ class BatchRun(QtGui.QDialog, Ui_BatchDialog):
         self.PathLabel.setText(self.savepath)
 
         self.alldata = in_data
+        self.fits = fits
 
-        self.equations = [calculations.MMparams(), calculations.HEparams(), calculations.AInHparams(),
-                          calculations.CIparams(), calculations.MAparams(), calculations.NCIparams(),
-                          calculations.MIparams(), calculations.SAparams(), calculations.SUAparams(),
-                          calculations.UCIparams()]
-        if not self.alldata.is_single():
-            self.equations += [calculations.PPMparams(), calculations.PPMSIparams(),
-                               calculations.TCparams(), calculations.TCSIparams()]
+        self.equations = calculations.available_equations(self.alldata.is_single())
 
         self.optbut = []
         self.optcb = []
@@ -810,8 +915,14 @@ class BatchRun(QtGui.QDialog, Ui_BatchDialog):
         for equa in self.equations:
             self.add_options(equa)
 
+        # seeding of richer equations from simpler ones nested in them
+        self.NestedCB = QtGui.QCheckBox('Start richer equations from fits of simpler ones', self)
+        self.NestedCB.setChecked(False)
+        self.horizontalLayout_3.insertWidget(0, self.NestedCB)
+
         # button conections
-        self.changes = [adjustvals(eq_fit) for eq_fit in self.equations]
+        fitpoints = self.alldata.get_allpoints() if self.alldata.is_single() else self.alldata.get_allpoints(True)
+        self.changes = [adjustvals(eq_fit, fitpoints) for eq_fit in self.equations]
         for button, change in zip(self.optbut, self.changes):
             button.clicked.connect(change)
         self.CalcBut.clicked.connect(self.run_analysis)
@@ -846,64 +957,12 @@ class BatchRun(QtGui.QDialog, Ui_BatchDialog):
             self.savepath = temp_path
             self.PathLabel.setText(self.savepath)
 
-    def create_valid_folder(self, path):
-        """
-        Creates returns directory to save results to
-        """
-        savepath_r = os.path.join(path, self.alldata.name)
-        savepath = savepath_r
-
-        n = 0
-        while os.path.exists(savepath):
-            n += 1
-            savepath = savepath_r + '_' + str(n)
-        os.mkdir(savepath)
-        return savepath
-
-    def make_ss_outpust(self, savefolder, sel_eq):
-        """
-        Creates outputs for single substrate
-        """
-        # calculate parameters
-        calc_result = calculations.find_fit(sel_eq,
-                                            sel_eq.initializations,
-                                            np.hstack(self.alldata.concentrations),
-                                            np.hstack(self.alldata.rates))
-        plotfolder = make_file_path([savefolder, sel_eq.name])
-
-        # make fit plots
-        reaction_plots.plotoutput(self.alldata, plotfolder, plot_fun=calc_result.function)
-
-        # make residuals plot
-        reaction_plots.resi_to_file(self.alldata, plotfolder, equation=calc_result.function)
-
-        # make excel report
-        xls_file = make_file_path([plotfolder], '{} fit report.xlsx'.format(sel_eq.name))
-        calculations.fit_to_xls(self.alldata, calc_result, xls_file)
-
-    def make_ds_output(self, savefolder, sel_eq):
+    def show_progress(self, done, total, name):
         """
-        Creates outputs for double substrate
+        Displays batch progress and keeps window responsive
         """
-        plotfolder = make_file_path([savefolder, sel_eq.name])
-
-        # make fits
-        sub_a_fits = [calculations.find_fit(sel_eq,
-                      sel_eq.initializations, x, y, x2)
-                      for x, y, x2 in self.alldata.get_points(True)]
-        sub_b_fits = [calculations.find_fit(sel_eq,
-                      sel_eq.initializations, x, y, x2)
-                      for x, y, x2 in self.alldata.get_points(False)]
-        fits = {True: sub_a_fits, False: sub_b_fits}
-
-        # write xls
-        xls_file = make_file_path([plotfolder], '{} fit report.xlsx'.format(sel_eq.name))
-        calculations.fit_to_xls(self.alldata, fits, xls_file)
-
-        # make fit plots
-        plotfolder = make_file_path([savefolder, sel_eq.name])
-        reaction_plots.plotoutput(self.alldata, plotfolder, plot_fun=fits)
-        reaction_plots.resi_to_file(self.alldata, plotfolder, equations=fits)
+        self.setWindowTitle('Multiple equation fit - {} done ({}/{})'.format(name, done, total))
+        QtGui.QApplication.processEvents()
 
     def run_analysis(self):
 
@@ -911,17 +970,12 @@ class BatchRun(QtGui.QDialog, Ui_BatchDialog):
         if not self.savepath:
             WarningMessage(message="Please specify save folder")
             return
-        savefolder = self.create_valid_folder(self.savepath)
-
-        raw_data_xls = make_file_path([savefolder], 'input_data.xlsx')
-        calculations.data_to_xls(self.alldata, raw_data_xls)
-
-        for cbox, parameter in zip(self.optcb, self.equations):
-            if cbox.isChecked():
-                if self.alldata.is_single():
-                    self.make_ss_outpust(savefolder, parameter)
-                else:
-                    self.make_ds_output(savefolder, parameter)
+        equations = [parameter for cbox, parameter in zip(self.optcb, self.equations) if cbox.isChecked()]
+        savefolder = batch_fitting.run_analysis(self.alldata, self.savepath, equations,
+                                                workers=calculations.cpu_workers(),
+                                                nested=self.NestedCB.isChecked(),
+                                                progress=self.show_progress, stored=self.fits)
+        self.setWindowTitle('Multiple equation fit')
         WarningMessage(message="Results have been saved to {}".format(savefolder))
 
 
@@ -1053,9 +1107,7 @@ class PointsView(QtGui.QDialog, Ui_PointsView):
         if self.reac_data.is_single():
             if self.reac_data.replicates > 0:
                 posit = self.RepBox.currentIndex()
-                self.reac_data.rates.pop(posit)
-                self.reac_data.concentrations.pop(posit)
-                self.reac_data.replicates -= 1
+                self.reac_data.remove_replicate(posit)
                 self.qbox_level3()
             else:
                 WarningMessage("No points to delete")
@@ -1065,11 +1117,5 @@ class PointsView(QtGui.QDialog, Ui_PointsView):
             set_pos = self.SetBox.currentIndex()
             rep_pos = self.RepBox.currentIndex()
 
-            self.reac_data.AllVar[subs_sel][set_pos].pop(rep_pos)
-            self.reac_data.AllRates[subs_sel][set_pos].pop(rep_pos)
-            self.reac_data.AllConst[subs_sel][set_pos].pop(rep_pos)
-            if not self.reac_data.AllVar[subs_sel][set_pos]:
-                self.reac_data.AllVar[subs_sel].pop(set_pos)
-                self.reac_data.AllRates[subs_sel].pop(set_pos)
-                self.reac_data.AllConst[subs_sel].pop(set_pos)
+            self.reac_data.remove_rep(subs_sel, set_pos, rep_pos)
             self.qbox_level1()
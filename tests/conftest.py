@@ -0,0 +1,57 @@
+"""
+Data shared by tests (fixtures)
+"""
+import os
+
+import numpy as np
+import pytest
+
+from calculations import ModifierSeries, open_project
+
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_data')
+
+# simulated competitive inhibition: constants and inhibitor concentrations of sets
+CI_CONSTANTS = {'km': 1.5, 'v_max': 2.0, 'ki': 0.8, 'levels': (0., 1., 3., 9.)}
+
+
+@pytest.fixture
+def mm_points():
+    """
+    Michaelis-Menten rates (km 1.5, v_max 2.0) of three replicates with noise
+    """
+    rng = np.random.RandomState(0)
+    subs = np.tile([0.25, 0.5, 1., 2., 4., 8.], 3)
+    rate = 2.0 * subs / (1.5 + subs) + 0.02 * rng.standard_normal(len(subs))
+    return subs, rate
+
+
+@pytest.fixture
+def ci_constants():
+    return dict(CI_CONSTANTS)
+
+
+@pytest.fixture
+def ci_series():
+    """
+    ModifierSeries of competitive inhibition (CI_CONSTANTS), two replicates at every inhibitor concentration
+    """
+    rng = np.random.RandomState(0)
+    series = ModifierSeries('ci test')
+    subs = np.array([0.25, 0.5, 1., 2., 4., 8.])
+    km, v_max, ki = CI_CONSTANTS['km'], CI_CONSTANTS['v_max'], CI_CONSTANTS['ki']
+    for level in CI_CONSTANTS['levels']:
+        for _ in range(2):
+            rate = v_max * subs / (km + subs + km * level / ki) + 0.01 * rng.standard_normal(len(subs))
+            series.add_replicate(subs, rate, level, transform=False)
+    return series
+
+
+@pytest.fixture
+def single_substrate():
+    return open_project(os.path.join(SAMPLE_DIR, 'single_s_sample.pkl'))
+
+
+@pytest.fixture(scope='module')
+def two_substrates():
+    return open_project(os.path.join(SAMPLE_DIR, 'double_s_sample.pkl'))
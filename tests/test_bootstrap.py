@@ -0,0 +1,34 @@
+"""
+Bootstrap resampling of fitted parameters
+"""
+import numpy as np
+
+from calculations import MMparams, bootstrap_intervals, bootstrap_samples, find_fit
+
+
+def test_intervals_contain_estimates(mm_points):
+    params = MMparams()
+    fit = find_fit(params, 0, *mm_points, cache=False)
+    intervals = bootstrap_intervals(params, fit, mm_points, n_samples=100, seed=1)
+    for par, (low, high) in intervals.items():
+        assert low <= fit.params[par].value <= high
+
+
+def test_fixed_parameters_stay_fixed(mm_points):
+    fixed = MMparams()
+    fixed['v_max'].set(value=2.0, vary=False)
+    fit = find_fit(fixed, 0, *mm_points, cache=False)
+    # equation passed to bootstrap still varies v_max, fixed parameters are taken from the fit
+    samples = bootstrap_samples(MMparams(), fit, mm_points, n_samples=20, seed=1)
+    assert np.all(samples[:, 1] == 2.0)
+    assert np.ptp(samples[:, 0]) > 0
+
+
+def test_progress_is_reported(mm_points):
+    params = MMparams()
+    fit = find_fit(params, 0, *mm_points, cache=False)
+    reported = []
+    samples = bootstrap_samples(params, fit, mm_points, n_samples=30, seed=1, chunk_size=10,
+                                progress=lambda done, total: reported.append((done, total)))
+    assert reported == [(10, 30), (20, 30), (30, 30)]
+    np.testing.assert_array_equal(samples, bootstrap_samples(params, fit, mm_points, n_samples=30, seed=1))
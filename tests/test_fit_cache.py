@@ -0,0 +1,23 @@
+"""
+Fit results kept in memory and in a cache folder
+"""
+import os
+
+from calculations import FitCache
+
+
+def test_results_are_shared_through_folder(tmp_path):
+    cache = FitCache(path=str(tmp_path))
+    cache.put('key', {'values': [1., 2.]})
+    assert FitCache(path=str(tmp_path)).get('key') == {'values': [1., 2.]}
+    assert FitCache(path=str(tmp_path)).get('other') is None
+
+
+def test_clear_keeps_other_files(tmp_path):
+    project = tmp_path / 'project.pkl'
+    project.write_bytes(b'project')
+    cache = FitCache(path=str(tmp_path))
+    cache.put('key', 1)
+    cache.clear()
+    assert cache.get('key') is None
+    assert os.listdir(str(tmp_path)) == ['project.pkl']
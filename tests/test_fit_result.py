@@ -0,0 +1,55 @@
+"""
+Fit results (FitResult) sent to other processes and rebuilt from their arrays
+"""
+import pickle
+
+import numpy as np
+import pytest
+
+from calculations import CIparams, FitResult, MMparams, find_fit, find_modifier_fit, fit_result
+
+
+def test_pickled_fit_evaluates_same_values(mm_points):
+    fit = find_fit(MMparams(), 0, *mm_points, cache=False)
+    rates = fit(mm_points[0])
+    copy = pickle.loads(pickle.dumps(fit))
+    np.testing.assert_array_equal(copy(mm_points[0]), rates)
+    np.testing.assert_array_equal(copy.residual, fit.residual)
+    assert copy.chisqr == fit.chisqr
+    for par in fit.param_order:
+        assert copy.params[par].value == fit.params[par].value
+        assert copy.params[par].stderr == fit.params[par].stderr
+
+
+def test_rebuilt_objects_are_not_pickled(mm_points):
+    fit = find_fit(MMparams(), 0, *mm_points, cache=False)
+    fit(np.array([1.]))
+    assert fit._params is not None and fit._function is not None
+    state = fit.__getstate__()
+    assert not set(FitResult.cached) & set(state)
+    copy = pickle.loads(pickle.dumps(fit))
+    assert copy._params is None and copy._function is None
+
+
+def test_pickled_modifier_fit_keeps_modifier_data(ci_series):
+    fit = find_modifier_fit(CIparams(), 0, ci_series, cache=False)
+    subs_c, rate, modifier = ci_series.get_allpoints()
+    copy = pickle.loads(pickle.dumps(fit))
+    assert copy.modifier_data
+    # equation takes (substrate, modifier) concentrations, residuals are predicted - measured rates
+    np.testing.assert_allclose(copy(subs_c, modifier) - rate, fit.residual)
+    with pytest.raises(TypeError):
+        copy(subs_c, rate, modifier)
+    assert copy.level_deviations == fit.level_deviations
+
+
+def test_lmfit_solution_is_converted(mm_points):
+    params = MMparams()
+    solution = params.get_solution(*mm_points)
+    fit = fit_result(solution)
+    assert fit_result(fit) is fit
+    np.testing.assert_array_equal(fit.values, [solution.params[par].value for par in params.param_order])
+    assert fit.nvarys == solution.nvarys
+    np.testing.assert_allclose(fit.chisqr, solution.chisqr)
+    with pytest.raises(AttributeError):
+        fit.unknown = 1
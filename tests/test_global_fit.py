@@ -0,0 +1,27 @@
+"""
+Global fit of two substrate equations to all sets of both orientations
+"""
+import numpy as np
+import pytest
+
+from calculations import PPMparams, find_global_fit, find_set_fits
+
+
+def test_set_deviations_cover_all_points(two_substrates):
+    fit = find_global_fit(PPMparams(), 0, two_substrates, cache=False)
+    n_sets = [len(two_substrates.AllVar[a_var]) for a_var in (True, False)]
+    assert len(fit.set_deviations) == sum(n_sets)
+    assert [dev['orientation'] for dev in fit.set_deviations] == \
+        [two_substrates.nameA] * n_sets[0] + [two_substrates.nameB] * n_sets[1]
+    assert sum(dev['points'] for dev in fit.set_deviations) == len(fit.residual)
+    residual_sum = sum(dev['points'] * dev['mean residual'] for dev in fit.set_deviations)
+    assert residual_sum == pytest.approx(np.sum(fit.residual), abs=1e-12)
+
+
+def test_one_parameter_set_for_all_sets(two_substrates):
+    params = PPMparams()
+    fit = find_global_fit(params, 0, two_substrates, cache=False)
+    set_fits = find_set_fits(params, 0, two_substrates, cache=False)
+    assert fit.nvarys == len(params.param_order)
+    # separate fits of every set can not be worse than one shared fit
+    assert sum(set_fit.chisqr for a_var in set_fits for set_fit in set_fits[a_var]) <= fit.chisqr
@@ -0,0 +1,67 @@
+"""
+Analytic Jacobians of all equations against central differences of their fit functions
+"""
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from calculations import available_equations, equation_key
+
+
+EQUATIONS = {equation_key(equa): equa for equa in available_equations(False)}
+MODIFIER_EQUATIONS = [key for key, equa in sorted(EQUATIONS.items()) if equa.modifier is not None]
+
+SUBS_A = np.array([0.1, 0.3, 1., 3., 10.])
+SUBS_B = np.array([0.2, 0.5, 2., 0.7, 5.])
+MODIFIER = np.array([0., 0.5, 1., 2., 4.])
+
+
+def parameter_points(param_object, n_points=3, seed=0):
+    """
+    Yields copies of equation with values drawn between 0.5 and 3 (bounds are opened)
+    """
+    rng = np.random.RandomState(seed)
+    for _ in range(n_points):
+        params = deepcopy(param_object)
+        for par in params.param_order:
+            params[par].set(min=-np.inf, max=np.inf)
+            params[par].set(value=rng.uniform(0.5, 3.))
+        yield params
+
+
+def numeric_jacobian(params, fitpoints, step=1e-6):
+    """
+    Returns central differences of fit function by every parameter (columns in param_order)
+    """
+    columns = []
+    for par in params.param_order:
+        value = params[par].value
+        delta = step * max(abs(value), 1.)
+        params[par].set(value=value + delta)
+        upper = params.fitf(params, *fitpoints)
+        params[par].set(value=value - delta)
+        lower = params.fitf(params, *fitpoints)
+        params[par].set(value=value)
+        columns.append((upper - lower) / (2 * delta))
+    return np.column_stack(columns)
+
+
+@pytest.mark.parametrize('key', sorted(EQUATIONS))
+def test_jacobian_matches_differences(key):
+    rate = np.zeros(len(SUBS_A))
+    for params in parameter_points(EQUATIONS[key]):
+        fitpoints = (SUBS_A, rate, SUBS_B)
+        analytic = params.jacf(params, *fitpoints)
+        assert analytic.shape == (len(SUBS_A), len(params.param_order))
+        np.testing.assert_allclose(analytic, numeric_jacobian(params, fitpoints), rtol=1e-5, atol=1e-8)
+
+
+@pytest.mark.parametrize('key', MODIFIER_EQUATIONS)
+def test_modifier_jacobian_matches_differences(key):
+    rate = np.zeros(len(SUBS_A))
+    for params in parameter_points(deepcopy(EQUATIONS[key]).use_modifier_data()):
+        fitpoints = (SUBS_A, rate, MODIFIER)
+        keep = [pos for pos, par in enumerate(params.param_order) if par != params.modifier]
+        analytic = params.jacf(params, *fitpoints)[:, keep]
+        np.testing.assert_allclose(analytic, numeric_jacobian(params, fitpoints)[:, keep], rtol=1e-5, atol=1e-8)
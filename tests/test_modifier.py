@@ -0,0 +1,62 @@
+"""
+Joint fits of rates measured at several inhibitor concentrations (ModifierSeries)
+"""
+import openpyxl
+
+from calculations import CIparams, ModifierSeries, bootstrap_intervals, find_modifier_fit, modifier_params, \
+    profile_intervals
+from calculations.BatchFitting import make_modifier_output
+
+
+def test_joint_fit_recovers_constants(ci_series, ci_constants):
+    fit = find_modifier_fit(CIparams(), 0, ci_series, cache=False)
+    values = dict(zip(fit.param_order, fit.values))
+    assert abs(values['km'] - ci_constants['km']) < 0.1
+    assert abs(values['v_max'] - ci_constants['v_max']) < 0.1
+    assert abs(values['ki'] - ci_constants['ki']) < 0.1
+    assert len(fit.level_deviations) == len(ci_constants['levels'])
+    assert fit.modifier == 'Inh'
+
+
+def test_intervals_contain_estimates(ci_series):
+    params = modifier_params(CIparams())
+    fit = find_modifier_fit(params, 0, ci_series, cache=False)
+    fitpoints = ci_series.get_allpoints()
+    intervals = bootstrap_intervals(params, fit, fitpoints, n_samples=60, groups=ci_series.store.replicate_bounds(),
+                                    seed=1)
+    profiles = profile_intervals(params, fit, fitpoints, cache=False)
+    assert 'Inh' not in profiles
+    for par in ('km', 'v_max', 'ki'):
+        value = fit.params[par].value
+        assert intervals[par][0] <= value <= intervals[par][1]
+        assert profiles[par][0] < value < profiles[par][1]
+
+
+def test_report_intervals_contain_estimates(tmp_path, ci_series):
+    make_modifier_output(ci_series, str(tmp_path), CIparams(), seed=1, bootstrap=(60, 'residuals'), profiles=True)
+    report = tmp_path / CIparams().name / '{} fit report.xlsx'.format(CIparams().name)
+    rows = [[cell.value for cell in row] for row in openpyxl.load_workbook(str(report))['joint fit'].iter_rows()]
+    estimates = {row[0]: row[1] for row in rows[3:6]}
+    assert set(estimates) == {'km', 'v_max', 'ki'}
+    start = next(pos for pos, row in enumerate(rows) if str(row[0]).startswith('Bootstrap'))
+    for row in rows[start + 2:start + 6]:
+        if row[0] in estimates:
+            assert row[1] <= estimates[row[0]] <= row[2]
+        else:
+            # fixed modifier concentration has no spread
+            assert row[0] == 'Inh' and row[1] == row[2]
+
+
+def test_replicates_are_grouped_by_modifier_concentration():
+    series = ModifierSeries('levels')
+    series.add_replicate('1 2 3', '0.5 0.8 1.0', 2.)
+    series.add_replicate('1 2 3', '0.3 0.5 0.7', 0.)
+    series.add_replicate('1, 2', '0.6, 0.9', 2.)
+    assert series.has_modifier() and not series.is_single()
+    assert series.get_levels() == [2., 0.]
+    assert list(series.get_set_ids()) == [0, 0, 0, 0, 0, 1, 1, 1]
+    subs, rate, modifier = series.get_allpoints()
+    assert len(subs) == len(rate) == 8
+    assert list(modifier) == [2.] * 5 + [0.] * 3
+    series.remove_rep(1, 0)
+    assert series.get_levels() == [2.]
@@ -0,0 +1,43 @@
+"""
+Batch fits seeding richer equations from simpler ones nested in them (opt-in)
+"""
+import os
+
+from calculations import CIparams, MMparams, RestartPlanner
+from calculations.BatchFitting import run_analysis
+
+
+def evaluation_table(savefolder):
+    with open(os.path.join(savefolder, 'evaluations.txt')) as efile:
+        rows = [line.split('\t') for line in efile.read().splitlines()[1:-1]]
+    return {row[0]: row for row in rows}
+
+
+def batch_equations(restarts):
+    equations = [MMparams(), CIparams()]
+    for equa in equations:
+        equa.initializations = restarts
+    return equations
+
+
+def test_restarts_run_by_default(tmp_path, single_substrate):
+    savefolder = run_analysis(single_substrate, str(tmp_path), batch_equations(4), seed=1, cache=False,
+                              planner=RestartPlanner(agree=0))
+    table = evaluation_table(savefolder)
+    assert table['CI'][1] == '-'
+    assert int(table['CI'][2]) == 4
+
+
+def test_nested_seeding_saves_evaluations(tmp_path, single_substrate):
+    planner = RestartPlanner(agree=0)
+    cold = evaluation_table(run_analysis(single_substrate, str(tmp_path / 'cold'), batch_equations(4), seed=1,
+                                         cache=False, planner=planner))
+    seeded = evaluation_table(run_analysis(single_substrate, str(tmp_path / 'seeded'), batch_equations(4), seed=1,
+                                           cache=False, planner=planner, nested=True))
+    assert seeded['CI'][1] == 'MM'
+    assert int(seeded['CI'][2]) == 0
+    # every skipped restart is counted at evaluations of the seeded fit
+    assert int(seeded['CI'][4]) == 4 * int(seeded['CI'][3]) > 0
+    assert int(seeded['CI'][3]) < int(cold['CI'][3])
+    # simplest equation is not seeded, it is fitted the same way in both runs
+    assert seeded['MM'][1:] == cold['MM'][1:]
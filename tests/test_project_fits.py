@@ -0,0 +1,100 @@
+"""
+Fit results stored in project files and reused while data and settings do not change
+"""
+import json
+import zipfile
+
+import numpy as np
+
+import calculations.BatchFitting as batch_fitting
+from calculations import EXTENSION, FITS_FILE, MMparams, ProjectFits, find_fit, find_set_fits, save_project
+
+
+def test_stored_fit_is_restored(tmp_path, single_substrate):
+    fitpoints = single_substrate.get_allpoints()
+    params = MMparams()
+    fit = find_fit(params, 0, *fitpoints, cache=False)
+    fits = ProjectFits()
+    fits.put(params, fitpoints, fit)
+    path = save_project(single_substrate, str(tmp_path / 'project') + EXTENSION, fits=fits.records)
+
+    stored = ProjectFits(path)
+    assert stored._records is None
+    restored = stored.get(MMparams(), fitpoints)
+    np.testing.assert_array_equal(restored.values, fit.values)
+    np.testing.assert_array_equal(restored.stderr, fit.stderr)
+    np.testing.assert_array_equal(restored.covar, fit.covar)
+    np.testing.assert_allclose(restored.residual, fit.residual)
+    assert (restored.nfev, restored.restarts) == (fit.nfev, fit.restarts)
+
+
+def test_changes_invalidate_stored_fit(single_substrate):
+    fitpoints = single_substrate.get_allpoints()
+    params = MMparams()
+    fits = ProjectFits()
+    fits.put(params, fitpoints, find_fit(params, 0, *fitpoints, cache=False))
+    assert fits.get(MMparams(), fitpoints) is not None
+
+    edited = (fitpoints[0], fitpoints[1].copy())
+    edited[1][0] *= 1.01
+    assert fits.get(MMparams(), edited) is None
+    bounds = MMparams()
+    bounds['km'].set(max=50)
+    assert fits.get(bounds, fitpoints) is None
+    start = MMparams()
+    start['km'].set(value=2.)
+    assert fits.get(start, fitpoints) is None
+    restarts = MMparams()
+    restarts.initializations = 5
+    assert fits.get(restarts, fitpoints) is None
+
+
+def test_set_fits_are_stored(two_substrates):
+    params = MMparams()
+    set_fits = find_set_fits(params, 0, two_substrates, orientations=(True,), cache=False)
+    fits = ProjectFits()
+    assert fits.get_sets(params, two_substrates, orientations=(True,)) is None
+    fits.put_sets(params, two_substrates, set_fits)
+    restored = fits.get_sets(params, two_substrates, orientations=(True,))
+    for fit, other in zip(set_fits[True], restored[True]):
+        np.testing.assert_array_equal(fit.values, other.values)
+    assert set(fits.equation_records(params)) == {'MM A {}'.format(pos + 1) for pos in range(len(set_fits[True]))}
+
+
+def test_batch_run_reuses_stored_fits(tmp_path, monkeypatch, single_substrate):
+    fits = ProjectFits()
+    batch_fitting.run_analysis(single_substrate, str(tmp_path), [MMparams()], stored=fits)
+    assert list(fits.records) == ['MM']
+
+    def no_fitting(*args, **kwargs):
+        raise AssertionError('stored fit was not reused')
+    monkeypatch.setattr(batch_fitting, 'find_fit', no_fitting)
+    batch_fitting.run_analysis(single_substrate, str(tmp_path), [MMparams()], stored=fits)
+
+
+def strict_json(text):
+    def refuse(constant):
+        raise ValueError('{} is not valid JSON'.format(constant))
+    return json.loads(text, parse_constant=refuse)
+
+
+def test_unbounded_fit_is_valid_json(tmp_path, single_substrate):
+    fitpoints = single_substrate.get_allpoints()
+    params = MMparams()
+    params['km'].set(min=-np.inf, max=np.inf)
+    fit = find_fit(params, 0, *fitpoints, cache=False)
+    fit.covar[0, 0] = np.nan
+    fits = ProjectFits()
+    fits.put(params, fitpoints, fit)
+    path = save_project(single_substrate, str(tmp_path / 'project') + EXTENSION, fits=fits.records)
+    with zipfile.ZipFile(path) as zfile:
+        record = strict_json(zfile.read(FITS_FILE).decode())['MM']
+    assert record['min'][0] == '-inf' and record['max'][0] == 'inf'
+    assert record['covariance'][0][0] is None
+
+    unbounded = MMparams()
+    unbounded['km'].set(min=-np.inf, max=np.inf)
+    restored = ProjectFits(path).get(unbounded, fitpoints)
+    np.testing.assert_array_equal(restored.lower, fit.lower)
+    np.testing.assert_array_equal(restored.upper, fit.upper)
+    np.testing.assert_array_equal(restored.covar, fit.covar)
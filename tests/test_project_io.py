@@ -0,0 +1,100 @@
+"""
+Versioned project files: round trip of data objects, memory mapping and migration of pickles
+"""
+import json
+import os
+import pickle
+import zipfile
+
+import numpy as np
+import pytest
+
+import calculations.BatchFitting as batch_fitting
+from calculations import EXTENSION, HEADER_FILE, is_project_file, load_fits, load_project, migrate_project, \
+    open_project, save_project
+
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_data')
+SAMPLES = sorted(name for name in os.listdir(SAMPLE_DIR) if name.endswith('.pkl'))
+
+
+def all_points(exp_data):
+    if exp_data.is_single() or exp_data.has_modifier():
+        return [exp_data.get_allpoints()]
+    return [exp_data.get_allpoints(a_var) for a_var in (True, False)]
+
+
+def assert_same_data(first, second):
+    assert type(first) is type(second)
+    assert first.name == second.name
+    for points, other in zip(all_points(first), all_points(second)):
+        for column, other_column in zip(points, other):
+            np.testing.assert_array_equal(column, other_column)
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_migrated_pickle_round_trip(sample, tmp_path):
+    pkl_path = str(tmp_path / sample)
+    with open(os.path.join(SAMPLE_DIR, sample), 'rb') as src, open(pkl_path, 'wb') as dst:
+        dst.write(src.read())
+    path = migrate_project(pkl_path)
+    assert path == os.path.splitext(pkl_path)[0] + EXTENSION
+    assert is_project_file(path) and not is_project_file(pkl_path)
+    legacy = open_project(pkl_path)
+    for mmap in (True, False):
+        assert_same_data(legacy, load_project(path, mmap=mmap))
+    assert load_fits(path) == {}
+
+
+def test_columns_are_memory_mapped(tmp_path, ci_series):
+    path = save_project(ci_series, str(tmp_path / 'series') + EXTENSION)
+    mapped = load_project(path)
+    assert isinstance(mapped.store.buffer, np.memmap)
+    assert not isinstance(load_project(path, mmap=False).store.buffer, np.memmap)
+    # mapped projects can be pickled (sent to workers) and saved to other files
+    assert_same_data(pickle.loads(pickle.dumps(mapped)), ci_series)
+    other = save_project(mapped, str(tmp_path / 'copy') + EXTENSION)
+    assert_same_data(load_project(other), ci_series)
+
+
+def test_loaded_project_is_saved_over_its_file(tmp_path, ci_series):
+    path = save_project(ci_series, str(tmp_path / 'series') + EXTENSION)
+    save_project(load_project(path, mmap=False), path, fits={'MM': {'model': 'MM'}})
+    assert_same_data(load_project(path, mmap=False), ci_series)
+    assert load_fits(path) == {'MM': {'model': 'MM'}}
+
+
+def test_mapped_project_can_be_edited(tmp_path, ci_series):
+    path = save_project(ci_series, str(tmp_path / 'series') + EXTENSION)
+    mapped = load_project(path)
+    mapped.add_replicate(np.array([1., 2.]), np.array([0.5, 0.7]), 20., transform=False)
+    assert mapped.get_levels()[-1] == 20.
+    assert_same_data(load_project(path), ci_series)
+
+
+def test_newer_format_is_refused(tmp_path, ci_series):
+    path = save_project(ci_series, str(tmp_path / 'series') + EXTENSION)
+    with zipfile.ZipFile(path) as zfile:
+        header = json.loads(zfile.read(HEADER_FILE).decode())
+        members = {name: zfile.read(name) for name in zfile.namelist()}
+    header['version'] += 1
+    members[HEADER_FILE] = json.dumps(header)
+    with zipfile.ZipFile(path, 'w') as zfile:
+        for name, data in members.items():
+            zfile.writestr(name, data)
+    with pytest.raises(ValueError):
+        load_project(path)
+
+
+def test_kept_fits_are_saved_to_unmapped_project(tmp_path, monkeypatch):
+    path = migrate_project(os.path.join(SAMPLE_DIR, 'single_s_sample.pkl'), str(tmp_path / 'single') + EXTENSION)
+    saved = []
+
+    def check_save(exp_data, fname, fits=None):
+        assert not isinstance(exp_data.store.buffer, np.memmap)
+        saved.append(fname)
+        return save_project(exp_data, fname, fits)
+    monkeypatch.setattr(batch_fitting, 'save_project', check_save)
+    assert batch_fitting.main([path, '-o', str(tmp_path), '-m', 'MM', '-k']) == 0
+    assert saved == [path]
+    assert list(load_fits(path)) == ['MM']
@@ -0,0 +1,16 @@
+"""
+Fit reports written to excel files
+"""
+import numpy as np
+
+from calculations import MMparams, find_fit
+from calculations.ModelsIO import parameter_rows
+
+
+def test_unbounded_parameters_are_written_as_text(single_substrate):
+    params = MMparams()
+    params['km'].set(min=-np.inf, max=np.inf)
+    fit = find_fit(params, 0, *single_substrate.get_allpoints(), cache=False)
+    rows = {row[0]: row for row in parameter_rows(fit, single_substrate)}
+    assert rows['km'][2:4] == ['-inf', 'inf']
+    assert rows['v_max'][2:4] == [0., 100.]
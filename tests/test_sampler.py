@@ -0,0 +1,44 @@
+"""
+Ensemble sampler of posterior parameter distributions
+"""
+import numpy as np
+import pytest
+
+from calculations import EnsembleSampler, MMparams, find_fit, sample_posterior
+
+
+
+def test_chain_stays_in_bounds(mm_points):
+    params = MMparams(km=(1, 1.2, 1.8), v_max=(1, 1.9, 2.1))
+    fit = find_fit(params, 0, *mm_points, cache=False)
+    sampler = EnsembleSampler(params, mm_points, seed=0)
+    chain = sampler.run(200, sampler.initial_positions(fit))
+    assert chain.shape == (200, sampler.n_walkers, 3)
+    assert 0 < sampler.acceptance_fraction < 1
+    assert np.all(chain[:, :, 0] >= 1.2) and np.all(chain[:, :, 0] <= 1.8)
+    assert np.all(chain[:, :, 1] >= 1.9) and np.all(chain[:, :, 1] <= 2.1)
+    assert np.all(np.isfinite(chain[:, :, -1]))
+
+
+def test_posterior_is_reproducible(tmp_path, mm_points):
+    params = MMparams()
+    fit = find_fit(params, 0, *mm_points, cache=False)
+    path = str(tmp_path / 'chain.npy')
+    chain, summary = sample_posterior(params, fit, mm_points, n_steps=300, thin=2, path=path, seed=3)
+    again, _ = sample_posterior(params, fit, mm_points, n_steps=300, thin=2, seed=3)
+    np.testing.assert_array_equal(np.load(path), again)
+    assert chain.shape[0] == 150
+    for par, (median, low, high) in summary.items():
+        assert low <= fit.params[par].value <= high
+        assert low <= median <= high
+    assert fit.posterior['burn'] == 150 // 4
+
+
+def test_fixed_parameters_are_not_sampled(mm_points):
+    fixed = MMparams()
+    fixed['km'].set(vary=False)
+    sampler = EnsembleSampler(fixed, mm_points, seed=0)
+    assert sampler.columns == [1]
+    fixed['v_max'].set(vary=False)
+    with pytest.raises(ValueError):
+        EnsembleSampler(fixed, mm_points)
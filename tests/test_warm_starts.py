@@ -0,0 +1,56 @@
+"""
+Refits started from the last converged parameters of the same data and equation settings
+"""
+import numpy as np
+
+import calculations.DataFitting as data_fitting
+from calculations import MMparams, WarmStarts, equation_key, find_fit, warm_key
+
+
+class Data(object):
+    uid = 'warm test'
+
+
+def test_settings_change_key():
+    key = warm_key(Data(), MMparams())
+    assert warm_key(Data(), MMparams()) == key
+    bounds = MMparams()
+    bounds['km'].set(max=50)
+    assert warm_key(Data(), bounds) != key
+    fixed = MMparams()
+    fixed['v_max'].set(vary=False)
+    assert warm_key(Data(), fixed) != key
+    restarts = MMparams()
+    restarts.initializations = 5
+    assert warm_key(Data(), restarts) != key
+    # starting values are replaced by the warm start
+    start = MMparams()
+    start['km'].set(value=2.)
+    assert warm_key(Data(), start) == key
+
+
+def test_failed_warm_fit_falls_back_to_search(monkeypatch, mm_points):
+    params = MMparams()
+
+    class Failing(object):
+        def get_solution(self, *points):
+            raise OverflowError
+
+    monkeypatch.setattr(data_fitting, 'with_values', lambda param_object, values: Failing())
+    fit = data_fitting.warm_search(params, 0, mm_points, warm_start=(np.array([1e300, 1e300]), 0.))
+    cold_fit = data_fitting.search_fit(params, 0, mm_points)
+    np.testing.assert_allclose(fit.values, cold_fit.values)
+
+
+def test_forget_equation(mm_points):
+    starts = WarmStarts()
+    fit = find_fit(MMparams(), 0, *mm_points, cache=False)
+    starts.put(('data', 'MM', None, 0), fit, fit.param_order)
+    starts.put(('data', 'HE', None, 0), fit, fit.param_order)
+    starts.put(('other', 'MM', None, 0), fit, fit.param_order)
+    starts.forget('data', equation_key(MMparams()))
+    assert starts.get(('data', 'MM', None, 0)) is None
+    assert starts.get(('data', 'HE', None, 0)) is not None
+    assert starts.get(('other', 'MM', None, 0)) is not None
+    starts.forget('data')
+    assert len(starts) == 1